@@ -5,6 +5,7 @@ const api = {
   getWallets: () => axios.get('/wallets'),
   getWallet: (id) => axios.get('/wallets/${id}'),
   getWalletBalance: (id) => axios.get('/wallets/${id}/balance'),
+  getBalanceHistory: (id, params = {}) => axios.get(`/wallets/${id}/balance-history`, { params }),
 
   getTransactions: (params = {}) => axios.get('/transactions', { params }),
   getTransaction: (id) => axios.get('/transactions/${id}'),
@@ -15,6 +16,8 @@ const api = {
   getCategories: (type) => axios.get('/categories', { params: { type } }),
   getTransactionTypes: () => axios.get('/transaction-types'),
   getWalletTypes: () => axios.get('/wallet-types'),
+
+  getSummary: (params = {}) => axios.get('/summary', { params }),
 };
 
 export default api;
\ No newline at end of file
@@ -19,7 +19,8 @@ const TransactionList = () => {
     fetchTransactions,
     deleteTransaction,
     setFilters,
-    setPagination,
+    nextPage,
+    previousPage,
     clearError,
     refreshTransactions,
   } = useTransaction();
@@ -198,27 +199,26 @@ const TransactionList = () => {
     }, 500);
   };
 
-  const changePage = (newPage) => {
-    if (newPage < 1 || newPage > (pagination?.totalPages || 1)) return;
-    setPagination({ page: newPage });
-  };
-
   const renderPagination = () => {
-    if (!pagination || pagination.totalPages <= 1) return null;
+    if (!pagination) return null;
+    
+    // API memakai cursor: jumlah total halaman tidak diketahui
+    const { page, limit, nextCursor } = pagination;
+    const hasNext = Boolean(nextCursor);
+    if (page === 1 && !hasNext) return null;
     
-    const { page, totalPages, totalItems, limit } = pagination;
     const startItem = ((page - 1) * limit) + 1;
-    const endItem = Math.min(page * limit, totalItems);
+    const endItem = startItem + (transactions?.length || 0) - 1;
     
     return (
       <div className="flex flex-col sm:flex-row items-center justify-between mt-6 gap-4">
         <div className="text-sm text-gray-700">
-          Menampilkan {startItem}-{endItem} dari {totalItems} transaksi
+          Menampilkan {startItem}-{endItem} transaksi
         </div>
         
         <div className="flex items-center space-x-2">
           <button
-            onClick={() => changePage(page - 1)}
+            onClick={previousPage}
             disabled={page === 1}
             className={`p-2 rounded-md ${
               page === 1
@@ -230,14 +230,14 @@ const TransactionList = () => {
           </button>
           
           <div className="text-sm text-gray-700">
-            Halaman {page} dari {totalPages}
+            Halaman {page}
           </div>
           
           <button
-            onClick={() => changePage(page + 1)}
-            disabled={page === totalPages}
+            onClick={nextPage}
+            disabled={!hasNext}
             className={`p-2 rounded-md ${
-              page === totalPages
+              !hasNext
                 ? 'text-gray-400 cursor-not-allowed'
                 : 'text-gray-700 hover:bg-gray-100'
             }`}
@@ -18,9 +18,12 @@ const initialState = {
   pagination: {
     page: 1,
     limit: 10,
-    totalItems: 0,
-    totalPages: 1,
+    // Cursor untuk setiap halaman yang sudah dibuka (halaman 1 tanpa cursor)
+    cursors: [null],
+    nextCursor: null,
   },
+  // Naik setiap kali transaksi ditambah, diubah, atau dihapus
+  revision: 0,
 };
 
 // Action types
@@ -77,17 +80,13 @@ const transactionReducer = (state, action) => {
         walletId: transaction.walletId || transaction.wallet_id,
       }));
       
-      const totalItems = responseData.totalItems || responseData.total || responseData.count || transactions.length;
-      const totalPages = responseData.totalPages || Math.ceil(totalItems / state.pagination.limit);
-      
       return {
         ...state,
         loading: false,
         transactions,
         pagination: {
           ...state.pagination,
-          totalItems,
-          totalPages,
+          nextCursor: responseData.next_cursor || null,
         },
         error: null,
       };
@@ -139,6 +138,7 @@ const transactionReducer = (state, action) => {
         ...state,
         loading: false,
         transactions: [newTransaction, ...currentTransactions],
+        revision: state.revision + 1,
         error: null,
       };
 
@@ -172,6 +172,7 @@ const transactionReducer = (state, action) => {
         transaction: (state.transaction?.id === updatedTransaction.id || state.transaction?._id === updatedTransaction.id)
           ? updatedTransaction
           : state.transaction,
+        revision: state.revision + 1,
         error: null,
       };
 
@@ -195,6 +196,7 @@ const transactionReducer = (state, action) => {
         transaction: (state.transaction?.id === deletedId || state.transaction?._id === deletedId)
           ? null
           : state.transaction,
+        revision: state.revision + 1,
         error: null,
       };
 
@@ -205,7 +207,8 @@ const transactionReducer = (state, action) => {
       return {
         ...state,
         filters: { ...state.filters, ...action.payload },
-        pagination: { ...state.pagination, page: 1 }, // Reset page when filters change
+        // Reset page when filters change
+        pagination: { ...state.pagination, page: 1, cursors: [null], nextCursor: null },
       };
     
     case SET_PAGINATION:
@@ -270,13 +273,13 @@ export const TransactionProvider = ({ children }) => {
   const fetchTransactions = async () => {
     dispatch({ type: FETCH_TRANSACTIONS_REQUEST });
     try {
-      const { page, limit } = state.pagination;
+      const { page, limit, cursors } = state.pagination;
       const { walletId, startDate, endDate, type, searchQuery } = state.filters;
 
       // Build query params
       const params = new URLSearchParams();
-      params.append('page', page.toString());
       params.append('limit', limit.toString());
+      if (cursors[page - 1]) params.append('cursor', cursors[page - 1]);
 
       if (walletId) params.append('walletId', walletId.toString());
       if (startDate) {
@@ -296,7 +299,7 @@ export const TransactionProvider = ({ children }) => {
 
       console.log('Fetching transactions with params:', params.toString());
 
-      const response = await axiosInstance.get('/transactions?${params.toString()}');
+      const response = await axiosInstance.get(`/transactions?${params.toString()}`);
       
       console.log('Fetch transactions response:', response.data);
       
@@ -520,6 +523,23 @@ export const TransactionProvider = ({ children }) => {
     dispatch({ type: SET_PAGINATION, payload: pagination });
   };
 
+  // Go to the next page through next_cursor
+  const nextPage = () => {
+    const { page, cursors, nextCursor } = state.pagination;
+    if (!nextCursor) return;
+    dispatch({
+      type: SET_PAGINATION,
+      payload: { page: page + 1, cursors: [...cursors.slice(0, page), nextCursor] },
+    });
+  };
+
+  // Go back to the previous page (its cursor is kept in cursors)
+  const previousPage = () => {
+    const { page } = state.pagination;
+    if (page <= 1) return;
+    dispatch({ type: SET_PAGINATION, payload: { page: page - 1 } });
+  };
+
   // Clear error
   const clearError = () => {
     dispatch({ type: CLEAR_ERROR });
@@ -549,6 +569,7 @@ export const TransactionProvider = ({ children }) => {
     error: state.error,
     filters: state.filters,
     pagination: state.pagination,
+    revision: state.revision,
     fetchTransactions,
     fetchTransaction,
     addTransaction,
@@ -556,6 +577,8 @@ export const TransactionProvider = ({ children }) => {
     deleteTransaction,
     setFilters,
     setPagination,
+    nextPage,
+    previousPage,
     clearError,
     resetTransaction,
     calculateBalance,
@@ -8,6 +8,8 @@ const initialState = {
   loading: false,
   error: null,
   totalBalance: 0,
+  // Naik setiap kali dompet ditambah, diubah, atau dihapus
+  revision: 0,
 };
 
 // Action types
@@ -61,6 +63,7 @@ const walletReducer = (state, action) => {
         loading: false,
         wallets: newWallets,
         totalBalance: newTotalBalance,
+        revision: state.revision + 1,
         error: null,
       };
     
@@ -86,6 +89,7 @@ const walletReducer = (state, action) => {
           state.currentWallet?.id === action.payload.id
             ? action.payload
             : state.currentWallet,
+        revision: state.revision + 1,
         error: null,
       };
     
@@ -109,6 +113,7 @@ const walletReducer = (state, action) => {
           state.currentWallet?.id === action.payload
             ? null
             : state.currentWallet,
+        revision: state.revision + 1,
         error: null,
       };
     
@@ -420,6 +425,7 @@ export const WalletProvider = ({ children }) => {
     loading: state.loading,
     error: state.error,
     totalBalance: state.totalBalance,
+    revision: state.revision,
     
     // Actions
     fetchWallets,
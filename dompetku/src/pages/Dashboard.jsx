@@ -11,13 +11,67 @@ import { formatDate } from '../utils/dateFormatter';
 import { FiPlus, FiArrowDown, FiArrowUp, FiCreditCard, FiDollarSign } from 'react-icons/fi';
 import { Link } from 'react-router-dom';
 import TransactionPDFExporter from '../components/transaction/TransactionPDFExporter';
+import axiosInstance from '../api/axios';
+import { format } from 'date-fns';
+
+// Date range of a dashboard period in the browser's local time ({ null, null } for all-time)
+const getPeriodRange = (period) => {
+  const now = new Date();
+  let startDate, endDate;
+
+  switch (period) {
+    case 'today':
+      startDate = new Date(now.setHours(0, 0, 0, 0));
+      endDate = new Date(now.setHours(23, 59, 59, 999));
+      break;
+    case 'this-week':
+      // Start of week (Sunday)
+      startDate = new Date(now);
+      startDate.setDate(now.getDate() - now.getDay());
+      startDate.setHours(0, 0, 0, 0);
+      // End of week (Saturday)
+      endDate = new Date(startDate);
+      endDate.setDate(startDate.getDate() + 6);
+      endDate.setHours(23, 59, 59, 999);
+      break;
+    case 'this-month':
+    default:
+      // Start of month
+      startDate = new Date(now.getFullYear(), now.getMonth(), 1);
+      // End of month
+      endDate = new Date(now.getFullYear(), now.getMonth() + 1, 0, 23, 59, 59, 999);
+      break;
+    case 'last-month':
+      // Start of last month
+      startDate = new Date(now.getFullYear(), now.getMonth() - 1, 1);
+      // End of last month
+      endDate = new Date(now.getFullYear(), now.getMonth(), 0, 23, 59, 59, 999);
+      break;
+    case 'this-year':
+      // Start of year
+      startDate = new Date(now.getFullYear(), 0, 1);
+      // End of year
+      endDate = new Date(now.getFullYear(), 11, 31, 23, 59, 59, 999);
+      break;
+    case 'all-time':
+      startDate = null;
+      endDate = null;
+      break;
+  }
+
+  return { startDate, endDate };
+};
+
+// YYYY-MM-DD of a date in local time (toISOString would shift it to UTC)
+const toLocalDateString = (date) => format(date, 'yyyy-MM-dd');
 
 const Dashboard = () => {
   const { currentUser } = useAuth();
-  const { wallets, loading: walletsLoading } = useWallet();
+  const { wallets, loading: walletsLoading, revision: walletRevision } = useWallet();
   const {
     transactions,
     filters,
+    revision: transactionRevision,
     loading: transactionsLoading,
     fetchTransactions,
     setFilters,
@@ -36,77 +90,38 @@ const Dashboard = () => {
 
   // Load transactions for the current period when component mounts
   useEffect(() => {
-    const now = new Date();
-    let startDate, endDate;
-
-    switch (period) {
-      case 'today':
-        startDate = new Date(now.setHours(0, 0, 0, 0));
-        endDate = new Date(now.setHours(23, 59, 59, 999));
-        break;
-      case 'this-week':
-        // Start of week (Sunday)
-        startDate = new Date(now);
-        startDate.setDate(now.getDate() - now.getDay());
-        startDate.setHours(0, 0, 0, 0);
-        // End of week (Saturday)
-        endDate = new Date(startDate);
-        endDate.setDate(startDate.getDate() + 6);
-        endDate.setHours(23, 59, 59, 999);
-        break;
-      case 'this-month':
-      default:
-        // Start of month
-        startDate = new Date(now.getFullYear(), now.getMonth(), 1);
-        // End of month
-        endDate = new Date(now.getFullYear(), now.getMonth() + 1, 0, 23, 59, 59, 999);
-        break;
-      case 'last-month':
-        // Start of last month
-        startDate = new Date(now.getFullYear(), now.getMonth() - 1, 1);
-        // End of last month
-        endDate = new Date(now.getFullYear(), now.getMonth(), 0, 23, 59, 59, 999);
-        break;
-      case 'this-year':
-        // Start of year
-        startDate = new Date(now.getFullYear(), 0, 1);
-        // End of year
-        endDate = new Date(now.getFullYear(), 11, 31, 23, 59, 59, 999);
-        break;
-      case 'all-time':
-        startDate = null;
-        endDate = null;
-        break;
-    }
-
-    setFilters({
-      startDate,
-      endDate,
-    });
+    setFilters(getPeriodRange(period));
   }, [period]);
 
-  // Update summary data when transactions or wallets change
+  // Totals are aggregated on the server so the dashboard never downloads the period's rows.
+  // Refetched only when the period changes or a wallet/transaction is added, edited or deleted;
+  // the range is computed here so "today" follows the user's clock, not the server's.
   useEffect(() => {
-    // Calculate total balance from all wallets
-    const totalBalance = wallets.reduce((sum, wallet) => sum + wallet.balance, 0);
-
-    // Calculate income, expense, and net flow for the current period
-    const filteredTransactions = transactions;
-    const totalIncome = filteredTransactions
-      .filter((t) => t.type === 'income')
-      .reduce((sum, t) => sum + t.amount, 0);
-    const totalExpense = filteredTransactions
-      .filter((t) => t.type === 'expense')
-      .reduce((sum, t) => sum + t.amount, 0);
-    const netFlow = totalIncome - totalExpense;
+    const fetchSummary = async () => {
+      const { startDate, endDate } = getPeriodRange(period);
+      const params = startDate
+        ? {
+            period: 'custom',
+            startDate: toLocalDateString(startDate),
+            endDate: toLocalDateString(endDate),
+          }
+        : { period };
+      try {
+        const response = await axiosInstance.get('/summary', { params });
+        const data = response.data?.data || {};
+        setSummary({
+          totalBalance: data.total_balance || 0,
+          totalIncome: data.total_income || 0,
+          totalExpense: data.total_expense || 0,
+          netFlow: data.net_flow || 0,
+        });
+      } catch (error) {
+        console.error('Failed to fetch summary:', error);
+      }
+    };
 
-    setSummary({
-      totalBalance,
-      totalIncome,
-      totalExpense,
-      netFlow,
-    });
-  }, [wallets, transactions]);
+    fetchSummary();
+  }, [period, walletRevision, transactionRevision]);
 
   // Get recent transactions (last 5)
   const recentTransactions = transactions.slice(0, 5);
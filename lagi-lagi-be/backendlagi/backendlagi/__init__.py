@@ -16,8 +16,9 @@ def main(global_config, **settings):
         
         config.include('pyramid_jinja2')
         config.include('.models')
+        config.include('.metrics')
         config.include('.routes')
-        config.scan()
+        config.include('.views')
     return config.make_wsgi_app()
 
 
@@ -0,0 +1,34 @@
+"""create transaction_rollups table
+
+Revision ID: 4a8ba941d4bb
+Revises: ed0c7e98b249
+Create Date: 2026-10-17 11:03:27.540193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '4a8ba941d4bb'
+down_revision = 'ed0c7e98b249'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Isi awal tabel dilakukan oleh `rebuild_backendlagi_rollups <ini>`.
+    op.create_table('transaction_rollups',
+    sa.Column('wallet_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('tipe_transaksi', postgresql.ENUM('income', 'expense', name='transactiontype', create_type=False), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id', 'month', 'category_id', 'tipe_transaksi')
+    )
+
+
+def downgrade():
+    op.drop_table('transaction_rollups')
@@ -0,0 +1,29 @@
+"""create collection_versions table
+
+Revision ID: 5e2d8b7f0a16
+Revises: c3f9a1e6b802
+Create Date: 2026-10-17 22:31:54.870213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2d8b7f0a16'
+down_revision = 'c3f9a1e6b802'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('collection_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('collection_versions')
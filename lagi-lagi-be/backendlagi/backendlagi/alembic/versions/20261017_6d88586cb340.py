@@ -0,0 +1,39 @@
+"""create archive_segments table
+
+Revision ID: 6d88586cb340
+Revises: d2a7e4b91c58
+Create Date: 2026-10-18 00:41:17.402261
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d88586cb340'
+down_revision = 'd2a7e4b91c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Diisi oleh `archive_backendlagi_transactions <ini>`; uang dalam sen seperti kolom Money lain.
+    op.create_table('archive_segments',
+    sa.Column('wallet_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('min_id', sa.Integer(), nullable=False),
+    sa.Column('max_id', sa.Integer(), nullable=False),
+    sa.Column('income', sa.BigInteger(), nullable=False),
+    sa.Column('expense', sa.BigInteger(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id', 'month')
+    )
+
+
+def downgrade():
+    op.drop_table('archive_segments')
@@ -0,0 +1,31 @@
+"""create balance_snapshots table
+
+Revision ID: 7c1e52a9d3f4
+Revises: 4a8ba941d4bb
+Create Date: 2026-10-17 21:02:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e52a9d3f4'
+down_revision = '4a8ba941d4bb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Isi awal tabel dilakukan oleh `rebuild_backendlagi_rollups <ini>`.
+    op.create_table('balance_snapshots',
+    sa.Column('wallet_id', sa.Integer(), nullable=False),
+    sa.Column('as_of', sa.DateTime(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('wallet_id', 'as_of')
+    )
+
+
+def downgrade():
+    op.drop_table('balance_snapshots')
@@ -0,0 +1,155 @@
+"""store money as integer sen
+
+Revision ID: 9b4f6c2d8e31
+Revises: 5e2d8b7f0a16
+Create Date: 2026-10-17 23:12:40.518364
+
+On PostgreSQL the conversion runs online. A ``<column>_sen`` BIGINT column
+is added next to every FLOAT money column, and a trigger keeps it in step
+with writes made by the running application. Existing rows are then
+backfilled in key-range batches, each batch in its own short transaction,
+so only the rows of one batch are locked at a time. NOT NULL is proven with
+a CHECK validated without blocking writes. The last step swaps the columns
+in a single brief ACCESS EXCLUSIVE transaction (``lock_timeout`` bounds the
+wait). Deploy the application version that reads sen right after it: the
+previous version would write rupiah into the new columns.
+
+On SQLite the tables are rebuilt in place.
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from backendlagi.models.search import SQLITE_FTS_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4f6c2d8e31'
+down_revision = '5e2d8b7f0a16'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+# tabel -> (kolom kunci untuk batch, lebar rentang kunci per batch, [(kolom uang, nullable)])
+MONEY_COLUMNS = {
+    'transactions': ('id', 10000, [('jumlah', False)]),
+    'wallets': ('id', 10000, [('saldo_awal', True), ('saldo_saat_ini', True)]),
+    'transaction_rollups': ('wallet_id', 50, [('total', False)]),
+    'balance_snapshots': ('wallet_id', 50, [('balance', False)]),
+}
+SWAP_LOCK_TIMEOUT = '10s'
+
+
+def _sen(column):
+    # float8 -> numeric memakai digit terpendek, jadi 10.05 menjadi 1005 (bukan 1004)
+    return 'round(%s::numeric * 100)' % column
+
+
+def _expand_postgresql(bind, table, key, step, columns):
+    assignments = '\n'.join(
+        '    NEW.%s_sen := %s;' % (column, _sen('NEW.' + column)) for column, _ in columns
+    )
+    op.execute(
+        'CREATE OR REPLACE FUNCTION %s_money_sen() RETURNS trigger AS $$\nBEGIN\n%s\n'
+        '    RETURN NEW;\nEND $$ LANGUAGE plpgsql' % (table, assignments)
+    )
+    for column, _ in columns:
+        op.execute('ALTER TABLE %s ADD COLUMN IF NOT EXISTS %s_sen BIGINT' % (table, column))
+    op.execute('DROP TRIGGER IF EXISTS %s_money_sen ON %s' % (table, table))
+    op.execute(
+        'CREATE TRIGGER %s_money_sen BEFORE INSERT OR UPDATE ON %s '
+        'FOR EACH ROW EXECUTE FUNCTION %s_money_sen()' % (table, table, table)
+    )
+
+    # Baris baru sudah diisi trigger; cukup sampai kunci terbesar saat ini
+    low, high = bind.execute(sa.text('SELECT min(%s), max(%s) FROM %s' % (key, key, table))).one()
+    if low is not None:
+        missing = ' OR '.join('%s_sen IS NULL' % column for column, _ in columns)
+        stmt = sa.text(
+            'UPDATE %s SET %s WHERE %s >= :low AND %s < :high AND (%s)' % (
+                table,
+                ', '.join('%s_sen = %s' % (column, _sen(column)) for column, _ in columns),
+                key, key, missing,
+            )
+        )
+        updated = 0
+        for start in range(low, high + 1, step):
+            # autocommit: setiap batch transaksi sendiri
+            updated += bind.execute(stmt, {'low': start, 'high': start + step}).rowcount
+        log.info('Backfilled %d rows of %s', updated, table)
+
+    for column, nullable in columns:
+        if nullable:
+            continue
+        constraint = 'ck_%s_%s_sen_not_null' % (table, column)
+        op.execute('ALTER TABLE %s DROP CONSTRAINT IF EXISTS %s' % (table, constraint))
+        op.execute('ALTER TABLE %s ADD CONSTRAINT %s CHECK (%s_sen IS NOT NULL) NOT VALID'
+                   % (table, constraint, column))
+        # SHARE UPDATE EXCLUSIVE: pemindaian tidak menahan insert/update
+        op.execute('ALTER TABLE %s VALIDATE CONSTRAINT %s' % (table, constraint))
+
+
+def _swap_postgresql(table, columns):
+    op.execute('DROP TRIGGER %s_money_sen ON %s' % (table, table))
+    op.execute('DROP FUNCTION %s_money_sen()' % table)
+    for column, nullable in columns:
+        op.execute('ALTER TABLE %s DROP COLUMN %s' % (table, column))
+        op.execute('ALTER TABLE %s RENAME COLUMN %s_sen TO %s' % (table, column, column))
+        if not nullable:
+            # Memakai CHECK yang sudah divalidasi, tanpa memindai tabel lagi
+            constraint = 'ck_%s_%s_sen_not_null' % (table, column)
+            op.execute('ALTER TABLE %s ALTER COLUMN %s SET NOT NULL' % (table, column))
+            op.execute('ALTER TABLE %s DROP CONSTRAINT %s' % (table, constraint))
+
+
+def _sqlite_has_fts(bind):
+    return bind.execute(sa.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+    )).first() is not None
+
+
+def _rebuild_sqlite(bind, new_type, old_type):
+    fts = _sqlite_has_fts(bind)
+    for table, (_, _, columns) in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table, recreate='always') as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(column, type_=new_type, existing_type=old_type,
+                                      existing_nullable=nullable)
+    if fts:
+        # Trigger ikut terhapus bersama tabel transactions yang lama
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table, (key, step, columns) in MONEY_COLUMNS.items():
+                _expand_postgresql(bind, table, key, step, columns)
+        # Pertukaran kolom: satu transaksi singkat (transaksi migrasi ini)
+        op.execute("SET LOCAL lock_timeout = '%s'" % SWAP_LOCK_TIMEOUT)
+        for table, (_, _, columns) in MONEY_COLUMNS.items():
+            _swap_postgresql(table, columns)
+    elif bind.dialect.name == 'sqlite':
+        for table, (_, _, columns) in MONEY_COLUMNS.items():
+            for column, _ in columns:
+                op.execute('UPDATE %s SET %s = ROUND(%s * 100)' % (table, column, column))
+        _rebuild_sqlite(bind, sa.BigInteger(), sa.Float())
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Menulis ulang tabel; downgrade tidak dimaksudkan berjalan online
+        for table, (_, _, columns) in MONEY_COLUMNS.items():
+            for column, _ in columns:
+                op.alter_column(table, column, type_=sa.Float(), existing_type=sa.BigInteger(),
+                                postgresql_using='%s / 100.0' % column)
+    elif bind.dialect.name == 'sqlite':
+        _rebuild_sqlite(bind, sa.Float(), sa.BigInteger())
+        for table, (_, _, columns) in MONEY_COLUMNS.items():
+            for column, _ in columns:
+                op.execute('UPDATE %s SET %s = %s / 100.0' % (table, column, column))
@@ -0,0 +1,54 @@
+"""add text search index on transactions
+
+Revision ID: c3f9a1e6b802
+Revises: 7c1e52a9d3f4
+Create Date: 2026-10-17 21:48:09.102557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backendlagi.models.search import SQLITE_DDL, SQLITE_REBUILD
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9a1e6b802'
+down_revision = '7c1e52a9d3f4'
+branch_labels = None
+depends_on = None
+
+# isi indeks dari baris yang sudah ada
+SQLITE_UPGRADE = SQLITE_DDL + [SQLITE_REBUILD]
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS transactions_fts_insert',
+    'DROP TRIGGER IF EXISTS transactions_fts_delete',
+    'DROP TRIGGER IF EXISTS transactions_fts_update',
+    'DROP TABLE IF EXISTS transactions_fts',
+]
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        # CONCURRENTLY keeps writes to transactions going while the index builds
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_transactions_search', 'transactions',
+                [sa.text("to_tsvector('simple'::regconfig, "
+                         "coalesce(deskripsi, '') || ' ' || coalesce(catatan, ''))")],
+                postgresql_using='gin', postgresql_concurrently=True,
+            )
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_transactions_search', table_name='transactions',
+                          postgresql_concurrently=True)
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
@@ -0,0 +1,176 @@
+"""partition transactions by month
+
+Revision ID: d2a7e4b91c58
+Revises: 9b4f6c2d8e31
+Create Date: 2026-10-17 23:58:02.114930
+
+PostgreSQL only; SQLite keeps the plain table. The heap table is converted
+online:
+
+1. ``transactions_partitioned`` is created, ``PARTITION BY RANGE
+   (tanggal)``. It gets one partition per month that has rows, the coming
+   months and a DEFAULT partition.
+2. A trigger mirrors every insert, update and delete on ``transactions``
+   into it.
+3. Existing rows are copied in id-range batches, one transaction each.
+   ``SELECT ... FOR UPDATE`` makes a concurrent update wait for the batch
+   (or the batch for the update), so the mirror never loses a newer row
+   version. ``ON CONFLICT DO NOTHING`` skips rows the trigger already
+   copied.
+4. One short transaction, bounded by ``lock_timeout``, drops the old table
+   and renames the new one, its indexes and constraints into place.
+
+The primary key becomes ``(id, tanggal)``, as PostgreSQL requires the
+partition key in it; ``id`` stays unique through its sequence.
+"""
+import logging
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7e4b91c58'
+down_revision = '9b4f6c2d8e31'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+NEW = 'transactions_partitioned'
+COLUMNS = 'id, tipe_transaksi, jumlah, deskripsi, wallet_id, tanggal, catatan, created_at, category_id'
+BATCH_SIZE = 10000
+PREMAKE = 3
+SWAP_LOCK_TIMEOUT = '10s'
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(deskripsi, '') || ' ' || coalesce(catatan, ''))"
+)
+
+CREATE_TABLE = """CREATE TABLE {table} (
+    id INTEGER NOT NULL DEFAULT nextval('transactions_id_seq'::regclass),
+    tipe_transaksi transactiontype NOT NULL,
+    jumlah BIGINT NOT NULL,
+    deskripsi VARCHAR(255),
+    wallet_id INTEGER NOT NULL,
+    tanggal TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    catatan VARCHAR(500),
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    category_id INTEGER NOT NULL,
+    CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key}),
+    CONSTRAINT {table}_category_id_fkey FOREIGN KEY (category_id) REFERENCES category (id),
+    CONSTRAINT {table}_wallet_id_fkey FOREIGN KEY (wallet_id) REFERENCES wallets (id)
+){partition_by}"""
+# (nama indeks tanpa awalan tabel, definisi)
+INDEXES = [
+    ('wallet_id_tanggal_id', 'btree (wallet_id, tanggal, id)'),
+    ('tanggal_id', 'btree (tanggal, id)'),
+    ('search', 'gin (%s)' % SEARCH_DOCUMENT),
+]
+
+MIRROR_FUNCTION = """CREATE OR REPLACE FUNCTION transactions_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {new} WHERE id = OLD.id AND tanggal = OLD.tanggal;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {new} ({columns})
+        VALUES (NEW.id, NEW.tipe_transaksi, NEW.jumlah, NEW.deskripsi, NEW.wallet_id,
+                NEW.tanggal, NEW.catatan, NEW.created_at, NEW.category_id)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql""".format(new=NEW, columns=COLUMNS)
+
+# Bulan-bulan yang berisi data, lewat indeks (tanggal, id): satu lompatan per bulan
+DISTINCT_MONTHS = """WITH RECURSIVE months(month) AS (
+    SELECT date_trunc('month', min(tanggal)) FROM transactions
+    UNION ALL
+    SELECT (SELECT date_trunc('month', min(tanggal)) FROM transactions
+            WHERE tanggal >= months.month + interval '1 month')
+    FROM months WHERE months.month IS NOT NULL
+)
+SELECT month FROM months WHERE month IS NOT NULL"""
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(bind):
+    months = set(bind.execute(sa.text(DISTINCT_MONTHS)).scalars())
+    current = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    months.update(_add_months(current, offset) for offset in range(PREMAKE + 1))
+    op.execute('CREATE TABLE transactions_default PARTITION OF %s DEFAULT' % NEW)
+    for month in sorted(months):
+        op.execute("CREATE TABLE transactions_p%04d_%02d PARTITION OF %s FOR VALUES FROM ('%s') TO ('%s')"
+                   % (month.year, month.month, NEW, month, _add_months(month, 1)))
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(CREATE_TABLE.format(table=NEW, primary_key='id, tanggal',
+                                       partition_by=' PARTITION BY RANGE (tanggal)'))
+        for name, definition in INDEXES:
+            op.execute('CREATE INDEX ix_%s_%s ON %s USING %s' % (NEW, name, NEW, definition))
+        _create_partitions(bind)
+
+        op.execute(MIRROR_FUNCTION)
+        op.execute('CREATE TRIGGER transactions_mirror AFTER INSERT OR UPDATE OR DELETE ON transactions '
+                   'FOR EACH ROW EXECUTE FUNCTION transactions_mirror()')
+
+        # Baris baru sesudah ini sudah dicerminkan trigger
+        low, high = bind.execute(sa.text('SELECT min(id), max(id) FROM transactions')).one()
+        if low is not None:
+            copy = sa.text(
+                'INSERT INTO %s (%s) SELECT %s FROM transactions '
+                'WHERE id >= :low AND id < :high FOR UPDATE ON CONFLICT DO NOTHING'
+                % (NEW, COLUMNS, COLUMNS)
+            )
+            copied = 0
+            for start in range(low, high + 1, BATCH_SIZE):
+                copied += bind.execute(copy, {'low': start, 'high': start + BATCH_SIZE}).rowcount
+            log.info('Copied %d rows into %s', copied, NEW)
+        op.execute('ANALYZE %s' % NEW)
+
+    # Pertukaran: satu transaksi singkat (transaksi migrasi ini)
+    op.execute("SET LOCAL lock_timeout = '%s'" % SWAP_LOCK_TIMEOUT)
+    op.execute('LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER transactions_mirror ON transactions')
+    op.execute('DROP FUNCTION transactions_mirror()')
+    op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY %s.id' % NEW)
+    op.execute('DROP TABLE transactions')
+    op.execute('ALTER TABLE %s RENAME TO transactions' % NEW)
+    op.execute('ALTER INDEX %s_pkey RENAME TO transactions_pkey' % NEW)
+    for name, _ in INDEXES:
+        op.execute('ALTER INDEX ix_%s_%s RENAME TO ix_transactions_%s' % (NEW, name, name))
+    for column in ('category_id', 'wallet_id'):
+        op.execute('ALTER TABLE transactions RENAME CONSTRAINT %s_%s_fkey TO transactions_%s_fkey'
+                   % (NEW, column, column))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Tidak online: tabel dikunci selama penyalinan
+    old = 'transactions_unpartitioned'
+    op.execute('LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE')
+    op.execute(CREATE_TABLE.format(table=old, primary_key='id', partition_by=''))
+    op.execute('INSERT INTO %s (%s) SELECT %s FROM transactions' % (old, COLUMNS, COLUMNS))
+    op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY %s.id' % old)
+    op.execute('DROP TABLE transactions')
+    op.execute('ALTER TABLE %s RENAME TO transactions' % old)
+    op.execute('ALTER INDEX %s_pkey RENAME TO transactions_pkey' % old)
+    for column in ('category_id', 'wallet_id'):
+        op.execute('ALTER TABLE transactions RENAME CONSTRAINT %s_%s_fkey TO transactions_%s_fkey'
+                   % (old, column, column))
+    for name, definition in INDEXES:
+        op.execute('CREATE INDEX ix_transactions_%s ON transactions USING %s' % (name, definition))
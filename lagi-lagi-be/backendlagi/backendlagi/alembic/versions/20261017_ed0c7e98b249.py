@@ -0,0 +1,34 @@
+"""add keyset pagination indexes on transactions
+
+Revision ID: ed0c7e98b249
+Revises: 9d98f00e6fd5
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed0c7e98b249'
+down_revision = '9d98f00e6fd5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_transactions_wallet_id_tanggal_id',
+        'transactions',
+        ['wallet_id', 'tanggal', 'id'],
+    )
+    op.create_index(
+        'ix_transactions_tanggal_id',
+        'transactions',
+        ['tanggal', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_tanggal_id', table_name='transactions')
+    op.drop_index('ix_transactions_wallet_id_tanggal_id', table_name='transactions')
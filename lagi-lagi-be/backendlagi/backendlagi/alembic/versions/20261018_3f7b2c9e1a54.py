@@ -0,0 +1,26 @@
+"""per-wallet change counters
+
+Revision ID: 3f7b2c9e1a54
+Revises: 6d88586cb340
+Create Date: 2026-10-18 09:12:40.518377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7b2c9e1a54'
+down_revision = '6d88586cb340'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Penghitung global diganti baris per dompet ("transactions:42"); yang
+    # belum ada dihitung 0, jadi cukup membuang baris lama
+    op.execute("DELETE FROM collection_versions WHERE name IN ('wallets', 'transactions')")
+
+
+def downgrade():
+    op.execute("DELETE FROM collection_versions WHERE name LIKE '%:%'")
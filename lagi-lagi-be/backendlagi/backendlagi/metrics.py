@@ -0,0 +1,246 @@
+# metrics.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from pyramid.tweens import INGRESS
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+DEFAULT_QUERY_WARNING = 25
+UNMATCHED = '<unmatched>'
+
+# Request yang sedang berjalan di thread ini, untuk listener cursor
+_current = threading.local()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter(object):
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def observe(self, key, amount=1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s counter' % self.name]
+        for key in sorted(self.values):
+            lines.append('%s%s %s' % (self.name, _labels(self.labels, key), _number(self.values[key])))
+        return lines
+
+
+class Histogram(object):
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # key -> [hitungan per bucket (tidak kumulatif) + overflow, jumlah]
+        self.values = {}
+
+    def observe(self, key, value):
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s histogram' % self.name]
+        for key in sorted(self.values):
+            counts, total = self.values[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == '+Inf' else _number(float(bound)))
+                lines.append('%s_bucket%s %d' % (self.name, _labels(self.labels, key, le), cumulative))
+            lines.append('%s_sum%s %s' % (self.name, _labels(self.labels, key), _number(total)))
+            lines.append('%s_count%s %d' % (self.name, _labels(self.labels, key), cumulative))
+        return lines
+
+
+class RequestRecord(object):
+    """What one request did: route, timing, SQL statements and DB time."""
+
+    __slots__ = ('method', 'route', 'started', 'queries', 'db_time', 'query_started')
+
+    def __init__(self, method):
+        self.method = method
+        self.route = UNMATCHED
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.query_started = None
+
+
+class Metrics(object):
+    """Thread-safe per-route request metrics, rendered in Prometheus text format.
+
+    ``start()``/``finish()`` bracket a request; SQL statements executed on
+    the same thread in between are counted by ``instrument_engine``.
+    Requests running more than ``query_warning`` statements are logged as
+    likely N+1 query patterns (0 disables the warning).
+    """
+
+    def __init__(self, query_warning=DEFAULT_QUERY_WARNING):
+        self.query_warning = query_warning
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            'backendlagi_requests_total', 'Requests by route, method and status code.',
+            ('route', 'method', 'status'))
+        self.latency = Histogram(
+            'backendlagi_request_duration_seconds', 'Request latency by route, including streaming.',
+            ('route', 'method'), LATENCY_BUCKETS)
+        self.queries = Histogram(
+            'backendlagi_request_sql_statements', 'SQL statements executed per request.',
+            ('route', 'method'), QUERY_BUCKETS)
+        self.db_time = Histogram(
+            'backendlagi_request_db_seconds', 'Time spent in SQL statements per request.',
+            ('route', 'method'), LATENCY_BUCKETS)
+        self.size = Histogram(
+            'backendlagi_response_size_bytes', 'Response body size.',
+            ('route', 'method'), SIZE_BUCKETS)
+        self.warnings = Counter(
+            'backendlagi_sql_statement_warnings_total',
+            'Requests that exceeded the SQL statement warning threshold.',
+            ('route', 'method'))
+        self.series = (self.requests, self.latency, self.queries, self.db_time, self.size, self.warnings)
+
+    def start(self, request):
+        record = RequestRecord(request.method)
+        _current.record = record
+        return record
+
+    def finish(self, record, status, size):
+        duration = time.perf_counter() - record.started
+        key = (record.route, record.method)
+        exceeded = self.query_warning and record.queries > self.query_warning
+        with self._lock:
+            self.requests.observe(key + (str(status),))
+            self.latency.observe(key, duration)
+            self.queries.observe(key, record.queries)
+            self.db_time.observe(key, record.db_time)
+            self.size.observe(key, size)
+            if exceeded:
+                self.warnings.observe(key)
+        if exceeded:
+            log.warning('%s %s ran %d SQL statements (threshold %d); possible N+1 queries',
+                        record.method, record.route, record.queries, self.query_warning)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for series in self.series:
+                lines.extend(series.render())
+        return '\n'.join(lines) + '\n'
+
+
+def metered_app_iter(app_iter, metrics, record, status):
+    """Stream ``app_iter`` counting its bytes and SQL; the record is finished on close."""
+    size = 0
+    iterator = iter(app_iter)
+    try:
+        while True:
+            _current.record = record
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.record = None
+            size += len(chunk)
+            yield chunk
+    finally:
+        try:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        finally:
+            metrics.finish(record, status, size)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_current, 'record', None)
+    if record is not None:
+        record.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_current, 'record', None)
+    if record is not None and record.query_started is not None:
+        record.queries += 1
+        record.db_time += time.perf_counter() - record.query_started
+        record.query_started = None
+
+
+def instrument_engine(engine):
+    """Count the statements ``engine`` runs for the request on the current thread."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def metrics_tween_factory(handler, registry):
+    metrics = registry['metrics']
+
+    def metrics_tween(request):
+        record = metrics.start(request)
+        try:
+            response = handler(request)
+        except Exception:
+            _current.record = None
+            if request.matched_route is not None:
+                record.route = request.matched_route.name
+            metrics.finish(record, 500, 0)
+            raise
+        _current.record = None
+        if request.matched_route is not None:
+            record.route = request.matched_route.name
+
+        if response.content_length is None and request.method != 'HEAD':
+            response.app_iter = metered_app_iter(response.app_iter, metrics, record, response.status_int)
+        else:
+            metrics.finish(record, response.status_int, response.content_length or 0)
+        return response
+
+    return metrics_tween
+
+
+def includeme(config):
+    """
+    Record per-route request metrics and serve them on ``/metrics``.
+
+    Include after ``backendlagi.models`` (it instruments that engine).
+    ``backendlagi.metrics.query_warning`` sets the per-request SQL statement
+    count above which a warning is logged.
+
+    """
+    settings = config.get_settings()
+    metrics = Metrics(int(settings.get('backendlagi.metrics.query_warning', DEFAULT_QUERY_WARNING)))
+    config.registry['metrics'] = metrics
+    instrument_engine(config.registry['dbsession_factory'].kw['bind'])
+
+    # Paling luar (setelah INGRESS) supaya commit pyramid_tm ikut terukur
+    config.add_tween('backendlagi.metrics.metrics_tween_factory', under=INGRESS)
@@ -1,24 +1,154 @@
+from pyramid.path import DottedNameResolver
+from pyramid.settings import asbool
 from sqlalchemy import engine_from_config
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import configure_mappers
-from .base import Base, get_db_session, create_tables, engine
-from .wallet import Wallet, WalletType
+from .base import Base, create_tables
+from .wallet import Wallet, WalletType, adjust_wallet_balance
 from .transaction import Transaction, TransactionType, expenseCategory, incomeCategory
 from .category import Category, TransactionType  # Import TransactionType dari category.py
+from .archive import (
+    ArchiveError, ArchiveSegment, TransactionArchive, TransactionFilter,
+    archived_through, discard_archive,
+)
+from .rollup import TransactionRollup, apply_rollup_delta, rebuild_rollups
+from .snapshot import (
+    BalanceSnapshot, balance_at, discard_snapshots, rebuild_snapshots,
+    refresh_snapshots, shift_snapshots, balance_history,
+)
+from .search import apply_search, search_terms
+from .partitions import ensure_partitions, maintain_partitions
+from .versions import CollectionVersion, bump_versions, get_versions
+from .mymodel import MyModel
+from .pool_stats import DEFAULT_MAX_OVERFLOW, PoolStats, track_pool_waits
+from .cache import LocalInvalidation, PostgresInvalidation, WalletCache
+import logging
+import threading
 import zope.sqlalchemy
 
+log = logging.getLogger(__name__)
+
+# Opsi koneksi PostgreSQL untuk bacaan yang melihat satu snapshot
+READ_SNAPSHOT = {'isolation_level': 'REPEATABLE READ', 'postgresql_readonly': True}
+
 __all__ = [
-    'Base', 'get_db_session', 'create_tables', 'engine',
+    'Base', 'create_tables',
     'Wallet', 'WalletType',
-    'Transaction', 'TransactionType', 'expenseCategory', 'incomeCategory'
+    'Transaction', 'TransactionType', 'expenseCategory', 'incomeCategory',
+    'TransactionRollup', 'apply_rollup_delta', 'rebuild_rollups',
+    'ArchiveError', 'ArchiveSegment', 'TransactionArchive', 'TransactionFilter',
+    'archived_through', 'discard_archive', 'get_archive',
+    'BalanceSnapshot', 'balance_at', 'discard_snapshots', 'rebuild_snapshots',
+    'refresh_snapshots', 'shift_snapshots', 'balance_history',
+    'CollectionVersion', 'bump_versions', 'get_versions',
+    'READ_SNAPSHOT', 'begin_read_snapshot',
+    'ensure_partitions', 'maintain_partitions',
+    'WalletCache', 'LocalInvalidation', 'PostgresInvalidation',
+    'MyModel',
 ]
-# run configure_mappers after defining all of the models to ensure
-# all relationships can be setup
-configure_mappers()
 
 
 def get_engine(settings, prefix='sqlalchemy.'):
-    return engine_from_config(settings, prefix)
+    """
+    Create the engine described by the ``sqlalchemy.*`` settings.
+
+    ``pool_size``, ``max_overflow``, ``pool_timeout``, ``pool_recycle`` and
+    ``pool_pre_ping`` are passed through to the pool.
+
+    """
+    options = {}
+    if prefix + 'pool_pre_ping' in settings:
+        options['pool_pre_ping'] = asbool(settings[prefix + 'pool_pre_ping'])
+
+    return engine_from_config(settings, prefix, **options)
+
+
+def get_wallet_cache(settings, engine, prefix='backendlagi.wallet_cache.'):
+    """
+    Build the ``WalletCache`` described by the ``backendlagi.wallet_cache.*`` settings.
+
+    ``max_entries`` and ``ttl`` (seconds) bound the cache; ``backend`` is the
+    dotted name of the invalidation backend, called with the engine and the
+    settings (``backendlagi.models.PostgresInvalidation`` to share
+    invalidations between processes).
+
+    """
+    backend = settings.get(prefix + 'backend', LocalInvalidation)
+    if isinstance(backend, str):
+        backend = DottedNameResolver().resolve(backend)
+    return WalletCache(
+        max_entries=int(settings.get(prefix + 'max_entries', 1024)),
+        ttl=float(settings.get(prefix + 'ttl', 30)),
+        backend=backend(engine, settings),
+    )
+
+
+def get_archive(settings, prefix='backendlagi.archive.'):
+    """
+    Build the ``TransactionArchive`` described by the ``backendlagi.archive.*`` settings.
+
+    ``directory`` holds the segment files; without it there is no archive
+    and reads never look for archived transactions. ``cache_size`` bounds
+    the decoded segments kept in memory.
+
+    """
+    directory = settings.get(prefix + 'directory')
+    if not directory:
+        return None
+    return TransactionArchive(directory, cache_size=int(settings.get(prefix + 'cache_size', 64)))
+
+
+def after_fork(registry):
+    """
+    Give a freshly forked worker process its own database connections.
+
+    The engine is shared with the session factory, the pool statistics and
+    the metrics listeners, so it is kept and only its pool is replaced:
+    ``dispose(close=False)`` forgets the parent's pooled connections without
+    closing them (they still belong to the parent) and the worker opens new
+    ones on demand. The wallet cache is rebuilt because its invalidation
+    listener thread does not survive ``fork()``; the archive because its
+    cache lock might have been held by another thread of the parent.
+
+    """
+    engine = registry['dbsession_factory'].kw['bind']
+    engine.dispose(close=False)
+    registry['pool_stats'].reset()
+    registry['wallet_cache'] = get_wallet_cache(registry.settings, engine)
+    registry['archive'] = get_archive(registry.settings)
+
+
+def warm_pool(registry):
+    """
+    Open pooled connections in a background thread; return the thread.
+
+    Call it once the server is listening, so the first requests do not pay
+    for connecting. ``backendlagi.pool_warmup`` sets how many connections
+    are opened (default: the pool size; 0 disables). Failures are only
+    logged: requests connect on demand anyway.
+
+    """
+    engine = registry['dbsession_factory'].kw['bind']
+    size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 0
+    size = int(registry.settings.get('backendlagi.pool_warmup', size))
+
+    def warm():
+        connections = []
+        try:
+            # semua dipegang bersamaan supaya pool benar-benar membuka ``size`` koneksi
+            for _ in range(size):
+                connections.append(engine.connect())
+        except Exception:
+            log.warning('Could not warm the connection pool', exc_info=True)
+        finally:
+            for connection in connections:
+                connection.close()
+        log.debug('Opened %d pooled connections', len(connections))
+
+    thread = threading.Thread(target=warm, name='pool-warmup', daemon=True)
+    thread.start()
+    return thread
 
 
 def get_session_factory(engine):
@@ -54,6 +184,24 @@ def get_tm_session(session_factory, transaction_manager):
     return dbsession
 
 
+def begin_read_snapshot(connection):
+    """Make every later read on ``connection`` see the same data.
+
+    ``connection`` is a Session or a Connection that has not run a
+    statement yet. PostgreSQL reads in ``REPEATABLE READ READ ONLY``;
+    SQLite in one explicit transaction.
+    """
+    if isinstance(connection, Session):
+        postgresql = connection.get_bind().dialect.name == 'postgresql'
+        connection = connection.connection(execution_options=READ_SNAPSHOT if postgresql else None)
+    elif connection.dialect.name == 'postgresql':
+        connection.execution_options(**READ_SNAPSHOT)
+    if connection.dialect.name != 'postgresql':
+        # pysqlite memulai transaksi hanya sebelum DML; BEGIN eksplisit membuat
+        # SELECT berikutnya membaca satu snapshot sampai commit
+        connection.exec_driver_sql('BEGIN')
+
+
 def includeme(config):
     """
     Initialize the model for a Pyramid app.
@@ -64,14 +212,27 @@ def includeme(config):
     settings = config.get_settings()
     settings['tm.manager_hook'] = 'pyramid_tm.explicit_manager'
 
+    # abort instead of commit when a view answers with a 4xx/5xx status,
+    # so a validation error half way through a write never leaks partial changes
+    settings.setdefault('tm.commit_veto', 'pyramid_tm.default_commit_veto')
+
     # use pyramid_tm to hook the transaction lifecycle to the request
     config.include('pyramid_tm')
 
     # use pyramid_retry to retry a request when transient exceptions occur
     config.include('pyramid_retry')
 
-    session_factory = get_session_factory(get_engine(settings))
+    # set up all relationships now, so a mapping error stops startup instead
+    # of the first request; the engine connects only when first used
+    configure_mappers()
+
+    engine = get_engine(settings)
+    session_factory = get_session_factory(engine)
     config.registry['dbsession_factory'] = session_factory
+    config.registry['pool_stats'] = track_pool_waits(
+        engine, session_factory, int(settings.get('sqlalchemy.max_overflow', DEFAULT_MAX_OVERFLOW)))
+    config.registry['wallet_cache'] = get_wallet_cache(settings, engine)
+    config.registry['archive'] = get_archive(settings)
 
     # make request.dbsession available for use in Pyramid
     config.add_request_method(
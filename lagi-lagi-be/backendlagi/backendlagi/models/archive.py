@@ -0,0 +1,413 @@
+# models/archive.py
+"""Arsip transaksi lama: file kolumnar terkompresi per dompet per bulan.
+
+The ``archive_backendlagi_transactions`` job moves one wallet's
+transactions of one month at a time out of the ``transactions`` table into
+a segment file under the archive directory and records it in
+``archive_segments`` (the manifest). The manifest is the
+source of truth: a file it does not name is ignored. Archived months are
+read-only; writes dated before a wallet's ``archived_through`` are
+refused, so balances, rollups and snapshots never need the files again.
+
+Reads merge the segments their date range reaches: the transaction list
+and the export (``TransactionArchive.rows``), balances and summaries
+(``totals``) and balance history (``buckets``). Totals of whole months
+come from the manifest without opening a file.
+
+Segment layout: ``MAGIC``, a little-endian ``uint32`` header length, a
+JSON header (row count and ``[name, codec, offset, length]`` per column),
+then one zlib block per column. Rows are in ``(tanggal, id)`` order, so
+ids and timestamps are stored as deltas. Readers decompress only the
+columns they use.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, func, select
+
+from .base import Base
+from .money import Money, from_sen, sen
+from .transaction import Transaction, TransactionType
+
+MAGIC = b'BLSEG1'
+# Kolom file, urutannya sama dengan TRANSACTION_COLUMNS di readers.py
+SEGMENT_COLUMNS = [
+    ('id', 'delta'),
+    ('tipe_transaksi', 'dict'),
+    ('jumlah', 'int'),
+    ('deskripsi', 'dict'),
+    ('category_id', 'dict'),
+    ('wallet_id', 'dict'),
+    ('tanggal', 'delta'),
+    ('catatan', 'dict'),
+    ('created_at', 'json'),
+]
+TIMESTAMPS = ('tanggal', 'created_at')
+# Kolom yang cukup untuk saldo dan total
+AMOUNT_COLUMNS = ('tanggal', 'tipe_transaksi', 'jumlah')
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+INCOME = TransactionType.income.name
+
+# Baris arsip; tipe_transaksi berupa nama enum dan jumlah dalam rupiah,
+# seperti baris ``transaction_serializer.select()``
+ArchivedRow = namedtuple('ArchivedRow', [name for name, _ in SEGMENT_COLUMNS])
+
+
+class ArchiveError(Exception):
+    """A segment file is missing or does not match its manifest entry."""
+
+
+class ArchiveSegment(Base):
+    """Satu file arsip: transaksi satu dompet dalam satu bulan.
+
+    ``income``/``expense``/``row_count`` are the month's totals, so whole
+    archived months add up without reading the file; ``min_id``/``max_id``
+    narrow the files a lookup by id has to open.
+    """
+    __tablename__ = 'archive_segments'
+
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), primary_key=True)
+    month = Column(Date, primary_key=True)
+    path = Column(String(255), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    income = Column(Money, nullable=False, default=0)
+    expense = Column(Money, nullable=False, default=0)
+    size = Column(Integer, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+_table = ArchiveSegment.__table__
+# Manifest dengan uang dalam sen
+SEGMENT_FIELDS = [
+    _table.c.wallet_id, _table.c.month, _table.c.path, _table.c.row_count,
+    _table.c.min_id, _table.c.max_id, sen(_table.c.income).label('income'),
+    sen(_table.c.expense).label('expense'), _table.c.size, _table.c.checksum,
+]
+
+
+def row_key(row):
+    return row.tanggal, row.id
+
+
+def month_bounds(month):
+    start = datetime(month.year, month.month, 1)
+    return start, datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+class TransactionFilter(object):
+    """The filters of a transaction listing, as SQL and for archived rows."""
+
+    def __init__(self, wallet_id=None, tipe=None, start=None, end=None, end_inclusive=True):
+        self.wallet_id = wallet_id
+        self.tipe = tipe
+        self.start = start
+        self.end = end
+        self.end_inclusive = end_inclusive
+
+    def criteria(self):
+        criteria = []
+        if self.wallet_id is not None:
+            criteria.append(Transaction.wallet_id == self.wallet_id)
+        if self.tipe is not None:
+            criteria.append(Transaction.tipe_transaksi == self.tipe)
+        if self.start is not None:
+            criteria.append(Transaction.tanggal >= self.start)
+        if self.end is not None:
+            criteria.append(Transaction.tanggal <= self.end if self.end_inclusive else Transaction.tanggal < self.end)
+        return criteria
+
+
+# --- format file ---
+
+def _ints(values, typecode='q'):
+    data = array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _from_ints(raw, typecode='q'):
+    data = array(typecode)
+    data.frombytes(raw)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+def _encode_column(codec, values):
+    if codec == 'int':
+        return _ints(values)
+    if codec == 'delta':
+        return _ints([b - a for a, b in zip(itertools.chain([0], values), values)])
+    if codec == 'dict':
+        index = {}
+        codes = [index.setdefault(value, len(index)) for value in values]
+        dictionary = json.dumps(list(index)).encode('utf-8')
+        return struct.pack('<I', len(dictionary)) + dictionary + _ints(codes, 'I')
+    return json.dumps(values).encode('utf-8')
+
+
+def _decode_column(codec, raw):
+    if codec == 'int':
+        return _from_ints(raw).tolist()
+    if codec == 'delta':
+        return list(itertools.accumulate(_from_ints(raw)))
+    if codec == 'dict':
+        (length,) = struct.unpack_from('<I', raw)
+        dictionary = json.loads(raw[4:4 + length])
+        return [dictionary[code] for code in _from_ints(raw[4 + length:], 'I')]
+    return json.loads(raw)
+
+
+def encode_segment(columns):
+    """Serialize ``{name: values}`` (timestamps as epoch microseconds) to bytes."""
+    rows = len(columns['id'])
+    blocks = []
+    layout = []
+    offset = 0
+    for name, codec in SEGMENT_COLUMNS:
+        block = zlib.compress(_encode_column(codec, columns[name]), 9)
+        layout.append([name, codec, offset, len(block)])
+        blocks.append(block)
+        offset += len(block)
+    header = json.dumps({'rows': rows, 'columns': layout}).encode('utf-8')
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header] + blocks)
+
+
+def decode_segment(data, names=None):
+    """``{name: values}`` of the columns ``names`` (default: all) of a segment."""
+    if not data.startswith(MAGIC):
+        raise ArchiveError('not an archive segment')
+    (length,) = struct.unpack_from('<I', data, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(data[start:start + length])
+    body = start + length
+    columns = {}
+    for name, codec, offset, size in header['columns']:
+        if names is None or name in names:
+            raw = zlib.decompress(data[body + offset:body + offset + size])
+            columns[name] = _decode_column(codec, raw)
+    for name in TIMESTAMPS:
+        if name in columns:
+            columns[name] = [None if value is None else EPOCH + value * MICROSECOND for value in columns[name]]
+    return columns
+
+
+def _micros(value):
+    return None if value is None else (value - EPOCH) // MICROSECOND
+
+
+class TransactionArchive(object):
+    """Segment files under ``directory``, with an LRU of decoded columns.
+
+    Segments are never modified in place: a rewrite gets a new file name
+    (it contains the checksum), so a cached or half-read segment stays
+    valid until its manifest entry is replaced.
+    """
+
+    def __init__(self, directory, cache_size=64):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def full_path(self, path):
+        return os.path.join(self.directory, path)
+
+    def segments(self, connection, wallet_id=None, start=None, end=None):
+        """Manifest rows overlapping ``[start, end]``, newest month first.
+
+        ``connection`` is a Session or a Connection.
+        """
+        stmt = select(*SEGMENT_FIELDS).order_by(_table.c.month.desc(), _table.c.wallet_id)
+        if wallet_id is not None:
+            stmt = stmt.where(_table.c.wallet_id == wallet_id)
+        if start is not None:
+            stmt = stmt.where(_table.c.month >= date(start.year, start.month, 1))
+        if end is not None:
+            stmt = stmt.where(_table.c.month <= date(end.year, end.month, 1))
+        return connection.execute(stmt).all()
+
+    def find(self, connection, transaction_id):
+        """The archived row with ``transaction_id``, or ``None``."""
+        segments = connection.execute(
+            select(*SEGMENT_FIELDS).where(_table.c.min_id <= transaction_id, _table.c.max_id >= transaction_id)
+        ).all()
+        for segment in segments:
+            columns = self.read(segment)
+            if transaction_id in columns['id']:
+                index = columns['id'].index(transaction_id)
+                values = [columns[name][index] for name, _ in SEGMENT_COLUMNS]
+                return ArchivedRow(*values)._replace(jumlah=from_sen(values[2]))
+        return None
+
+    def write(self, wallet_id, month, rows):
+        """Write the stored-form ``rows`` of one wallet and month; return the manifest values."""
+        columns = {name: [row[i] for row in rows] for i, (name, _) in enumerate(SEGMENT_COLUMNS)}
+        for name in TIMESTAMPS:
+            columns[name] = [_micros(value) for value in columns[name]]
+        data = encode_segment(columns)
+        checksum = hashlib.sha256(data).hexdigest()
+        path = os.path.join(str(wallet_id), '%04d-%02d-%s.seg' % (month.year, month.month, checksum[:12]))
+
+        full_path = self.full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temporary = full_path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, full_path)
+
+        is_income = [tipe == INCOME for tipe in columns['tipe_transaksi']]
+        return {
+            'wallet_id': wallet_id,
+            'month': month,
+            'path': path,
+            'row_count': len(rows),
+            'min_id': min(columns['id']),
+            'max_id': max(columns['id']),
+            'income': from_sen(sum(j for j, income in zip(columns['jumlah'], is_income) if income)),
+            'expense': from_sen(sum(j for j, income in zip(columns['jumlah'], is_income) if not income)),
+            'size': len(data),
+            'checksum': checksum,
+            'created_at': datetime.utcnow(),
+        }
+
+    def remove(self, path):
+        try:
+            os.remove(self.full_path(path))
+        except FileNotFoundError:
+            pass
+
+    def read(self, segment, names=None):
+        """Decoded columns of ``segment`` (a manifest row); jumlah in sen.
+
+        The result is shared through the cache and must not be modified.
+        """
+        key = (segment.path, segment.checksum, names)
+        with self._lock:
+            columns = self._cache.get(key)
+            if columns is not None:
+                self._cache.move_to_end(key)
+                return columns
+        try:
+            with open(self.full_path(segment.path), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise ArchiveError('Archive segment %s is unreadable: %s' % (segment.path, e))
+        if hashlib.sha256(data).hexdigest() != segment.checksum:
+            raise ArchiveError('Archive segment %s does not match its checksum' % segment.path)
+        columns = decode_segment(data, names)
+        with self._lock:
+            self._cache[key] = columns
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return columns
+
+    def rows(self, segments, flt=None, before=None):
+        """Yield the archived rows of ``segments`` newest first, by ``(tanggal, id)``.
+
+        ``segments`` must be ordered by month, newest first (as
+        ``segments()`` returns them); files are opened one month at a
+        time as the consumer advances, and rows are built only as they
+        are consumed. ``before`` is an exclusive ``(tanggal, id)`` upper
+        bound (a keyset cursor).
+        """
+        for _, group in itertools.groupby(segments, key=lambda segment: segment.month):
+            yield from heapq.merge(*[self._segment_rows(segment, flt, before) for segment in group],
+                                   key=row_key, reverse=True)
+
+    def _segment_rows(self, segment, flt, before):
+        columns = self.read(segment)
+        ids, tanggal = columns['id'], columns['tanggal']
+        # Baris file urut (tanggal, id), jadi rentang dicari dengan bisect
+        low, high = 0, len(ids)
+        if flt is not None and flt.start is not None:
+            low = bisect_left(tanggal, flt.start)
+        if flt is not None and flt.end is not None:
+            high = (bisect_right if flt.end_inclusive else bisect_left)(tanggal, flt.end)
+        if before is not None:
+            position = bisect_left(tanggal, before[0], low, max(low, high))
+            while position < high and tanggal[position] == before[0] and ids[position] < before[1]:
+                position += 1
+            high = min(high, position)
+
+        tipe = flt.tipe.name if flt is not None and flt.tipe is not None else None
+        values = [columns[name] for name, _ in SEGMENT_COLUMNS]
+        for index in range(high - 1, low - 1, -1):
+            if tipe is not None and values[1][index] != tipe:
+                continue
+            row = [column[index] for column in values]
+            row[2] = from_sen(row[2])
+            yield ArchivedRow(*row)
+
+    def _amounts(self, segments, start, end, inclusive, key):
+        """``{key(segment, tanggal): [income, expense, count]}`` in sen."""
+        result = {}
+        for segment in segments:
+            month_start, month_end = month_bounds(segment.month)
+            whole = ((start is None or start <= month_start) and (end is None or month_end <= end))
+            if whole and key(segment, None) is not None:
+                entry = result.setdefault(key(segment, None), [0, 0, 0])
+                entry[0] += segment.income
+                entry[1] += segment.expense
+                entry[2] += segment.row_count
+                continue
+            columns = self.read(segment, AMOUNT_COLUMNS)
+            for tanggal, tipe, jumlah in zip(columns['tanggal'], columns['tipe_transaksi'], columns['jumlah']):
+                if start is not None and tanggal < start:
+                    continue
+                if end is not None and (tanggal > end if inclusive else tanggal >= end):
+                    continue
+                entry = result.setdefault(key(segment, tanggal), [0, 0, 0])
+                entry[0 if tipe == INCOME else 1] += jumlah
+                entry[2] += 1
+        return result
+
+    def totals(self, segments, start=None, end=None, inclusive=True):
+        """Income, expense (sen) and count per wallet of the archived rows in ``[start, end]``."""
+        return self._amounts(segments, start, end, inclusive, lambda segment, tanggal: segment.wallet_id)
+
+    def buckets(self, segments, bucket, start=None, end=None, inclusive=True):
+        """Income, expense (sen) and count per ``bucket`` start date, like ``bucket_expr``."""
+        def key(segment, tanggal):
+            if tanggal is None:
+                # Bulan utuh hanya bisa diambil dari manifest untuk bucket bulanan
+                return segment.month if bucket == 'month' else None
+            if bucket == 'month':
+                return date(tanggal.year, tanggal.month, 1)
+            if bucket == 'week':
+                return tanggal.date() - timedelta(days=tanggal.weekday())
+            return tanggal.date()
+        return self._amounts(segments, start, end, inclusive, key)
+
+
+def archived_through(connection, wallet_id):
+    """Start of the first month after the wallet's archived ones, or ``None``."""
+    month = connection.execute(
+        select(func.max(_table.c.month)).where(_table.c.wallet_id == wallet_id)
+    ).scalar()
+    return None if month is None else month_bounds(month)[1]
+
+
+def discard_archive(session, wallet_id):
+    """Delete the wallet's manifest entries; return their paths to remove after the commit."""
+    paths = session.execute(select(_table.c.path).where(_table.c.wallet_id == wallet_id)).scalars().all()
+    session.execute(_table.delete().where(_table.c.wallet_id == wallet_id))
+    return paths
@@ -0,0 +1,220 @@
+# models/cache.py
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# Kunci cache: daftar dompet dan satu entri per dompet
+WALLET_LIST = 'wallets'
+
+
+def wallet_key(wallet_id):
+    return ('wallet', wallet_id)
+
+
+class LocalInvalidation(object):
+    """Invalidation backend for a single process.
+
+    A backend carries invalidations between the caches of several
+    processes. ``publish(keys)`` is called after a write commits, with the
+    keys it changed (``None`` meaning everything). ``subscribe(callback)``
+    registers a cache to be called with the keys published by *other*
+    processes. This one has no other processes to talk to, so it does
+    nothing; the TTL bounds how stale another process's writes can look.
+    """
+
+    def __init__(self, engine=None, settings=None):
+        pass
+
+    def publish(self, keys):
+        pass
+
+    def subscribe(self, callback):
+        pass
+
+    def close(self):
+        pass
+
+
+class PostgresInvalidation(LocalInvalidation):
+    """Invalidation over PostgreSQL ``LISTEN``/``NOTIFY``.
+
+    Every process listens on ``backendlagi.wallet_cache.channel`` (default
+    ``wallet_cache``) from a dedicated connection in a daemon thread.
+    Published keys travel as JSON along with an id of the sending process,
+    which skips its own messages. Works with psycopg 2 and 3.
+    """
+
+    MAX_PAYLOAD = 7000
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, engine, settings=None):
+        self.engine = engine
+        self.channel = (settings or {}).get('backendlagi.wallet_cache.channel', 'wallet_cache')
+        self.origin = uuid.uuid4().hex
+        self._callbacks = []
+        self._closed = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        dialect = self.engine.dialect
+        args, kwargs = dialect.create_connect_args(self.engine.url)
+        connection = dialect.loaded_dbapi.connect(*args, **kwargs)
+        if dialect.driver == 'psycopg':
+            connection.autocommit = True
+        else:
+            connection.set_session(autocommit=True)
+        return connection
+
+    def publish(self, keys):
+        payload = json.dumps({'origin': self.origin, 'keys': keys})
+        if len(payload) > self.MAX_PAYLOAD:
+            payload = json.dumps({'origin': self.origin, 'keys': None})
+        with self.engine.connect() as connection:
+            connection.exec_driver_sql('SELECT pg_notify(%(channel)s, %(payload)s)',
+                                       {'channel': self.channel, 'payload': payload})
+            connection.commit()
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, name='wallet-cache-listener',
+                                            daemon=True)
+            self._thread.start()
+
+    def _deliver(self, payload):
+        message = json.loads(payload)
+        if message['origin'] == self.origin:
+            return
+        keys = message['keys']
+        if keys is not None:
+            # JSON mengubah tuple menjadi list
+            keys = [tuple(key) if isinstance(key, list) else key for key in keys]
+        for callback in self._callbacks:
+            callback(keys)
+
+    def _listen(self):
+        psycopg3 = self.engine.dialect.driver == 'psycopg'
+        while not self._closed.is_set():
+            try:
+                connection = self._connect()
+                try:
+                    connection.cursor().execute('LISTEN "%s"' % self.channel.replace('"', '""'))
+                    # Notifikasi yang terlewat saat terputus tidak bisa diketahui
+                    for callback in self._callbacks:
+                        callback(None)
+                    while not self._closed.is_set():
+                        if psycopg3:
+                            for notify in connection.notifies(timeout=1.0, stop_after=1):
+                                self._deliver(notify.payload)
+                            continue
+                        if select.select([connection], [], [], 1.0)[0]:
+                            connection.poll()
+                            while connection.notifies:
+                                self._deliver(connection.notifies.pop(0).payload)
+                finally:
+                    connection.close()
+            except Exception:
+                log.exception('Wallet cache listener lost its connection')
+                self._closed.wait(self.RECONNECT_DELAY)
+
+    def close(self):
+        self._closed.set()
+
+
+class WalletCache(object):
+    """Bounded, thread-safe read-through cache with TTL and LRU eviction.
+
+    ``get(key, loader)`` returns the cached value or calls ``loader()`` and
+    keeps its result (``None`` is never cached). Entries expire ``ttl``
+    seconds after they were loaded; past ``max_entries`` the least recently
+    used one is dropped. ``invalidate()`` bumps a generation counter, so a
+    load that started before an invalidation is returned but not stored and
+    cannot put pre-write data back. A ``ttl`` or ``max_entries`` of 0
+    disables caching.
+    """
+
+    COUNTERS = ('hits', 'misses', 'expirations', 'evictions', 'invalidations')
+
+    def __init__(self, max_entries=1024, ttl=30.0, backend=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend or LocalInvalidation()
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.backend.subscribe(self._invalidate_local)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key, loader):
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return value
+                del self._entries[key]
+                self.counters['expirations'] += 1
+            self.counters['misses'] += 1
+            generation = self._generation
+
+        # Query berjalan di luar lock supaya thread lain tidak ikut menunggu
+        value = loader()
+        if value is None:
+            return value
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (self.clock() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.counters['evictions'] += 1
+        return value
+
+    def _invalidate_local(self, keys=None):
+        with self._lock:
+            self._generation += 1
+            self.counters['invalidations'] += 1
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def invalidate(self, *keys):
+        """Drop ``keys`` (everything if none given) here and in other processes."""
+        keys = list(keys) or None
+        self._invalidate_local(keys)
+        try:
+            self.backend.publish(keys)
+        except Exception:
+            # Proses lain tetap terbatas oleh TTL
+            log.exception('Could not publish wallet cache invalidation')
+
+    def snapshot(self):
+        """Counters and occupancy, ready for JSON."""
+        with self._lock:
+            data = dict(self.counters)
+            data['size'] = len(self._entries)
+        lookups = data['hits'] + data['misses']
+        data['hit_ratio'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+        data['max_entries'] = self.max_entries
+        data['ttl_seconds'] = self.ttl
+        data['backend'] = type(self.backend).__name__
+        return data
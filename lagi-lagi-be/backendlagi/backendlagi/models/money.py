@@ -0,0 +1,79 @@
+# models/money.py
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import BigInteger, type_coerce
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+# Satu rupiah = 100 sen
+SEN_PER_UNIT = 100
+# Batas kolom BIGINT
+MAX_SEN = 2 ** 63 - 1
+_CENT = Decimal('0.01')
+
+
+def to_sen(amount):
+    """Convert a rupiah amount (int, float, Decimal or numeric string) to whole sen.
+
+    Floats are read through their shortest repr, so ``0.1`` becomes 10 sen
+    and not 10.000000000000000555; fractions of a sen round half up.
+    Raises ``ValueError`` for anything that is not a finite number or does
+    not fit a BIGINT column.
+    """
+    if isinstance(amount, bool):
+        raise ValueError('not an amount: %r' % (amount,))
+    if isinstance(amount, int):
+        result = amount * SEN_PER_UNIT
+    else:
+        try:
+            value = Decimal(repr(amount) if isinstance(amount, float) else str(amount).strip())
+        except InvalidOperation:
+            raise ValueError('not an amount: %r' % (amount,))
+        if not value.is_finite():
+            raise ValueError('not an amount: %r' % (amount,))
+        result = int(value.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    if abs(result) > MAX_SEN:
+        raise ValueError('amount out of range: %r' % (amount,))
+    return result
+
+
+def from_sen(sen):
+    """Rupiah amount of ``sen`` as the float the JSON API has always returned."""
+    return int(sen) / SEN_PER_UNIT
+
+
+def parse_amount(amount):
+    """Rupiah float of a request value, rounded to whole sen as it will be stored."""
+    return from_sen(to_sen(amount))
+
+
+class Money(TypeDecorator):
+    """Uang dalam rupiah, disimpan sebagai BIGINT sen.
+
+    Python code keeps seeing rupiah floats, so ``to_dict`` and the JSON
+    output do not change, while the database adds, compares and sums exact
+    integers. Use ``sen()`` where Python itself accumulates amounts.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    class comparator_factory(TypeDecorator.Comparator, BigInteger.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            # Selisih/jumlah dua nilai uang tetap uang (bukan sen mentah)
+            if op in (operators.add, operators.sub) and isinstance(other_comparator.type, Money):
+                return op, self.type
+            return super()._adapt_expression(op, other_comparator)
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_sen(value)
+
+    def process_result_value(self, value, dialect):
+        # SUM(bigint) di PostgreSQL bertipe numeric -> Decimal bilangan bulat
+        return None if value is None else from_sen(value)
+
+    def coerce_compared_value(self, op, value):
+        return self
+
+
+def sen(expression):
+    """``expression`` (a ``Money`` column or aggregate) read as integer sen."""
+    return type_coerce(expression, BigInteger)
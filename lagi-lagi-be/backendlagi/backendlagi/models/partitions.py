@@ -0,0 +1,188 @@
+# models/partitions.py
+"""Partisi bulanan tabel ``transactions`` di PostgreSQL.
+
+On PostgreSQL ``transactions`` is partitioned by range of ``tanggal``, one
+partition per calendar month (``transactions_p2026_10``) plus a DEFAULT
+partition that takes rows no monthly partition covers yet (back-dated or
+far-future entries). Writes therefore never depend on maintenance having
+run. ``ensure_partitions`` creates the partitions for the coming months
+and moves the rows parked in the DEFAULT partition into monthly ones. The
+prefork master runs it periodically (``maintain_partitions``). Cron can run
+``maintain_backendlagi_partitions`` instead.
+
+SQLite keeps a single plain table; everything here is a no-op there.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import PrimaryKeyConstraint, event, text
+from sqlalchemy.ext.compiler import compiles
+
+from .transaction import Transaction
+
+log = logging.getLogger(__name__)
+
+TABLE = 'transactions'
+PARTITION_KEY = 'tanggal'
+DEFAULT_PARTITION = TABLE + '_default'
+# Partisi bulan depan yang disiapkan lebih dulu
+DEFAULT_PREMAKE = 3
+# Kunci advisory supaya hanya satu proses yang membuat partisi pada satu waktu
+ADVISORY_LOCK = 0x7472616e
+LOCK_TIMEOUT = '5s'
+
+Transaction.__table__.dialect_options['postgresql']['partition_by'] = 'RANGE (%s)' % PARTITION_KEY
+
+
+@compiles(PrimaryKeyConstraint, 'postgresql')
+def _primary_key(constraint, compiler, **kw):
+    # Kunci unik tabel berpartisi harus memuat kolom partisinya; id tetap
+    # unik lewat sequence-nya dan tetap menjadi identitas ORM
+    ddl = compiler.visit_primary_key_constraint(constraint, **kw)
+    if constraint.table is Transaction.__table__:
+        ddl = ddl.replace('PRIMARY KEY (id)', 'PRIMARY KEY (id, %s)' % PARTITION_KEY)
+    return ddl
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return '%s_p%04d_%02d' % (TABLE, month.year, month.month)
+
+
+def is_partitioned(connection):
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(text(
+        'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)'
+    ), {'table': TABLE}).first() is not None
+
+
+def list_partitions(connection):
+    """Names of the partitions of ``transactions``, in name (= month) order."""
+    return sorted(connection.execute(text(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(:table)'
+    ), {'table': TABLE}).scalars())
+
+
+def create_partition(connection, month):
+    """Create the partition of ``month``, moving its rows out of the DEFAULT partition.
+
+    Creating a partition scans the DEFAULT partition while ``transactions``
+    is locked, so keep that partition small by running ``ensure_partitions``
+    regularly.
+    """
+    name = partition_name(month)
+    low, high = month, add_months(month, 1)
+    in_range = "%s >= '%s' AND %s < '%s'" % (PARTITION_KEY, low, PARTITION_KEY, high)
+    bounds = "FROM ('%s') TO ('%s')" % (low, high)
+    parked = connection.execute(text(
+        'SELECT 1 FROM %s WHERE %s LIMIT 1' % (DEFAULT_PARTITION, in_range)
+    )).first()
+    if parked is None:
+        connection.execute(text('CREATE TABLE %s PARTITION OF %s FOR VALUES %s' % (name, TABLE, bounds)))
+        return 0
+
+    # Baris di DEFAULT harus pindah dulu; CHECK membuat ATTACH tidak memindai ulang
+    columns = ', '.join(column.name for column in Transaction.__table__.columns)
+    connection.execute(text('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)' % (name, TABLE)))
+    connection.execute(text('ALTER TABLE %s ADD CONSTRAINT %s_bounds CHECK (%s)' % (name, name, in_range)))
+    moved = connection.execute(text(
+        'WITH moved AS (DELETE FROM %s WHERE %s RETURNING %s) INSERT INTO %s (%s) SELECT %s FROM moved'
+        % (DEFAULT_PARTITION, in_range, columns, name, columns, columns)
+    )).rowcount
+    connection.execute(text('ALTER TABLE %s ATTACH PARTITION %s FOR VALUES %s' % (TABLE, name, bounds)))
+    connection.execute(text('ALTER TABLE %s DROP CONSTRAINT %s_bounds' % (name, name)))
+    return moved
+
+
+def ensure_partitions(connection, start=None, end=None, premake=DEFAULT_PREMAKE, now=None):
+    """Create the missing monthly partitions; return the names created.
+
+    Covers every month from ``start`` (default: the current month) through
+    ``end`` (default: ``premake`` months ahead), plus every month with rows
+    in the DEFAULT partition. Each partition is created in its own short
+    transaction with a ``lock_timeout``, so a long-running query delays the
+    maintenance, not the application. ``connection`` must not be in a
+    transaction.
+    """
+    if not is_partitioned(connection):
+        return []
+    current = month_start(now or datetime.utcnow())
+    start = month_start(start) if start is not None else current
+    end = month_start(end) if end is not None else add_months(current, premake)
+
+    months = set()
+    month = start
+    while month <= end:
+        months.add(month)
+        month = add_months(month, 1)
+    months.update(month_start(value) for value in connection.execute(text(
+        "SELECT DISTINCT date_trunc('month', %s) FROM %s" % (PARTITION_KEY, DEFAULT_PARTITION)
+    )).scalars())
+    connection.rollback()
+
+    existing = set(list_partitions(connection))
+    connection.rollback()
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        with connection.begin():
+            connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': ADVISORY_LOCK})
+            connection.execute(text("SET LOCAL lock_timeout = '%s'" % LOCK_TIMEOUT))
+            if name in list_partitions(connection):
+                continue
+            moved = create_partition(connection, month)
+        created.append(name)
+        log.info('Created partition %s (%d rows moved from %s)', name, moved, DEFAULT_PARTITION)
+    return created
+
+
+def maintain_partitions(engine, premake=DEFAULT_PREMAKE):
+    """Run ``ensure_partitions`` on its own connection; failures are only logged."""
+    try:
+        with engine.connect() as connection:
+            return ensure_partitions(connection, premake=premake)
+    except Exception:
+        log.warning('Could not create transaction partitions', exc_info=True)
+        return []
+
+
+def scanned_partitions(connection, stmt):
+    """Partitions of ``transactions`` the plan of ``stmt`` reads.
+
+    Runs ``EXPLAIN (FORMAT JSON)`` with the parameters inlined, the way
+    psycopg's custom plans see them, so the result reflects plan-time
+    partition pruning.
+    """
+    sql = stmt.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}).string
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql).scalar()
+    found = set()
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        relation = node.get('Relation Name', '')
+        if relation.startswith(TABLE + '_p') or relation == DEFAULT_PARTITION:
+            found.add(relation)
+        nodes.extend(node.get('Plans', []))
+    return found
+
+
+@event.listens_for(Transaction.__table__, 'after_create')
+def _create_initial_partitions(target, connection, **kw):
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text('CREATE TABLE %s PARTITION OF %s DEFAULT' % (DEFAULT_PARTITION, TABLE)))
+    current = month_start(datetime.utcnow())
+    for offset in range(DEFAULT_PREMAKE + 1):
+        create_partition(connection, add_months(current, offset))
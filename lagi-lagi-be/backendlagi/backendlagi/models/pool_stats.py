@@ -0,0 +1,124 @@
+# models/pool_stats.py
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Bawaan QueuePool bila sqlalchemy.max_overflow tidak diatur
+DEFAULT_MAX_OVERFLOW = 10
+
+
+class PoolStats(object):
+    """Thread-safe counters describing how requests use the connection pool.
+
+    ``checkout_wait_*`` measures only the time spent obtaining a connection
+    from the pool (waiting for a free slot or opening an overflow one), so a
+    high wait with low query time means pool starvation rather than slow SQL.
+    """
+
+    COUNTERS = (
+        'connects', 'checkouts', 'checkins', 'invalidations',
+        'soft_invalidations', 'checkout_timeouts',
+    )
+
+    def __init__(self, max_overflow=DEFAULT_MAX_OVERFLOW):
+        self.max_overflow = max_overflow
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.COUNTERS, 0)
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.overflow_max = 0
+
+    def incr(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_wait(self, seconds, overflow=0):
+        with self._lock:
+            self.checkout_wait_total += seconds
+            if seconds > self.checkout_wait_max:
+                self.checkout_wait_max = seconds
+            if overflow > self.overflow_max:
+                self.overflow_max = overflow
+
+    def snapshot(self, pool):
+        """Counters plus the pool's live occupancy, ready for JSON."""
+        with self._lock:
+            data = dict(self.counters)
+            data['checkout_wait_total_seconds'] = round(self.checkout_wait_total, 6)
+            data['checkout_wait_max_seconds'] = round(self.checkout_wait_max, 6)
+            data['checkout_wait_avg_seconds'] = round(
+                self.checkout_wait_total / data['checkouts'], 6) if data['checkouts'] else 0.0
+            data['overflow_max'] = self.overflow_max
+
+        data['pool_class'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            data.update({
+                'pool_size': pool.size(),
+                'max_overflow': self.max_overflow,
+                'pool_timeout': pool.timeout(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow_in_use': max(pool.overflow(), 0),
+            })
+        return data
+
+
+# Saat sesi di thread ini mulai meminta koneksi, sampai event checkout pool
+_pending = threading.local()
+
+
+def track_pool_waits(engine, session_factory, max_overflow=DEFAULT_MAX_OVERFLOW):
+    """Attach a ``PoolStats`` to ``engine`` via pool and session events and return it.
+
+    ``max_overflow`` is the value the pool was configured with; it is
+    reported as is, since the pool does not expose it.
+
+    A checkout wait runs from the moment a session of ``session_factory``
+    starts a statement or a flush to the pool's ``checkout`` event on the
+    same thread. Connections taken any other way (``engine.connect()``)
+    count as checkouts without a wait. Timeouts are counted for statements.
+    """
+    stats = PoolStats(max_overflow)
+
+    def checkout(*args):
+        stats.incr('checkouts')
+        started = getattr(_pending, 'started', None)
+        if started is not None:
+            _pending.started = None
+            pool = engine.pool
+            overflow = max(pool.overflow(), 0) if isinstance(pool, QueuePool) else 0
+            stats.record_wait(time.perf_counter() - started, overflow)
+
+    def execute(orm_execute_state):
+        _pending.started = time.perf_counter()
+        try:
+            return orm_execute_state.invoke_statement()
+        except exc.TimeoutError:
+            stats.incr('checkout_timeouts')
+            raise
+        finally:
+            _pending.started = None
+
+    def flush(*args):
+        _pending.started = time.perf_counter()
+
+    def clear(*args):
+        _pending.started = None
+
+    event.listen(engine, 'connect', lambda *args: stats.incr('connects'))
+    event.listen(engine, 'checkout', checkout)
+    event.listen(engine, 'checkin', lambda *args: stats.incr('checkins'))
+    event.listen(engine, 'invalidate', lambda *args: stats.incr('invalidations'))
+    event.listen(engine, 'soft_invalidate', lambda *args: stats.incr('soft_invalidations'))
+    event.listen(session_factory, 'do_orm_execute', execute)
+    event.listen(session_factory, 'before_flush', flush)
+    # Flush yang sudah memegang koneksi tidak memicu checkout
+    event.listen(session_factory, 'after_flush', clear)
+    event.listen(session_factory, 'after_transaction_end', clear)
+    return stats
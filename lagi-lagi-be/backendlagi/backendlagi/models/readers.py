@@ -0,0 +1,106 @@
+# models/readers.py
+from sqlalchemy import DateTime, Enum, String, select, type_coerce
+from .wallet import Wallet
+from .transaction import Transaction
+from .category import Category
+
+# Kolom dan urutan yang sama dengan Wallet.to_dict() / Transaction.to_dict()
+WALLET_COLUMNS = [
+    Wallet.id, Wallet.nama_dompet, Wallet.deskripsi, Wallet.saldo_awal,
+    Wallet.saldo_saat_ini, Wallet.tipe_dompet, Wallet.warna,
+    Wallet.created_at, Wallet.updated_at,
+]
+TRANSACTION_COLUMNS = [
+    Transaction.id, Transaction.tipe_transaksi, Transaction.jumlah,
+    Transaction.deskripsi, Transaction.category_id, Transaction.wallet_id,
+    Transaction.tanggal, Transaction.catatan, Transaction.created_at,
+]
+# Relasi yang bisa disertakan lewat ?expand=; sama dengan Category.to_dict()
+# dan wallet_summary()
+CATEGORY_COLUMNS = [Category.id, Category.name, Category.transaction_type]
+WALLET_SUMMARY_COLUMNS = [Wallet.id, Wallet.nama_dompet, Wallet.tipe_dompet, Wallet.warna]
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+class RowSerializer(object):
+    """Turn Core result rows into the dicts ``to_dict()`` would produce.
+
+    The converter for each column is chosen once, from its type, instead of
+    per attribute per row. Enum columns are read as their raw stored name and
+    mapped to ``.value`` with a dict lookup, skipping the Enum result
+    processor and the enum member round trip.
+    """
+
+    def __init__(self, columns):
+        self.keys = [column.key for column in columns]
+        self.selectables = []
+        self.converters = []
+        for index, column in enumerate(columns):
+            column_type = column.type
+            if isinstance(column_type, Enum) and column_type.enum_class is not None:
+                values = {member.name: member.value for member in column_type.enum_class}
+                self.selectables.append(type_coerce(column, String).label(column.key))
+                self.converters.append((index, values.__getitem__))
+                continue
+            self.selectables.append(column)
+            if isinstance(column_type, DateTime):
+                self.converters.append((index, _isoformat))
+
+    def select(self):
+        return select(*self.selectables)
+
+    def __call__(self, rows):
+        keys = self.keys
+        converters = self.converters
+        result = []
+        for row in rows:
+            values = list(row)
+            for index, convert in converters:
+                value = values[index]
+                if value is not None:
+                    values[index] = convert(value)
+            result.append(dict(zip(keys, values)))
+        return result
+
+
+wallet_serializer = RowSerializer(WALLET_COLUMNS)
+transaction_serializer = RowSerializer(TRANSACTION_COLUMNS)
+category_serializer = RowSerializer(CATEGORY_COLUMNS)
+wallet_summary_serializer = RowSerializer(WALLET_SUMMARY_COLUMNS)
+
+# field -> (foreign key in the transaction dict, primary key, serializer)
+EXPANSIONS = {
+    'category': ('category_id', Category.id, category_serializer),
+    'wallet': ('wallet_id', Wallet.id, wallet_summary_serializer),
+}
+
+
+def wallet_summary(wallet):
+    """The wallet fields embedded in a transaction by ``expand=wallet``."""
+    return {
+        'id': wallet.id,
+        'nama_dompet': wallet.nama_dompet,
+        'tipe_dompet': wallet.tipe_dompet.value if wallet.tipe_dompet else None,
+        'warna': wallet.warna,
+    }
+
+
+def expand_transactions(session, transactions, fields):
+    """Embed the related rows named in ``fields`` into serialized transactions.
+
+    Like ``selectinload``: one ``IN`` query per field for the whole page,
+    whatever its size. A missing related row is embedded as ``None``.
+    """
+    for field in fields:
+        key, primary_key, serializer = EXPANSIONS[field]
+        ids = {transaction[key] for transaction in transactions}
+        if not ids:
+            continue
+        rows = session.execute(serializer.select().where(primary_key.in_(ids)))
+        related = {row['id']: row for row in serializer(rows)}
+        for transaction in transactions:
+            transaction[field] = related.get(transaction[key])
+    return transactions
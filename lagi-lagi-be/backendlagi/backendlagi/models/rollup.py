@@ -0,0 +1,134 @@
+# models/rollup.py
+from sqlalchemy import Column, Integer, Date, ForeignKey, Enum, cast, exists, func, select, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date
+from .archive import ArchiveSegment
+from .base import Base
+from .money import Money
+from .transaction import Transaction, TransactionType
+
+
+class TransactionRollup(Base):
+    """Jumlah dan banyaknya transaksi per dompet, bulan, kategori dan tipe.
+
+    Diperbarui di transaksi DB yang sama dengan setiap perubahan
+    ``Transaction`` sehingga laporan bulanan/tahunan cukup membaca tabel ini.
+    """
+    __tablename__ = 'transaction_rollups'
+
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), primary_key=True)
+    month = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    tipe_transaksi = Column(Enum(TransactionType), primary_key=True)
+    total = Column(Money, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'wallet_id': self.wallet_id,
+            'month': self.month.isoformat() if self.month else None,
+            'category_id': self.category_id,
+            'tipe_transaksi': self.tipe_transaksi.value if self.tipe_transaksi else None,
+            'total': self.total,
+            'count': self.count,
+        }
+
+
+def month_of(tanggal):
+    return date(tanggal.year, tanggal.month, 1)
+
+
+def month_expr(dialect_name, column):
+    """SQL expression truncating ``column`` to the first day of its month."""
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc('month', column), Date)
+    return func.date(column, 'start of month')
+
+
+BUCKETS = ['day', 'week', 'month']
+
+
+def bucket_expr(dialect_name, bucket, column):
+    """SQL expression truncating ``column`` to the first day of its bucket.
+
+    Weeks start on Monday on both dialects.
+    """
+    if bucket == 'month':
+        return type_coerce(month_expr(dialect_name, column), Date)
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc(bucket, column), Date)
+    if bucket == 'week':
+        return type_coerce(func.date(column, 'weekday 0', '-6 days'), Date)
+    return type_coerce(func.date(column), Date)
+
+
+def apply_rollup_delta(session, wallet_id, tanggal, category_id, tipe_transaksi, amount, count):
+    """Add ``amount``/``count`` to the rollup row of one transaction.
+
+    Pass negative values to remove a transaction. The statement runs on the
+    session's connection, so it commits or rolls back with the caller.
+    """
+    key = {
+        'wallet_id': wallet_id,
+        'month': month_of(tanggal),
+        'category_id': category_id,
+        'tipe_transaksi': tipe_transaksi,
+    }
+    table = TransactionRollup.__table__
+    dialect_name = session.get_bind().dialect.name
+
+    if dialect_name in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(total=amount, count=count, **key)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                'total': table.c.total + stmt.excluded.total,
+                'count': table.c.count + stmt.excluded.count,
+            },
+        )
+        session.execute(stmt)
+        return
+
+    result = session.execute(
+        update(table)
+        .where(*[table.c[name] == value for name, value in key.items()])
+        .values(total=table.c.total + amount, count=table.c.count + count)
+    )
+    if result.rowcount == 0:
+        session.execute(table.insert().values(total=amount, count=count, **key))
+
+
+def rebuild_rollups(session, wallet_ids):
+    """Recompute the rollup rows of ``wallet_ids`` from ``transactions``.
+
+    Archived months keep their rollup rows: their transactions are no
+    longer in ``transactions``.
+    """
+    table = TransactionRollup.__table__
+    month = month_expr(session.get_bind().dialect.name, Transaction.tanggal)
+    segments = ArchiveSegment.__table__
+
+    session.execute(table.delete().where(
+        table.c.wallet_id.in_(wallet_ids),
+        ~exists().where(segments.c.wallet_id == table.c.wallet_id, segments.c.month == table.c.month),
+    ))
+    aggregate = (
+        select(
+            Transaction.wallet_id,
+            month,
+            Transaction.category_id,
+            Transaction.tipe_transaksi,
+            func.sum(Transaction.jumlah),
+            func.count(Transaction.id),
+        )
+        .where(
+            Transaction.wallet_id.in_(wallet_ids),
+            ~exists().where(segments.c.wallet_id == Transaction.wallet_id, segments.c.month == month),
+        )
+        .group_by(Transaction.wallet_id, month, Transaction.category_id, Transaction.tipe_transaksi)
+    )
+    session.execute(table.insert().from_select(
+        ['wallet_id', 'month', 'category_id', 'tipe_transaksi', 'total', 'count'],
+        aggregate,
+    ))
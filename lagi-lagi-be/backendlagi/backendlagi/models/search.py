@@ -0,0 +1,92 @@
+# models/search.py
+import re
+
+from sqlalchemy import DDL, Double, cast, column, event, func, literal, literal_column, table
+from .transaction import Transaction
+
+MAX_TERMS = 10
+FTS_TABLE = 'transactions_fts'
+
+# Ekspresi yang sama dipakai oleh indeks GIN dan oleh query, supaya planner
+# PostgreSQL bisa memakai indeksnya.
+PG_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce({table}deskripsi, '') || ' ' || coalesce({table}catatan, ''))"
+)
+PG_INDEX = 'ix_transactions_search'
+
+# The only copy of the SQLite DDL: create_tables and the migrations
+# (c3f9a1e6b802, 9b4f6c2d8e31) all run these statements.
+SQLITE_FTS_TABLE = f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        deskripsi, catatan,
+        content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )"""
+# External content table: triggers keep it in sync with every write path
+# (ORM, Core bulk inserts, cascading deletes).
+SQLITE_FTS_TRIGGERS = [
+    f"""CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, deskripsi, catatan)
+        VALUES (new.id, new.deskripsi, new.catatan);
+    END""",
+    f"""CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, deskripsi, catatan)
+        VALUES ('delete', old.id, old.deskripsi, old.catatan);
+    END""",
+    f"""CREATE TRIGGER transactions_fts_update AFTER UPDATE OF deskripsi, catatan ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, deskripsi, catatan)
+        VALUES ('delete', old.id, old.deskripsi, old.catatan);
+        INSERT INTO {FTS_TABLE}(rowid, deskripsi, catatan)
+        VALUES (new.id, new.deskripsi, new.catatan);
+    END""",
+]
+SQLITE_DDL = [SQLITE_FTS_TABLE, *SQLITE_FTS_TRIGGERS]
+SQLITE_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SQLITE_DROP = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+PG_CREATE_INDEX = f'CREATE INDEX {PG_INDEX} ON transactions USING gin ({PG_DOCUMENT.format(table="")})'
+
+for statement in SQLITE_DDL:
+    event.listen(Transaction.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Transaction.__table__, 'after_drop', DDL(SQLITE_DROP).execute_if(dialect='sqlite'))
+event.listen(Transaction.__table__, 'after_create', DDL(PG_CREATE_INDEX).execute_if(dialect='postgresql'))
+
+fts = table(FTS_TABLE, column('rowid'))
+
+
+def search_terms(q):
+    """Lower-cased words of a search string; punctuation is ignored."""
+    return re.findall(r'\w+', q.lower())[:MAX_TERMS]
+
+
+def matches_terms(text, terms):
+    """True if every term starts a word of ``text``, as the indexed search matches."""
+    words = search_terms(text)
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+def apply_search(dialect_name, stmt, terms):
+    """Restrict ``stmt`` to transactions matching every term (as a prefix).
+
+    Returns ``(stmt, rank)`` where a higher ``rank`` is a better match.
+    PostgreSQL uses the GIN index on the tsvector of deskripsi/catatan,
+    SQLite the FTS5 table. Other databases fall back to an unindexed
+    substring match in which every result ranks the same.
+    """
+    if dialect_name == 'postgresql':
+        document = literal_column(PG_DOCUMENT.format(table='transactions.'))
+        query = func.to_tsquery(literal_column("'simple'::regconfig"),
+                                ' & '.join(term + ':*' for term in terms))
+        # ts_rank() is real; as double it round-trips exactly through cursors
+        rank = cast(func.ts_rank(document, query), Double)
+        return stmt.where(document.op('@@')(query)), rank
+
+    if dialect_name == 'sqlite':
+        match = ' '.join('"%s"*' % term for term in terms)
+        fts_column = literal_column(FTS_TABLE)
+        stmt = stmt.join(fts, fts.c.rowid == Transaction.id).where(fts_column.op('MATCH')(match))
+        # bm25() is lower for better matches
+        return stmt, -func.bm25(fts_column)
+
+    document = func.coalesce(Transaction.deskripsi, '') + ' ' + func.coalesce(Transaction.catatan, '')
+    stmt = stmt.where(*[document.icontains(term, autoescape=True) for term in terms])
+    return stmt, cast(literal(0), Double)
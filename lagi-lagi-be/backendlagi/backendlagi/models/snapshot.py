@@ -0,0 +1,251 @@
+# models/snapshot.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, case, func, select
+from datetime import datetime
+from .archive import archived_through
+from .base import Base
+from .money import Money, from_sen, sen, to_sen
+from .wallet import Wallet
+from .transaction import Transaction, TransactionType
+from .rollup import bucket_expr
+
+# Paling banyak sekian transaksi antara dua snapshot dalam satu bulan
+SNAPSHOT_EVERY = 500
+
+signed_jumlah = case(
+    (Transaction.tipe_transaksi == TransactionType.income, Transaction.jumlah),
+    else_=-Transaction.jumlah,
+)
+
+
+class BalanceSnapshot(Base):
+    """Saldo dompet dari semua transaksi dengan ``tanggal < as_of``.
+
+    Snapshots are cut at every month boundary of the wallet's ledger and
+    after every ``SNAPSHOT_EVERY`` transactions within a month, so the
+    balance at any time is a snapshot plus a bounded number of rows.
+    """
+    __tablename__ = 'balance_snapshots'
+
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), primary_key=True)
+    as_of = Column(DateTime, primary_key=True)
+    balance = Column(Money, nullable=False)
+
+    def to_dict(self):
+        return {
+            'wallet_id': self.wallet_id,
+            'as_of': self.as_of.isoformat() if self.as_of else None,
+            'balance': self.balance,
+        }
+
+
+def _month_start(tanggal):
+    return datetime(tanggal.year, tanggal.month, 1)
+
+
+def shift_snapshots(session, wallet_id, tanggal, amount):
+    """Add ``amount`` to every snapshot that includes a row dated ``tanggal``.
+
+    Call with the signed effect of a transaction being added (or its
+    negation when removed) so back-dated changes keep later snapshots exact.
+    """
+    table = BalanceSnapshot.__table__
+    session.execute(
+        table.update()
+        .where(table.c.wallet_id == wallet_id, table.c.as_of > tanggal)
+        .values(balance=table.c.balance + amount)
+    )
+
+
+def discard_snapshots(session, wallet_id, after=None):
+    """Delete a wallet's snapshots (only those cut after ``after`` if given)."""
+    table = BalanceSnapshot.__table__
+    stmt = table.delete().where(table.c.wallet_id == wallet_id)
+    if after is not None:
+        stmt = stmt.where(table.c.as_of > after)
+    session.execute(stmt)
+
+
+def refresh_snapshots(session, wallet_id, every=SNAPSHOT_EVERY):
+    """Cut the snapshots missing after the wallet's latest one.
+
+    Cheap when nothing is due: one lookup of the latest snapshot and one
+    aggregate over the rows after it. Otherwise those rows are walked once
+    in ledger order. Returns the number of snapshots written.
+    """
+    latest = session.execute(
+        select(BalanceSnapshot.as_of, sen(BalanceSnapshot.balance).label('balance'))
+        .where(BalanceSnapshot.wallet_id == wallet_id)
+        .order_by(BalanceSnapshot.as_of.desc())
+        .limit(1)
+    ).first()
+
+    tail = [Transaction.wallet_id == wallet_id]
+    if latest is not None:
+        tail.append(Transaction.tanggal >= latest.as_of)
+    count, first, last = session.execute(
+        select(func.count(Transaction.id), func.min(Transaction.tanggal), func.max(Transaction.tanggal))
+        .where(*tail)
+    ).one()
+    if count == 0 or (
+        _month_start(first) == _month_start(last)
+        # a cut never splits rows sharing one timestamp
+        and (count < every or first == last)
+    ):
+        return 0
+
+    # Dijumlahkan dalam sen (int) supaya snapshot tetap persis
+    if latest is None:
+        balance = session.execute(select(sen(Wallet.saldo_awal)).where(Wallet.id == wallet_id)).scalar() or 0
+    else:
+        balance = latest.balance
+    rows = session.execute(
+        select(Transaction.tanggal, sen(signed_jumlah))
+        .where(*tail)
+        .order_by(Transaction.tanggal, Transaction.id)
+    )
+
+    snapshots = []
+    since = 0
+    previous = None
+    for tanggal, amount in rows:
+        cut = None
+        if previous is not None:
+            if _month_start(tanggal) > _month_start(previous):
+                cut = _month_start(tanggal)
+            elif since >= every and tanggal > previous:
+                # rows sharing a timestamp must end up on the same side of the cut
+                cut = tanggal
+        if cut is not None:
+            snapshots.append({'wallet_id': wallet_id, 'as_of': cut, 'balance': from_sen(balance)})
+            since = 0
+        balance += amount
+        since += 1
+        previous = tanggal
+
+    if snapshots:
+        session.execute(BalanceSnapshot.__table__.insert(), snapshots)
+    return len(snapshots)
+
+
+def rebuild_snapshots(session, wallet_ids, every=SNAPSHOT_EVERY):
+    """Recompute the snapshots of ``wallet_ids`` from ``transactions``.
+
+    Snapshots up to a wallet's archived months are kept: their rows are no
+    longer in ``transactions``.
+    """
+    for wallet_id in wallet_ids:
+        discard_snapshots(session, wallet_id, after=archived_through(session, wallet_id))
+        refresh_snapshots(session, wallet_id, every)
+
+
+def balance_at(session, wallet, at, inclusive=True, archive=None):
+    """Balance of ``wallet`` counting transactions up to ``at``.
+
+    Rows dated exactly ``at`` are counted unless ``inclusive`` is false.
+    Returns ``(balance, snapshot_as_of)``; the second item is ``None`` when
+    no snapshot precedes ``at`` and the sum started from ``saldo_awal``.
+    Archived rows after the snapshot are added from ``archive``.
+    """
+    snapshot = session.execute(
+        select(BalanceSnapshot.as_of, sen(BalanceSnapshot.balance).label('balance'))
+        .where(BalanceSnapshot.wallet_id == wallet.id, BalanceSnapshot.as_of <= at)
+        .order_by(BalanceSnapshot.as_of.desc())
+        .limit(1)
+    ).first()
+
+    criteria = [
+        Transaction.wallet_id == wallet.id,
+        Transaction.tanggal <= at if inclusive else Transaction.tanggal < at,
+    ]
+    if snapshot is None:
+        base, as_of = to_sen(wallet.saldo_awal or 0), None
+    else:
+        base, as_of = snapshot.balance, snapshot.as_of
+        criteria.append(Transaction.tanggal >= as_of)
+
+    delta = session.execute(select(sen(func.coalesce(func.sum(signed_jumlah), 0))).where(*criteria)).scalar()
+    if archive is not None:
+        segments = archive.segments(session, wallet.id, as_of, at)
+        income, expense, _ = archive.totals(segments, as_of, at, inclusive).get(wallet.id, (0, 0, 0))
+        delta += income - expense
+    return from_sen(base + delta), as_of
+
+
+def balance_history(session, wallet, bucket, start=None, end=None, inclusive=True, archive=None):
+    """Closing balance of ``wallet`` per ``bucket`` ('day', 'week', 'month').
+
+    One windowed query groups the transactions in ``[start, end]`` by
+    bucket and accumulates their net amounts on top of the opening balance
+    before ``start``. Returns ``(opening, points)``. Buckets without
+    transactions are omitted; the balance carries over unchanged.
+
+    When the range reaches archived months, the per-bucket sums of
+    ``archive`` are merged in and the running balance is summed here.
+    """
+    dialect_name = session.get_bind().dialect.name
+    period = bucket_expr(dialect_name, bucket, Transaction.tanggal).label('bucket')
+    is_income = Transaction.tipe_transaksi == TransactionType.income
+    is_expense = Transaction.tipe_transaksi == TransactionType.expense
+
+    criteria = [Transaction.wallet_id == wallet.id]
+    if start is not None:
+        criteria.append(Transaction.tanggal >= start)
+        opening = balance_at(session, wallet, start, inclusive=False, archive=archive)[0]
+    else:
+        opening = wallet.saldo_awal or 0.0
+    if end is not None:
+        criteria.append(Transaction.tanggal <= end if inclusive else Transaction.tanggal < end)
+
+    per_bucket = (
+        select(
+            period,
+            func.sum(case((is_income, Transaction.jumlah), else_=0)).label('income'),
+            func.sum(case((is_expense, Transaction.jumlah), else_=0)).label('expense'),
+            func.count(Transaction.id).label('count'),
+        )
+        .where(*criteria)
+        .group_by(period)
+        .subquery()
+    )
+    opening_sen = to_sen(opening)
+    segments = archive.segments(session, wallet.id, start, end) if archive is not None else None
+    if segments:
+        buckets = archive.buckets(segments, bucket, start, end, inclusive)
+        rows = session.execute(select(
+            per_bucket.c.bucket, sen(per_bucket.c.income), sen(per_bucket.c.expense), per_bucket.c.count,
+        ))
+        for day, income, expense, count in rows:
+            entry = buckets.setdefault(day, [0, 0, 0])
+            entry[0] += income
+            entry[1] += expense
+            entry[2] += count
+        points = []
+        balance = opening_sen
+        for day in sorted(buckets):
+            income, expense, count = buckets[day]
+            balance += income - expense
+            points.append({
+                'bucket': day.isoformat(),
+                'income': from_sen(income),
+                'expense': from_sen(expense),
+                'count': count,
+                'saldo': from_sen(balance),
+            })
+        return opening, points
+
+    running = func.sum(per_bucket.c.income - per_bucket.c.expense).over(order_by=per_bucket.c.bucket)
+    stmt = select(
+        per_bucket.c.bucket, per_bucket.c.income, per_bucket.c.expense, per_bucket.c.count,
+        sen(running).label('net'),
+    ).order_by(per_bucket.c.bucket)
+
+    return opening, [
+        {
+            'bucket': row.bucket.isoformat(),
+            'income': row.income,
+            'expense': row.expense,
+            'count': row.count,
+            'saldo': from_sen(opening_sen + row.net),
+        }
+        for row in session.execute(stmt)
+    ]
@@ -1,10 +1,11 @@
 # models/transaction.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .category import Category, TransactionType  # Import TransactionType dari category.py
 import enum
 from .base import Base
+from .money import Money
 
 class TransactionType(enum.Enum):
     income = "income"
@@ -34,10 +35,16 @@ class incomeCategory(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Listing dan paginasi keyset selalu berurutan (tanggal DESC, id DESC),
+        # jadi setiap halaman cukup satu index range scan.
+        Index('ix_transactions_wallet_id_tanggal_id', 'wallet_id', 'tanggal', 'id'),
+        Index('ix_transactions_tanggal_id', 'tanggal', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     tipe_transaksi = Column(Enum(TransactionType), nullable=False)
-    jumlah = Column(Float, nullable=False)
+    jumlah = Column(Money, nullable=False)
     deskripsi = Column(String(255))
     wallet_id = Column(Integer, ForeignKey('wallets.id'), nullable=False)
     tanggal = Column(DateTime, nullable=False)
@@ -58,6 +65,7 @@ class Transaction(Base):
             'tipe_transaksi': self.tipe_transaksi.value if self.tipe_transaksi else None,
             'jumlah': self.jumlah,
             'deskripsi': self.deskripsi,
+            'category_id': self.category_id,
             'wallet_id': self.wallet_id,
             'tanggal': self.tanggal.isoformat() if self.tanggal else None,
             'catatan': self.catatan,
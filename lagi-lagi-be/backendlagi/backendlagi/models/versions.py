@@ -0,0 +1,113 @@
+# models/versions.py
+from sqlalchemy import Column, String, BigInteger, DateTime, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+from transaction.interfaces import TransientError
+from .base import Base
+
+WALLETS = 'wallets'
+TRANSACTIONS = 'transactions'
+# Baris per pernyataan INSERT (batas parameter SQLite)
+BUMP_BATCH = 1000
+# Baris total per koleksi; penulis hanya berebut baris total dengan dompet
+# yang berbagi sisa bagi yang sama
+SHARDS = 16
+
+
+class CollectionVersion(Base):
+    """Penghitung perubahan per dompet (``transactions:1``) dan totalnya (``transactions:total1``).
+
+    Bumped in the same DB transaction as every write to the collection, so
+    a reader that sees a version also sees the data it stands for. Used as
+    the validator for conditional GETs of whole listings.
+    """
+    __tablename__ = 'collection_versions'
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CounterConflict(TransientError):
+    """Two writers created the same counter row; the request is retried."""
+
+
+def version_name(name, wallet_id):
+    """Counter row of collection ``name`` for one wallet: ``transactions:42``."""
+    return f'{name}:{wallet_id}'
+
+
+def total_name(name, shard):
+    """One of the ``SHARDS`` rows whose sum counts every change to ``name``."""
+    return f'{name}:total{shard}'
+
+
+def bump_versions(session, wallet_ids, *names):
+    """Increment the change counters of ``names`` for each of ``wallet_ids``.
+
+    Every wallet has its own counter rows, plus a share in one of
+    ``SHARDS`` total rows that is bumped in the same statement. Writes to
+    different wallets only wait on each other when their wallets share a
+    total row. Call it last in a write view: the rows stay locked until the
+    request commits.
+    """
+    table = CollectionVersion.__table__
+    now = datetime.utcnow()
+    wallet_ids = set(wallet_ids)
+    keys = {version_name(name, wallet_id) for name in names for wallet_id in wallet_ids}
+    keys.update(total_name(name, wallet_id % SHARDS) for name in names for wallet_id in wallet_ids)
+    # Urutan tetap, jadi dua penulis tidak saling mengunci silang
+    keys = sorted(keys)
+
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+        for i in range(0, len(keys), BUMP_BATCH):
+            stmt = insert(table).values([{'name': key, 'version': 1, 'changed_at': now}
+                                         for key in keys[i:i + BUMP_BATCH]])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['name'],
+                set_={'version': table.c.version + 1, 'changed_at': now},
+            )
+            session.execute(stmt)
+        return
+
+    for key in keys:
+        result = session.execute(
+            update(table).where(table.c.name == key)
+            .values(version=table.c.version + 1, changed_at=now)
+        )
+        if result.rowcount == 0:
+            try:
+                session.execute(table.insert().values(name=key, version=1, changed_at=now))
+            except IntegrityError as e:
+                # Penulis lain baru saja membuat baris yang sama
+                raise CounterConflict(key) from e
+
+
+def get_versions(session, *names, wallet_id=None):
+    """Return ``{name: (version, changed_at)}``, for one wallet or all of them.
+
+    Across all wallets the version is the sum of the ``SHARDS`` total rows:
+    every bump raises it and rows are never deleted, so it never repeats.
+    ``changed_at`` is then the latest change, which commits out of order can
+    move backwards; the version is the strict validator. Unknown names are
+    ``(0, None)``.
+    """
+    table = CollectionVersion.__table__
+    if wallet_id is not None:
+        keys = {version_name(name, wallet_id): name for name in names}
+    else:
+        keys = {total_name(name, shard): name for name in names for shard in range(SHARDS)}
+    rows = session.execute(
+        select(table.c.name, table.c.version, table.c.changed_at).where(table.c.name.in_(keys))
+    )
+    versions = dict.fromkeys(names, (0, None))
+    for key, version, changed_at in rows:
+        name = keys[key]
+        total, latest = versions[name]
+        if latest is not None and changed_at < latest:
+            changed_at = latest
+        versions[name] = (total + version, changed_at)
+    return versions
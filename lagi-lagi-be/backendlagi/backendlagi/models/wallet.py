@@ -1,9 +1,11 @@
 # models/wallet.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, select, update
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 import enum
 from .base import Base
+from .money import Money
 
 class WalletType(enum.Enum):
     cash = "cash"
@@ -17,8 +19,8 @@ class Wallet(Base):
     id = Column(Integer, primary_key=True)
     nama_dompet = Column(String(100), nullable=False)
     deskripsi = Column(String(255))
-    saldo_awal = Column(Float, default=0.0)
-    saldo_saat_ini = Column(Float, default=0.0)
+    saldo_awal = Column(Money, default=0)
+    saldo_saat_ini = Column(Money, default=0)
     tipe_dompet = Column(Enum(WalletType), nullable=False)
     warna = Column(String(7))  # Hex color code
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -46,4 +48,40 @@ class Wallet(Base):
             'warna': self.warna,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+def adjust_wallet_balance(session, wallet_id, delta, require_funds=False):
+    """Add ``delta`` to ``saldo_saat_ini`` with a single UPDATE statement.
+
+    The new balance is computed by the database from the row it locks, so
+    concurrent requests cannot overwrite each other's changes. With
+    ``require_funds`` the row is only updated if the result stays at or
+    above zero. Returns the new balance, or ``None`` when no row was updated
+    (unknown wallet or insufficient funds).
+    """
+    now = datetime.utcnow()
+    stmt = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id)
+        .values(saldo_saat_ini=Wallet.saldo_saat_ini + delta, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if require_funds:
+        stmt = stmt.where(Wallet.saldo_saat_ini + delta >= 0)
+
+    if session.get_bind().dialect.update_returning:
+        balance = session.execute(stmt.returning(Wallet.saldo_saat_ini)).scalar()
+    else:
+        if session.execute(stmt).rowcount == 0:
+            return None
+        balance = session.execute(
+            select(Wallet.saldo_saat_ini).where(Wallet.id == wallet_id)
+        ).scalar()
+
+    # Jaga agar objek Wallet yang sudah dimuat di sesi tetap sesuai dengan DB
+    wallet = session.identity_map.get(session.identity_key(Wallet, wallet_id))
+    if wallet is not None and balance is not None:
+        set_committed_value(wallet, 'saldo_saat_ini', balance)
+        set_committed_value(wallet, 'updated_at', now)
+    return balance
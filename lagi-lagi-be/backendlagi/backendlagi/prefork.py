@@ -0,0 +1,334 @@
+# prefork.py
+"""Pre-forking waitress server: several worker processes on shared sockets.
+
+One waitress process is bound to a single core by the GIL. Here a master
+process binds the listening sockets and forks ``workers`` children that
+each run waitress on the inherited sockets; the kernel spreads accepted
+connections between them. Use it from an ini file::
+
+    [server:main]
+    use = egg:backendlagi#prefork
+    listen = *:6543
+    workers = 4
+    threads = 4
+    max_requests = 10000
+    max_requests_jitter = 1000
+    graceful_timeout = 30
+
+Every worker calls ``backendlagi.models.after_fork`` first, so pooled
+database connections are never shared between processes, and warms its
+pool in the background once it is serving (``backendlagi.pool_warmup``). A worker exits
+after ``max_requests`` requests (plus a random ``max_requests_jitter`` so
+they do not all restart together; 0 disables) and the master forks a
+replacement. Other options are passed to waitress.
+
+Signals to the master: ``TERM``/``INT`` stop gracefully (workers finish
+their in-flight requests for up to ``graceful_timeout`` seconds, then are
+killed), ``HUP`` replaces all workers the same way without closing the
+sockets.
+
+The master also creates the coming months' partitions of ``transactions``
+on PostgreSQL (``backendlagi.models.maintain_partitions``) at start and
+every ``backendlagi.partitions.interval`` seconds (default 3600; 0
+disables), ``backendlagi.partitions.premake`` months ahead (default 3).
+
+Per-process state is per worker: ``/metrics``, ``/api/internal/*`` and
+the wallet cache describe the worker that answered. Set
+``backendlagi.wallet_cache.backend`` to ``PostgresInvalidation`` so that a
+write in one worker invalidates the others' caches.
+"""
+import errno
+import itertools
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import time
+
+from waitress import wasyncore
+from waitress.adjustments import Adjustments
+from waitress.channel import HTTPChannel
+from waitress.server import BaseWSGIServer, create_server
+
+from .models import after_fork, maintain_partitions, warm_pool
+from .models.partitions import DEFAULT_PREMAKE
+
+log = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5
+# Pekerja yang mati lebih cepat dari ini dianggap gagal start
+MIN_WORKER_LIFETIME = 1.0
+# Saat berhenti, koneksi tanpa request selama ini dianggap menganggur
+IDLE_GRACE = 1.0
+
+
+def bind_sockets(listen, backlog=1024):
+    """Bind and listen on every address of a waitress ``listen`` string."""
+    sockets = []
+    for family, socktype, proto, sockaddr in Adjustments(listen=listen).listen:
+        sock = socket.socket(family, socktype, proto)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+        sock.bind(sockaddr)
+        sock.listen(backlog)
+        sockets.append(sock)
+    return sockets
+
+
+class Worker(object):
+    """One forked process serving ``app`` with waitress on inherited sockets."""
+
+    def __init__(self, app, sockets, max_requests=0, graceful_timeout=30.0, **server_options):
+        self.app = app
+        self.sockets = sockets
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.server_options = server_options
+        self.stopping = False
+        self._handled = itertools.count(1)
+        self._parent = os.getppid()
+
+    def counting_app(self, environ, start_response):
+        handled = next(self._handled)
+        if self.max_requests and handled == self.max_requests:
+            log.info('Worker %d served %d requests, recycling', os.getpid(), handled)
+            self.stopping = True
+        return self.app(environ, start_response)
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        # Ctrl-C mengenai seluruh process group; master yang memutuskan
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        self.map = {}
+        server = create_server(self.counting_app, map=self.map, sockets=self.sockets, **self.server_options)
+        log.info('Worker %d serving', os.getpid())
+        warm_pool(self.app.registry)
+        while not self.stopping:
+            wasyncore.loop(timeout=POLL_INTERVAL, map=self.map, count=1)
+            if os.getppid() != self._parent:
+                log.warning('Worker %d lost its master, exiting', os.getpid())
+                break
+        self.drain(server)
+
+    def drain(self, server):
+        """Stop accepting, finish in-flight requests, then stop the task threads."""
+        listeners = [d for d in self.map.values() if isinstance(d, BaseWSGIServer)]
+        for listener in listeners:
+            # Hanya salinan socket milik proses ini; trigger-nya masih dipakai
+            # thread yang sedang menulis respons
+            wasyncore.dispatcher.close(listener)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while time.monotonic() < deadline:
+            busy = False
+            for channel in list(self.map.values()):
+                if not isinstance(channel, HTTPChannel):
+                    continue
+                idle = time.time() - channel.last_activity > IDLE_GRACE
+                if channel.requests or channel.request is not None or channel.total_outbufs_len or not idle:
+                    # Koneksi yang baru diterima mungkin belum mengirim request-nya
+                    busy = True
+                else:
+                    channel.handle_close()
+            if not busy:
+                break
+            wasyncore.loop(timeout=POLL_INTERVAL / 5, map=self.map, count=1)
+        server.task_dispatcher.shutdown(cancel_pending=True, timeout=POLL_INTERVAL)
+        for listener in listeners:
+            listener.trigger.close()
+
+
+class Arbiter(object):
+    """Master process: keeps ``workers`` children alive until told to stop."""
+
+    def __init__(self, app, sockets, workers=1, max_requests=0, max_requests_jitter=0,
+                 graceful_timeout=30.0, **server_options):
+        self.app = app
+        self.sockets = sockets
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.server_options = server_options
+        self.children = {}
+        self.retiring = set()
+        self.signals = []
+        self.stopping = False
+        settings = app.registry.settings
+        self.partition_interval = float(settings.get('backendlagi.partitions.interval', 3600))
+        self.partition_premake = int(settings.get('backendlagi.partitions.premake', DEFAULT_PREMAKE))
+        self.next_maintenance = 0.0
+
+    def spawn(self):
+        limit = self.max_requests
+        if limit and self.max_requests_jitter:
+            limit += random.randint(0, self.max_requests_jitter)
+
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return pid
+
+        code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.set_wakeup_fd(-1)
+            os.close(self._wakeup[0])
+            os.close(self._wakeup[1])
+            random.seed()
+            after_fork(self.app.registry)
+            Worker(self.app, self.sockets, limit, self.graceful_timeout, **self.server_options).run()
+        except BaseException:
+            log.exception('Worker %d failed', os.getpid())
+            code = 1
+        finally:
+            logging.shutdown()
+            os._exit(code)
+
+    def reap(self):
+        """Collect exited children and replace the ones that should still run."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.children.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code:
+                log.error('Worker %d exited with status %d', pid, code)
+                if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                    # Jangan memutar fork tanpa henti kalau aplikasi gagal start
+                    time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def _signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def reload(self):
+        """Replace every worker; the old ones finish their requests first."""
+        old = list(self.children)
+        self.retiring.update(old)
+        for _ in range(self.workers):
+            self.spawn()
+        self._kill(old, signal.SIGTERM)
+
+    def _kill(self, pids, signum):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+    def maintain(self):
+        """Create upcoming transaction partitions when ``partition_interval`` has passed."""
+        if not self.partition_interval or time.monotonic() < self.next_maintenance:
+            return
+        engine = self.app.registry['dbsession_factory'].kw['bind']
+        maintain_partitions(engine, self.partition_premake)
+        # Master tidak memegang koneksi yang akan diwariskan ke pekerja berikutnya
+        engine.dispose()
+        self.next_maintenance = time.monotonic() + self.partition_interval
+
+    def stop(self):
+        self.stopping = True
+        self._kill(self.children, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + POLL_INTERVAL * 2
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(POLL_INTERVAL / 5)
+        if self.children:
+            log.warning('Killing %d workers still busy after %ss', len(self.children), self.graceful_timeout)
+            self._kill(self.children, signal.SIGKILL)
+            for pid in list(self.children):
+                os.waitpid(pid, 0)
+                self.children.pop(pid)
+
+    def run(self):
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, self._signal)
+
+        self.maintain()
+        # Koneksi dan thread listener master tidak boleh diwariskan ke pekerja
+        self.app.registry['dbsession_factory'].kw['bind'].dispose()
+        self.app.registry['wallet_cache'].backend.close()
+        for sock in self.sockets:
+            host, port = sock.getsockname()[:2]
+            log.info('Serving on http://%s:%s with %d workers', host, port, self.workers)
+        for _ in range(self.workers):
+            self.spawn()
+
+        try:
+            while True:
+                try:
+                    select.select([self._wakeup[0]], [], [], POLL_INTERVAL * 2)
+                    os.read(self._wakeup[0], 512)
+                except (BlockingIOError, InterruptedError):
+                    pass
+                while self.signals:
+                    signum = self.signals.pop(0)
+                    if signum in (signal.SIGTERM, signal.SIGINT):
+                        log.info('Shutting down')
+                        return
+                    if signum == signal.SIGHUP:
+                        log.info('Reloading workers')
+                        self.reload()
+                self.reap()
+                self.maintain()
+        finally:
+            self.stop()
+            for sock in self.sockets:
+                sock.close()
+            signal.set_wakeup_fd(-1)
+            for fd in self._wakeup:
+                os.close(fd)
+
+
+def serve(app, listen='0.0.0.0:6543', workers=None, backlog=1024, max_requests=0,
+          max_requests_jitter=0, graceful_timeout=30.0, **server_options):
+    """Run ``app`` on ``workers`` processes (default: one per CPU) until stopped."""
+    sockets = bind_sockets(listen, backlog)
+    Arbiter(
+        app, sockets,
+        workers=workers or os.cpu_count() or 1,
+        max_requests=max_requests,
+        max_requests_jitter=max_requests_jitter,
+        graceful_timeout=graceful_timeout,
+        **server_options
+    ).run()
+
+
+def serve_paste(app, global_conf, **kw):
+    """PasteDeploy ``paste.server_runner`` for ``use = egg:backendlagi#prefork``."""
+    listen = kw.pop('listen', None)
+    if listen is None:
+        listen = '%s:%s' % (kw.pop('host', '0.0.0.0'), kw.pop('port', '6543'))
+    serve(
+        app, listen,
+        workers=int(kw.pop('workers', 0)),
+        backlog=int(kw.pop('backlog', 1024)),
+        max_requests=int(kw.pop('max_requests', 0)),
+        max_requests_jitter=int(kw.pop('max_requests_jitter', 0)),
+        graceful_timeout=float(kw.pop('graceful_timeout', 30)),
+        **kw
+    )
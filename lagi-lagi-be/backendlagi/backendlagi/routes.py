@@ -7,10 +7,14 @@ def includeme(config):
     config.add_route('wallets', '/api/wallets')
     config.add_route('wallet_detail', '/api/wallets/{id}')
     config.add_route('wallet_balance', '/api/wallets/{id}/balance')
+    config.add_route('wallet_balance_history', '/api/wallets/{id}/balance-history')
 
     """Transaction routes configuration"""
     # Transaction routes
     config.add_route('transactions', '/api/transactions')
+    # must come before transaction_detail so "bulk"/"export" are not taken as ids
+    config.add_route('transactions_bulk', '/api/transactions/bulk')
+    config.add_route('transactions_export', '/api/transactions/export')
     config.add_route('transaction_detail', '/api/transactions/{id}')
 
     """Utility routes configuration"""
@@ -20,3 +24,18 @@ def includeme(config):
     config.add_route('transaction_types', '/api/transaction-types')
 
     config.add_route('get_categories', '/api/categories')
+
+    """Summary routes configuration"""
+    # Summary routes
+    config.add_route('summary', '/api/summary')
+    config.add_route('monthly_report', '/api/reports/monthly')
+
+    """Batch routes configuration"""
+    # Batch routes
+    config.add_route('batch', '/api/batch')
+
+    """Internal routes configuration"""
+    # Internal routes
+    config.add_route('pool_stats', '/api/internal/pool')
+    config.add_route('wallet_cache_stats', '/api/internal/cache')
+    config.add_route('metrics', '/metrics')
@@ -0,0 +1,159 @@
+import argparse
+import sys
+from datetime import datetime
+
+from pyramid.paster import bootstrap, setup_logging
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.exc import OperationalError
+from zope.sqlalchemy import mark_changed
+
+from .. import models
+from ..models.archive import SEGMENT_COLUMNS, SEGMENT_FIELDS, ArchiveSegment, month_bounds
+from ..models.money import sen
+from ..models.partitions import add_months, month_start
+from ..models.rollup import bucket_expr
+from ..models.versions import TRANSACTIONS
+
+DEFAULT_HORIZON = 24
+# Jumlah id per DELETE supaya daftar parameter tetap kecil
+DELETE_CHUNK = 1000
+
+
+def archive_candidates(dbsession, before):
+    """``(wallet_id, month)`` pairs with transactions dated before ``before``, oldest first."""
+    Transaction = models.Transaction
+    month = bucket_expr(dbsession.get_bind().dialect.name, 'month', Transaction.tanggal)
+    return dbsession.execute(
+        select(Transaction.wallet_id, month.label('month'))
+        .where(Transaction.tanggal < before)
+        .group_by(Transaction.wallet_id, month)
+        .order_by(month, Transaction.wallet_id)
+    ).all()
+
+
+def archive_month(dbsession, archive, wallet_id, month):
+    """Move the wallet's transactions of ``month`` into a segment file.
+
+    Runs in the caller's DB transaction: the file is written first, then
+    the manifest entry replaces any previous one for the month (its rows
+    are merged in) and the rows are deleted from ``transactions``. A
+    balance snapshot is kept at the end of the month, so snapshot refresh
+    never has to walk archived rows. Returns ``(manifest values, superseded
+    path)``, or ``None`` when there is nothing to move; delete the
+    superseded file only after the commit.
+    """
+    Transaction = models.Transaction
+    table = ArchiveSegment.__table__
+    start, end = month_bounds(month)
+    rows = dbsession.execute(
+        select(
+            Transaction.id, type_coerce(Transaction.tipe_transaksi, String), sen(Transaction.jumlah),
+            Transaction.deskripsi, Transaction.category_id, Transaction.wallet_id,
+            Transaction.tanggal, Transaction.catatan, Transaction.created_at,
+        )
+        .where(Transaction.wallet_id == wallet_id, Transaction.tanggal >= start, Transaction.tanggal < end)
+        .order_by(Transaction.tanggal, Transaction.id)
+        .with_for_update()
+    ).all()
+    if not rows:
+        return None
+    ids = [row[0] for row in rows]
+
+    snapshot = dbsession.execute(
+        select(models.BalanceSnapshot.as_of)
+        .where(models.BalanceSnapshot.wallet_id == wallet_id, models.BalanceSnapshot.as_of == end)
+    ).first()
+    if snapshot is None:
+        wallet = dbsession.get(models.Wallet, wallet_id)
+        balance, _ = models.balance_at(dbsession, wallet, end, inclusive=False, archive=archive)
+        dbsession.add(models.BalanceSnapshot(wallet_id=wallet_id, as_of=end, balance=balance))
+        dbsession.flush()
+
+    previous = dbsession.execute(
+        select(*SEGMENT_FIELDS).where(table.c.wallet_id == wallet_id, table.c.month == month)
+    ).first()
+    stored = [tuple(row) for row in rows]
+    if previous is not None:
+        # Baris yang masuk setelah bulan ini diarsipkan digabung ke segmen baru
+        columns = archive.read(previous)
+        stored.extend(zip(*[columns[name] for name, _ in SEGMENT_COLUMNS]))
+        stored.sort(key=lambda row: (row[6], row[0]))
+        dbsession.execute(table.delete().where(table.c.wallet_id == wallet_id, table.c.month == month))
+
+    values = archive.write(wallet_id, month, stored)
+    dbsession.execute(table.insert(), [values])
+    for i in range(0, len(ids), DELETE_CHUNK):
+        dbsession.execute(Transaction.__table__.delete().where(Transaction.id.in_(ids[i:i + DELETE_CHUNK])))
+    superseded = previous.path if previous is not None and previous.path != values['path'] else None
+    return values, superseded
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Move old transactions into the archive directory (backendlagi.archive.directory).',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument(
+        '--horizon',
+        type=int,
+        default=None,
+        help='Keep this many months, counting the current one, in the transactions table '
+        '(default: backendlagi.archive.horizon_months or %d)' % DEFAULT_HORIZON,
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only list the wallet months that would be archived',
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    env = bootstrap(args.config_uri)
+    request = env['request']
+    archive = env['registry']['archive']
+    if archive is None:
+        print('backendlagi.archive.directory is not set; nothing to do')
+        return 1
+    horizon = args.horizon
+    if horizon is None:
+        horizon = int(env['registry'].settings.get('backendlagi.archive.horizon_months', DEFAULT_HORIZON))
+    before = add_months(month_start(datetime.utcnow()), 1 - max(horizon, 1))
+
+    try:
+        with request.tm:
+            candidates = archive_candidates(request.dbsession, before)
+        if args.dry_run:
+            for wallet_id, month in candidates:
+                print('Would archive wallet {} {:%Y-%m}'.format(wallet_id, month))
+            return
+
+        # Satu transaksi per dompet per bulan supaya lock tetap singkat
+        archived = 0
+        for wallet_id, month in candidates:
+            with request.tm:
+                result = archive_month(request.dbsession, archive, wallet_id, month)
+                if result is None:
+                    continue
+                models.bump_versions(request.dbsession, [wallet_id], TRANSACTIONS)
+                # only Core statements ran, which zope.sqlalchemy does not track
+                mark_changed(request.dbsession)
+            values, superseded = result
+            if superseded is not None:
+                archive.remove(superseded)
+            archived += values['row_count']
+            print('Archived wallet {} {:%Y-%m}: {} rows, {} bytes'.format(
+                wallet_id, month, values['row_count'], values['size']))
+        print('{} transactions archived before {:%Y-%m}'.format(archived, before))
+    except OperationalError:
+        print('''
+Pyramid is having a problem using your SQL database.  Check that the
+database server referred to by the "sqlalchemy.url" setting in your
+ini file is running and that the tables exist (run `alembic upgrade head`).
+            ''')
+        return 1
@@ -0,0 +1,63 @@
+import argparse
+import sys
+from datetime import datetime
+
+from pyramid.paster import get_appsettings, setup_logging
+from sqlalchemy.exc import OperationalError
+
+from .. import models
+from ..models.partitions import DEFAULT_PREMAKE
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Create the monthly partitions of the transactions table (PostgreSQL).',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument(
+        '--premake',
+        type=int,
+        default=None,
+        help='Months ahead to create partitions for (default: backendlagi.partitions.premake or %d)'
+        % DEFAULT_PREMAKE,
+    )
+    parser.add_argument(
+        '--since',
+        type=lambda value: datetime.strptime(value, '%Y-%m'),
+        default=None,
+        help='Also create the partitions from this month (YYYY-MM) on, e.g. before importing history',
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    settings = get_appsettings(args.config_uri)
+    premake = args.premake
+    if premake is None:
+        premake = int(settings.get('backendlagi.partitions.premake', DEFAULT_PREMAKE))
+    engine = models.get_engine(settings)
+
+    try:
+        with engine.connect() as connection:
+            if not models.partitions.is_partitioned(connection):
+                print('transactions is not partitioned on this database; nothing to do')
+                return
+            connection.rollback()
+            created = models.ensure_partitions(connection, start=args.since, premake=premake)
+    except OperationalError:
+        print('''
+Pyramid is having a problem using your SQL database.  Check that the
+database server referred to by the "sqlalchemy.url" setting in your
+ini file is running and that the tables exist (run `alembic upgrade head`).
+            ''')
+        return 1
+    finally:
+        engine.dispose()
+    for name in created:
+        print('Created partition {}'.format(name))
+    print('{} partitions created'.format(len(created)))
@@ -0,0 +1,67 @@
+import argparse
+import sys
+
+from pyramid.paster import bootstrap, setup_logging
+from sqlalchemy.exc import OperationalError
+from zope.sqlalchemy import mark_changed
+
+from .. import models
+
+
+def wallet_id_chunks(dbsession, chunk_size):
+    """Yield lists of wallet ids, ``chunk_size`` at a time, in id order."""
+    last_id = 0
+    while True:
+        ids = [
+            row.id for row in dbsession.query(models.Wallet.id)
+            .filter(models.Wallet.id > last_id)
+            .order_by(models.Wallet.id)
+            .limit(chunk_size)
+        ]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Rebuild the transaction_rollups and balance_snapshots tables from transactions.',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=100,
+        help='Number of wallets rebuilt per database transaction',
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    env = bootstrap(args.config_uri)
+    request = env['request']
+
+    try:
+        with request.tm:
+            chunks = list(wallet_id_chunks(request.dbsession, args.chunk_size))
+
+        # Satu transaksi per potongan dompet supaya lock dan undo log tetap kecil
+        for ids in chunks:
+            with request.tm:
+                models.rebuild_rollups(request.dbsession, ids)
+                models.rebuild_snapshots(request.dbsession, ids)
+                # only Core statements ran, which zope.sqlalchemy does not track
+                mark_changed(request.dbsession)
+            print('Rebuilt rollups and snapshots for wallets {}..{}'.format(ids[0], ids[-1]))
+    except OperationalError:
+        print('''
+Pyramid is having a problem using your SQL database.  Check that the
+database server referred to by the "sqlalchemy.url" setting in your
+ini file is running and that the tables exist (run `alembic upgrade head`).
+            ''')
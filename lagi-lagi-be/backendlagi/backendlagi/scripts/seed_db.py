@@ -0,0 +1,374 @@
+import argparse
+import bisect
+import math
+import multiprocessing
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pyramid.paster import get_appsettings, setup_logging
+from sqlalchemy import bindparam, insert, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..models.category import TransactionType as CategoryType
+from ..models.money import SEN_PER_UNIT, from_sen, to_sen
+from ..models.transaction import TransactionType, expenseCategory, incomeCategory
+from ..models.versions import TRANSACTIONS, WALLETS
+
+# Kategori pengeluaran: (bobot, jumlah minimum, jumlah maksimum dalam rupiah, deskripsi)
+EXPENSES = {
+    expenseCategory.makanan_dan_minuman: (35, 15000, 150000, [
+        'Makan siang', 'Sarapan', 'Kopi', 'Makan malam', 'Jajan', 'Pesan antar makanan']),
+    expenseCategory.transport: (15, 10000, 120000, [
+        'Ojek online', 'Bensin', 'Parkir', 'KRL', 'Tol', 'Taksi']),
+    expenseCategory.belanja: (12, 50000, 1500000, [
+        'Belanja bulanan', 'Pakaian', 'Belanja online', 'Minimarket', 'Elektronik']),
+    expenseCategory.hiburan: (6, 30000, 500000, [
+        'Bioskop', 'Langganan streaming', 'Konser', 'Game', 'Karaoke']),
+    expenseCategory.tagihan_dan_utilitas: (6, 100000, 2000000, [
+        'Listrik', 'Air PDAM', 'Internet', 'Pulsa', 'BPJS']),
+    expenseCategory.kesehatan: (3, 50000, 1000000, [
+        'Obat', 'Dokter', 'Vitamin', 'Cek laboratorium']),
+    expenseCategory.pendidikan: (2, 200000, 5000000, [
+        'Kursus', 'Buku', 'Uang sekolah', 'Seminar']),
+    expenseCategory.rumah: (4, 100000, 3000000, [
+        'Sewa kos', 'Perabot', 'Perbaikan rumah', 'Kebersihan']),
+    expenseCategory.perjalanan: (2, 300000, 5000000, [
+        'Tiket pesawat', 'Hotel', 'Tiket kereta', 'Oleh-oleh']),
+    expenseCategory.hadiah_dan_donasi: (2, 50000, 1000000, [
+        'Kado ulang tahun', 'Donasi', 'Sumbangan', 'Zakat']),
+    expenseCategory.lainnya: (3, 10000, 500000, [
+        'Lain-lain', 'Biaya admin', 'Fotokopi']),
+}
+INCOMES = {
+    incomeCategory.gaji: (60, 4000000, 20000000, ['Gaji bulanan']),
+    incomeCategory.bisnis: (12, 500000, 10000000, ['Penjualan', 'Proyek freelance', 'Hasil usaha']),
+    incomeCategory.investasi: (8, 100000, 3000000, ['Dividen', 'Bunga deposito', 'Reksa dana']),
+    incomeCategory.bonus: (8, 1000000, 15000000, ['Bonus kinerja', 'THR']),
+    incomeCategory.hadiah: (5, 50000, 2000000, ['Hadiah', 'Angpao']),
+    incomeCategory.piutang: (4, 100000, 5000000, ['Pelunasan piutang']),
+    incomeCategory.lainnya: (3, 50000, 1000000, ['Cashback', 'Refund']),
+}
+WALLETS_NAMES = [
+    ('Dompet Tunai', models.WalletType.cash, '#16a34a'),
+    ('BCA', models.WalletType.bank, '#1d4ed8'),
+    ('Mandiri', models.WalletType.bank, '#f59e0b'),
+    ('BRI', models.WalletType.bank, '#2563eb'),
+    ('GoPay', models.WalletType.e_wallet, '#0ea5e9'),
+    ('OVO', models.WalletType.e_wallet, '#7c3aed'),
+    ('DANA', models.WalletType.e_wallet, '#0284c7'),
+    ('Kartu Kredit', models.WalletType.credit_card, '#dc2626'),
+]
+COPY_COLUMNS = [
+    'tipe_transaksi', 'jumlah', 'deskripsi', 'category_id',
+    'wallet_id', 'tanggal', 'catatan', 'created_at',
+]
+
+
+class Ledger(object):
+    """Random but plausible transactions for one wallet, in date order.
+
+    Amounts are log-uniform within each category's range and rounded to
+    Rp500; rows and balances are in sen, as stored. Incomes are drawn just often enough to cover the expected
+    spending, and an expense the balance cannot cover becomes an income,
+    so the running balance never drops below zero.
+    """
+
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.expense = self._table(EXPENSES)
+        self.income = self._table(INCOMES)
+        self.income_share = 1.05 * self.expense[3] / (self.expense[3] + self.income[3])
+
+    @staticmethod
+    def _table(categories):
+        members = list(categories)
+        cumulative = []
+        total = 0
+        mean = 0.0
+        for member in members:
+            weight, low, high, _ = categories[member]
+            total += weight
+            cumulative.append(total)
+            mean += weight * (high - low) / math.log(high / low)
+        return members, cumulative, categories, mean / total
+
+    def _pick(self, table):
+        members, cumulative, categories, _ = table
+        member = members[bisect.bisect_right(cumulative, self.rnd.random() * cumulative[-1])]
+        _, low, high, descriptions = categories[member]
+        amount = round(math.exp(self.rnd.uniform(math.log(low), math.log(high))) / 500) * 500
+        return member, amount * SEN_PER_UNIT, descriptions[int(self.rnd.random() * len(descriptions))]
+
+    def rows(self, wallet_id, count, balance, start, end):
+        """Yield ``COPY_COLUMNS`` tuples; ``self.balance`` is the final balance."""
+        rnd = self.rnd
+        span = (end - start).total_seconds()
+        offsets = sorted(rnd.random() * span for _ in range(count))
+        for offset in offsets:
+            tanggal = start + timedelta(seconds=int(offset))
+            # Jam aktif 07.00-22.00
+            tanggal = tanggal.replace(hour=7 + tanggal.hour % 15)
+            if rnd.random() < self.income_share:
+                tipe = TransactionType.income
+                member, amount, deskripsi = self._pick(self.income)
+            else:
+                tipe = TransactionType.expense
+                member, amount, deskripsi = self._pick(self.expense)
+                if amount > balance:
+                    tipe = TransactionType.income
+                    member, amount, deskripsi = self._pick(self.income)
+            balance += amount if tipe is TransactionType.income else -amount
+            catatan = '' if rnd.random() < 0.8 else 'dibayar %s' % ('tunai' if rnd.random() < 0.5 else 'transfer')
+            yield (tipe.name, amount, deskripsi, member.value, wallet_id, tanggal, catatan, tanggal)
+        self.balance = balance
+
+
+def ensure_categories(session):
+    """Insert the ``category`` rows the enums refer to, keeping existing ones."""
+    existing = set(session.execute(select(models.Category.id)).scalars())
+    rows = [
+        {'id': member.value, 'name': member.name, 'transaction_type': kind}
+        for kind, enum in ((CategoryType.expense, expenseCategory), (CategoryType.income, incomeCategory))
+        for member in enum if member.value not in existing
+    ]
+    if rows:
+        session.execute(insert(models.Category), rows)
+    return len(rows)
+
+
+def create_wallets(session, count, rnd):
+    """Insert ``count`` wallets; return ``[(wallet_id, saldo_awal in sen), ...]``."""
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        name, tipe, warna = WALLETS_NAMES[i % len(WALLETS_NAMES)]
+        saldo_awal = rnd.randrange(0, 5000000, 50000)
+        rows.append({
+            'nama_dompet': '%s %d' % (name, i + 1), 'deskripsi': 'Data sintetis',
+            'saldo_awal': saldo_awal, 'saldo_saat_ini': saldo_awal,
+            'tipe_dompet': tipe, 'warna': warna, 'created_at': now, 'updated_at': now,
+        })
+    ids = session.execute(
+        insert(models.Wallet).returning(models.Wallet.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    return [(wallet_id, to_sen(row['saldo_awal'])) for wallet_id, row in zip(ids, rows)]
+
+
+def split_counts(total, wallets, rnd):
+    """Spread ``total`` transactions over ``wallets`` unevenly, like real users."""
+    weights = [rnd.lognormvariate(0, 0.6) for _ in range(wallets)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for i in range(total - sum(counts)):
+        counts[i % wallets] += 1
+    return counts
+
+
+def write_rows(connection, rows, batch_size):
+    """Insert rows with COPY on psycopg 3, batched executemany elsewhere."""
+    dialect = connection.dialect
+    if dialect.name == 'postgresql' and dialect.driver == 'psycopg':
+        cursor = connection.connection.driver_connection.cursor()
+        with cursor.copy('COPY transactions (%s) FROM STDIN' % ', '.join(COPY_COLUMNS)) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+
+    table = models.Transaction.__table__
+    batch = []
+    for row in rows:
+        values = dict(zip(COPY_COLUMNS, row))
+        values['tipe_transaksi'] = TransactionType[values['tipe_transaksi']]
+        values['jumlah'] = from_sen(values['jumlah'])
+        batch.append(values)
+        if len(batch) >= batch_size:
+            connection.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        connection.execute(table.insert(), batch)
+
+
+def defer_constraints(connection):
+    """Drop the foreign keys and secondary indexes of ``transactions`` on PostgreSQL.
+
+    Returns the statements recreating them from the catalog definitions.
+    Foreign key triggers fire once per copied row and cost more than the
+    COPY itself; one validation pass at the end is far cheaper. The
+    ``wallet_id`` index is kept because the per-chunk rollup and snapshot
+    rebuilds read through it.
+    """
+    keep = ('transactions_pkey', 'ix_transactions_wallet_id_tanggal_id')
+    indexes = connection.execute(text(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = 'transactions'"
+    )).all()
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = 'transactions'::regclass AND contype = 'f'"
+    )).all()
+
+    restore = []
+    for name, definition in foreign_keys:
+        connection.execute(text('ALTER TABLE transactions DROP CONSTRAINT "%s"' % name))
+        restore.append('ALTER TABLE transactions ADD CONSTRAINT "%s" %s' % (name, definition))
+    for name, definition in indexes:
+        if name not in keep:
+            connection.execute(text('DROP INDEX "%s"' % name))
+            # Indeks tabel berpartisi tercatat "ON ONLY": dibuat ulang begitu,
+            # indeks itu INVALID dan tidak ada di partisinya
+            restore.append(definition.replace(' ON ONLY ', ' ON ', 1))
+    return restore
+
+
+def seed_chunk(settings, wallets, start, end, batch_size, snapshot_every):
+    """Fill one chunk of wallets in its own DB transaction.
+
+    ``wallets`` is a list of ``(wallet_id, saldo_awal, count, seed)``. The
+    rows, the final balances, the rollups and the snapshots of the chunk
+    commit together. Runs in worker processes, so it opens its own engine.
+    Returns the number of rows inserted.
+    """
+    engine = models.get_engine(settings)
+    inserted = 0
+    try:
+        with engine.begin() as connection:
+            balances = []
+            for wallet_id, saldo_awal, count, seed in wallets:
+                ledger = Ledger(random.Random(seed))
+                write_rows(connection, ledger.rows(wallet_id, count, saldo_awal, start, end), batch_size)
+                balances.append({'wallet_id': wallet_id, 'saldo': from_sen(ledger.balance)})
+                inserted += count
+
+            table = models.Wallet.__table__
+            connection.execute(
+                update(table)
+                .where(table.c.id == bindparam('wallet_id'))
+                .values(saldo_saat_ini=bindparam('saldo'), updated_at=end),
+                balances,
+            )
+
+            session = Session(bind=connection)
+            ids = [wallet[0] for wallet in wallets]
+            models.rebuild_rollups(session, ids)
+            models.rebuild_snapshots(session, ids, snapshot_every)
+            session.flush()
+    finally:
+        engine.dispose()
+    return inserted
+
+
+def _seed_chunk(args):
+    return seed_chunk(*args)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic wallets and transactions (with rollups and snapshots).',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument('--wallets', type=int, default=10, help='Number of wallets to create')
+    parser.add_argument('--transactions', type=int, default=10000,
+                        help='Number of transactions spread over the new wallets')
+    parser.add_argument('--months', type=int, default=24,
+                        help='Transactions are dated over this many months up to today')
+    parser.add_argument('--batch-size', type=int, default=10000,
+                        help='Rows per INSERT batch (COPY streams on PostgreSQL with psycopg 3)')
+    parser.add_argument('--chunk-size', type=int, default=20,
+                        help='Number of wallets filled per database transaction')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes filling chunks in parallel (PostgreSQL only)')
+    parser.add_argument('--defer-constraints', action='store_true',
+                        help='PostgreSQL: drop the transactions foreign keys and secondary indexes '
+                             'during the load and recreate them at the end. Only for databases '
+                             'nothing else is writing to.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible data')
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    settings = dict(get_appsettings(args.config_uri))
+    snapshot_every = int(settings.get('backendlagi.balance_snapshot_every', models.snapshot.SNAPSHOT_EVERY))
+
+    rnd = random.Random(args.seed)
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=round(args.months * 30.44))
+    engine = models.get_engine(settings)
+    workers = args.workers
+    if workers > 1 and engine.dialect.name == 'sqlite':
+        print('SQLite allows one writer at a time; using a single process')
+        workers = 1
+    defer = args.defer_constraints and engine.dialect.name == 'postgresql'
+    restore = []
+
+    started = time.perf_counter()
+    try:
+        with Session(engine) as session, session.begin():
+            added = ensure_categories(session)
+            wallets = create_wallets(session, args.wallets, rnd)
+        with engine.connect() as connection:
+            # PostgreSQL: partisi bulanan untuk seluruh riwayat, bukan partisi DEFAULT
+            models.ensure_partitions(connection, start=start, now=end)
+        if defer:
+            with engine.begin() as connection:
+                restore = defer_constraints(connection)
+        engine.dispose()
+        print('Created {} wallets ({} categories added)'.format(len(wallets), added))
+
+        counts = split_counts(args.transactions, len(wallets), rnd) if wallets else []
+        work = [
+            (wallet_id, saldo_awal, count, rnd.getrandbits(32))
+            for (wallet_id, saldo_awal), count in zip(wallets, counts)
+        ]
+        chunks = [
+            (settings, work[i:i + args.chunk_size], start, end, args.batch_size, snapshot_every)
+            for i in range(0, len(work), args.chunk_size)
+        ]
+
+        done = 0
+        if workers > 1:
+            # spawn: setiap proses membuka engine sendiri, tidak ada koneksi yang diwarisi
+            with multiprocessing.get_context('spawn').Pool(workers) as pool:
+                for inserted in pool.imap_unordered(_seed_chunk, chunks):
+                    done += inserted
+                    print('{} / {} transactions'.format(done, args.transactions))
+        else:
+            for chunk in chunks:
+                done += seed_chunk(*chunk)
+                print('{} / {} transactions'.format(done, args.transactions))
+
+        if restore:
+            print('Recreating {} constraints and indexes'.format(len(restore)))
+            with engine.begin() as connection:
+                for statement in restore:
+                    connection.execute(text(statement))
+            restore = []
+
+        with Session(engine) as session, session.begin():
+            models.bump_versions(session, [wallet_id for wallet_id, _ in wallets], WALLETS, TRANSACTIONS)
+    except OperationalError:
+        print('''
+Pyramid is having a problem using your SQL database.  Check that the
+database server referred to by the "sqlalchemy.url" setting in your
+ini file is running and that the tables exist (run `alembic upgrade head`).
+            ''')
+        return 1
+    finally:
+        if restore:
+            # Jangan tinggalkan tabel tanpa constraint walaupun pengisian gagal
+            with engine.begin() as connection:
+                for statement in restore:
+                    connection.execute(text(statement))
+        engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    print('Seeded {} transactions in {:.1f}s ({:.0f} rows/s)'.format(
+        done, elapsed, done / elapsed if elapsed else 0))
@@ -29,14 +29,18 @@ class BaseTest(unittest.TestCase):
 
     def init_database(self):
         from .models.meta import Base
+        from .models.base import Base as AppBase
         Base.metadata.create_all(self.engine)
+        AppBase.metadata.create_all(self.engine)
 
     def tearDown(self):
         from .models.meta import Base
+        from .models.base import Base as AppBase
 
         testing.tearDown()
         transaction.abort()
         Base.metadata.drop_all(self.engine)
+        AppBase.metadata.drop_all(self.engine)
 
 
 class TestMyViewSuccessCondition(BaseTest):
@@ -63,3 +67,1608 @@ class TestMyViewFailureCondition(BaseTest):
         from .views.default import my_view
         info = my_view(dummy_request(self.session))
         self.assertEqual(info.status_int, 500)
+
+
+class TestTransactionPagination(BaseTest):
+
+    def setUp(self):
+        super(TestTransactionPagination, self).setUp()
+        self.init_database()
+
+        from datetime import datetime, timedelta
+        from .models import Category, Wallet, WalletType
+        from .models.category import TransactionType as CategoryType
+        from .models.transaction import Transaction, TransactionType
+
+        self.session.add(Category(id=1, name='makanan', transaction_type=CategoryType.expense))
+        wallet = Wallet('Dompet', '', 1000.0, WalletType.cash, '#000000')
+        other = Wallet('Lain', '', 1000.0, WalletType.bank, '#ffffff')
+        self.session.add_all([wallet, other])
+        self.session.flush()
+        self.wallet_id = wallet.id
+
+        start = datetime(2025, 1, 1)
+        for i in range(25):
+            # two rows per day so the id tiebreaker is exercised
+            self.session.add(Transaction(
+                tipe_transaksi=TransactionType.expense, jumlah=1.0,
+                category_id=1, wallet_id=wallet.id,
+                tanggal=start + timedelta(days=i // 2),
+            ))
+        self.session.add(Transaction(
+            tipe_transaksi=TransactionType.expense, jumlah=1.0,
+            category_id=1, wallet_id=other.id, tanggal=start,
+        ))
+        self.session.flush()
+
+    def _query(self, **params):
+        from .models import Transaction
+        from .views.transaction_views import transaction_filters
+        return self.session.query(Transaction).filter(*transaction_filters(params))
+
+    def test_cursor_walks_every_row_once(self):
+        from .models.readers import transaction_serializer
+        from .views.transaction_views import paginate_transactions, transaction_filters
+
+        stmt = transaction_serializer.select().where(
+            *transaction_filters({'walletId': str(self.wallet_id)}))
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_transactions(self.session, stmt, cursor, limit=10)
+            seen.extend((t.tanggal, t.id) for t in page)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_date_range_is_inclusive_of_end_day(self):
+        rows = self._query(
+            wallet_id=str(self.wallet_id), startDate='2025-01-02', endDate='2025-01-03').all()
+        self.assertEqual(len(rows), 4)
+
+    def test_invalid_cursor_is_rejected(self):
+        from .views.transaction_views import decode_cursor
+        self.assertRaises(ValueError, decode_cursor, 'not-a-cursor')
+
+
+class LedgerTest(BaseTest):
+    """Two wallets with a few transactions spread over February and March 2025."""
+
+    def setUp(self):
+        super(LedgerTest, self).setUp()
+        self.init_database()
+
+        from datetime import datetime
+        from .models import Category, Wallet, WalletType
+        from .models.category import TransactionType as CategoryType
+        from .models.transaction import Transaction, TransactionType
+
+        self.session.add(Category(id=1, name='makanan', transaction_type=CategoryType.expense))
+        self.session.add(Category(id=12, name='gaji', transaction_type=CategoryType.income))
+        cash = Wallet('Tunai', '', 100.0, WalletType.cash, '#000000')
+        bank = Wallet('Bank', '', 500.0, WalletType.bank, '#ffffff')
+        self.session.add_all([cash, bank])
+        self.session.flush()
+        self.cash_id = cash.id
+
+        rows = [
+            (cash, TransactionType.income, 50.0, 12, datetime(2025, 3, 5)),
+            (cash, TransactionType.expense, 20.0, 1, datetime(2025, 3, 9)),
+            (cash, TransactionType.expense, 30.0, 1, datetime(2025, 2, 20)),
+            (bank, TransactionType.income, 200.0, 12, datetime(2025, 3, 1)),
+        ]
+        for wallet, tipe, jumlah, category_id, tanggal in rows:
+            self.session.add(Transaction(
+                tipe_transaksi=tipe, jumlah=jumlah, category_id=category_id,
+                wallet_id=wallet.id, tanggal=tanggal,
+            ))
+        self.session.flush()
+
+
+class TestSummary(LedgerTest):
+
+    def test_this_month_totals_and_per_wallet(self):
+        from datetime import date
+        from .views.summary_views import compute_summary, period_range
+
+        start, end = period_range('this-month', today=date(2025, 3, 15))
+        summary = compute_summary(self.session, start, end)
+        self.assertEqual(summary['total_balance'], 600.0)
+        self.assertEqual(summary['total_income'], 250.0)
+        self.assertEqual(summary['total_expense'], 20.0)
+        self.assertEqual(summary['net_flow'], 230.0)
+        self.assertEqual([w['transaction_count'] for w in summary['wallets']], [2, 1])
+
+    def test_last_month_for_one_wallet(self):
+        from datetime import date
+        from .views.summary_views import compute_summary, period_range
+
+        start, end = period_range('last-month', today=date(2025, 3, 15))
+        summary = compute_summary(self.session, start, end, wallet_id=self.cash_id)
+        self.assertEqual(len(summary['wallets']), 1)
+        self.assertEqual(summary['total_expense'], 30.0)
+        self.assertEqual(summary['total_income'], 0.0)
+
+    def test_unknown_period_is_rejected(self):
+        from .views.summary_views import period_range
+        self.assertRaises(ValueError, period_range, 'next-decade')
+
+
+class TestTransactionRollup(LedgerTest):
+
+    def _rollups(self):
+        from .models import TransactionRollup
+        rows = self.session.query(TransactionRollup).order_by(
+            TransactionRollup.wallet_id, TransactionRollup.month,
+            TransactionRollup.category_id).all()
+        return [(r.wallet_id, r.month.isoformat(), r.category_id, r.total, r.count) for r in rows]
+
+    def test_rebuild_matches_incremental_deltas(self):
+        from datetime import datetime
+        from .models import TransactionRollup, apply_rollup_delta, rebuild_rollups
+        from .models.transaction import TransactionType
+
+        rebuild_rollups(self.session, [self.cash_id])
+        rebuilt = self._rollups()
+
+        self.session.query(TransactionRollup).delete()
+        for tanggal, category_id, tipe, jumlah in [
+                (datetime(2025, 3, 5), 12, TransactionType.income, 50.0),
+                (datetime(2025, 3, 9), 1, TransactionType.expense, 20.0),
+                (datetime(2025, 2, 20), 1, TransactionType.expense, 30.0)]:
+            apply_rollup_delta(self.session, self.cash_id, tanggal, category_id, tipe, jumlah, 1)
+        self.assertEqual(self._rollups(), rebuilt)
+        self.assertEqual(len(rebuilt), 3)
+
+    def test_negative_delta_removes_transaction(self):
+        from datetime import datetime
+        from .models import apply_rollup_delta, rebuild_rollups
+        from .models.transaction import TransactionType
+
+        rebuild_rollups(self.session, [self.cash_id])
+        apply_rollup_delta(self.session, self.cash_id, datetime(2025, 3, 9), 1,
+                           TransactionType.expense, -20.0, -1)
+        self.assertIn((self.cash_id, '2025-03-01', 1, 0.0, 0), self._rollups())
+
+    def test_monthly_report_reads_rollups(self):
+        from .models import Wallet, rebuild_rollups
+        from .views.summary_views import monthly_report
+
+        rebuild_rollups(self.session, [w.id for w in self.session.query(Wallet)])
+        report = monthly_report(self.session, 2025)
+        self.assertEqual(report['months'][2]['income'], 250.0)
+        self.assertEqual(report['months'][1]['expense'], 30.0)
+        self.assertEqual(report['total_expense'], 50.0)
+
+    def test_monthly_report_rejects_out_of_range_year(self):
+        from .views.summary_views import get_monthly_report
+
+        for year in ('0', '9999', '99999'):
+            request = dummy_request(self.session)
+            request.params['year'] = year
+            self.assertEqual(get_monthly_report(request)['status'], 'error')
+            self.assertEqual(request.response.status_int, 400)
+
+
+class FunctionalTest(unittest.TestCase):
+    """Drive the real WSGI app (pyramid_tm, request.dbsession) over SQLite."""
+
+    settings = {}
+
+    def setUp(self):
+        import os
+        import tempfile
+        from webtest import TestApp
+        from . import main
+        from .models.base import Base as AppBase
+        from .models import Category
+        from .models.category import TransactionType as CategoryType
+
+        fd, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        settings = {'sqlalchemy.url': 'sqlite:///' + self.db_path}
+        settings.update(self.settings)
+        app = main({}, **settings)
+        self.app = app
+        self.session_factory = app.registry['dbsession_factory']
+        self.engine = self.session_factory.kw['bind']
+        AppBase.metadata.create_all(self.engine)
+        with self.session_factory() as session:
+            session.add(Category(id=1, name='makanan', transaction_type=CategoryType.expense))
+            session.add(Category(id=12, name='gaji', transaction_type=CategoryType.income))
+            session.commit()
+        self.testapp = TestApp(app)
+
+    def tearDown(self):
+        import os
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def create_wallet(self, saldo_awal=100.0):
+        res = self.testapp.post_json('/api/wallets', {
+            'nama_dompet': 'Dompet', 'tipe_dompet': 'cash', 'saldo_awal': saldo_awal})
+        return res.json['data']['id']
+
+    def create_transaction(self, wallet_id, **fields):
+        payload = {'tipe_transaksi': 'expense', 'jumlah': 10, 'category_id': 1,
+                   'wallet_id': wallet_id, 'tanggal': '2025-03-01T10:00:00'}
+        payload.update(fields)
+        return self.testapp.post_json('/api/transactions', payload, expect_errors=True)
+
+    def balance(self, wallet_id):
+        res = self.testapp.get('/api/wallets/%d/balance' % wallet_id)
+        return res.json['data']['saldo_saat_ini']
+
+
+class TestRequestScopedSession(FunctionalTest):
+
+    def test_create_commits_with_the_request(self):
+        wallet_id = self.create_wallet()
+        res = self.create_transaction(wallet_id, jumlah=30)
+        self.assertEqual(res.status_int, 201)
+        self.assertEqual(self.balance(wallet_id), 70.0)
+        listing = self.testapp.get('/api/transactions?walletId=%d' % wallet_id)
+        self.assertEqual(listing.json['count'], 1)
+
+    def test_rejected_update_leaves_no_partial_changes(self):
+        wallet_id = self.create_wallet()
+        transaction_id = self.create_transaction(wallet_id, jumlah=30).json['data']['id']
+        res = self.testapp.put_json(
+            '/api/transactions/%d' % transaction_id, {'category_id': 99}, expect_errors=True)
+        self.assertEqual(res.status_int, 400)
+        self.assertEqual(self.balance(wallet_id), 70.0)
+
+    def test_non_numeric_id_is_not_found(self):
+        res = self.testapp.get('/api/wallets/abc', expect_errors=True)
+        self.assertEqual(res.status_int, 404)
+
+
+class TestPoolStats(FunctionalTest):
+
+    def stats(self):
+        res = self.testapp.get('/api/internal/pool', extra_environ={'REMOTE_ADDR': '127.0.0.1'})
+        return res.json['data']
+
+    def test_checkout_wait_is_measured(self):
+        self.create_wallet()
+        data = self.stats()
+        self.assertGreater(data['checkout_wait_total_seconds'], 0)
+        self.assertLessEqual(data['checkout_wait_max_seconds'], data['checkout_wait_total_seconds'])
+
+    def test_checkout_timeout_is_counted(self):
+        from .models import get_engine
+        engine = get_engine({'sqlalchemy.url': 'sqlite:///' + self.db_path,
+                             'sqlalchemy.pool_size': '1', 'sqlalchemy.max_overflow': '0',
+                             'sqlalchemy.pool_timeout': '1'})
+        self.session_factory.configure(bind=engine)
+        try:
+            with engine.connect():
+                res = self.testapp.get('/api/wallets', expect_errors=True)
+            self.assertEqual(res.status_int, 500)
+            self.assertEqual(self.stats()['checkout_timeouts'], 1)
+        finally:
+            self.session_factory.configure(bind=self.engine)
+            engine.dispose()
+
+    def test_endpoint_counts_checkouts(self):
+        self.create_wallet()
+        res = self.testapp.get('/api/internal/pool', extra_environ={'REMOTE_ADDR': '127.0.0.1'})
+        data = res.json['data']
+        self.assertGreaterEqual(data['checkouts'], 2)
+        self.assertEqual(data['checked_out'], 0)
+        self.assertEqual(data['max_overflow'], 10)
+        self.assertEqual(data['overflow_in_use'], 0)
+
+    def test_endpoint_rejects_remote_clients(self):
+        res = self.testapp.get(
+            '/api/internal/pool', extra_environ={'REMOTE_ADDR': '10.1.2.3'}, expect_errors=True)
+        self.assertEqual(res.status_int, 403)
+
+    def test_pool_settings_are_honoured(self):
+        from .models import get_engine
+        engine = get_engine({
+            'sqlalchemy.url': 'sqlite:///' + self.db_path,
+            'sqlalchemy.pool_size': '3',
+            'sqlalchemy.max_overflow': '2',
+            'sqlalchemy.pool_timeout': '7',
+            'sqlalchemy.pool_pre_ping': 'false',
+        })
+        self.assertEqual(engine.pool.size(), 3)
+        self.assertEqual(engine.pool._max_overflow, 2)
+        self.assertEqual(engine.pool.timeout(), 7)
+        self.assertFalse(engine.pool._pre_ping)
+        engine.dispose()
+
+
+class TestAtomicBalance(FunctionalTest):
+
+    settings = {'retry.attempts': '3'}
+
+    def test_overdraft_is_rejected_by_the_update(self):
+        wallet_id = self.create_wallet(30.0)
+        res = self.create_transaction(wallet_id, jumlah=31)
+        self.assertEqual(res.status_int, 400)
+        self.assertIn('Current balance: 30.0', res.json['message'])
+        self.assertEqual(self.balance(wallet_id), 30.0)
+
+    def test_update_applies_net_change(self):
+        wallet_id = self.create_wallet(100.0)
+        transaction_id = self.create_transaction(wallet_id, jumlah=40).json['data']['id']
+        res = self.testapp.put_json('/api/transactions/%d' % transaction_id,
+                                    {'jumlah': 100}, expect_errors=True)
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(res.json['data']['wallet_balance'], 0.0)
+        res = self.testapp.put_json('/api/transactions/%d' % transaction_id,
+                                    {'jumlah': 101}, expect_errors=True)
+        self.assertEqual(res.status_int, 400)
+        self.assertEqual(self.balance(wallet_id), 0.0)
+
+    def test_serialization_failure_is_retried(self):
+        from sqlalchemy import select
+        from sqlalchemy.exc import OperationalError
+        from unittest import mock
+        from .views import transaction_views
+
+        class SerializationFailure(Exception):
+            # Seperti galat driver PostgreSQL, tanpa bergantung pada driver itu
+            pgcode = '40001'
+
+        real_adjust = transaction_views.adjust_wallet_balance
+        calls = []
+
+        def conflicting_adjust(session, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                session.execute(select(1))  # join the request transaction first
+                raise OperationalError('UPDATE wallets', {}, SerializationFailure())
+            return real_adjust(session, *args, **kwargs)
+
+        wallet_id = self.create_wallet(100.0)
+        with mock.patch.object(transaction_views, 'adjust_wallet_balance', conflicting_adjust):
+            res = self.create_transaction(wallet_id, jumlah=25)
+        self.assertEqual(res.status_int, 201)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.balance(wallet_id), 75.0)
+        self.assertEqual(len(self.testapp.get('/api/transactions').json['data']), 1)
+
+    def test_concurrent_posts_keep_balance_consistent(self):
+        import json
+        import threading
+        from webob import Request
+
+        threads, per_thread, saldo_awal = 8, 250, 500.0
+        wallet_id = self.create_wallet(saldo_awal)
+        statuses = []
+
+        def worker(n):
+            for i in range(per_thread):
+                payload = {'tipe_transaksi': 'expense', 'jumlah': 3, 'category_id': 1,
+                           'wallet_id': wallet_id, 'tanggal': '2025-03-01T10:00:00'}
+                if (n + i) % 2:
+                    payload.update(tipe_transaksi='income', jumlah=1, category_id=12)
+                req = Request.blank('/api/transactions', method='POST',
+                                    content_type='application/json',
+                                    body=json.dumps(payload).encode('utf-8'))
+                statuses.append(req.get_response(self.app).status_int)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        self.assertEqual(len(statuses), threads * per_thread)
+        self.assertEqual(set(statuses) - {201, 400}, set())
+
+        with self.session_factory() as session:
+            from sqlalchemy import case, func, select
+            from .models import Wallet
+            from .models.transaction import Transaction, TransactionType
+            signed = case((Transaction.tipe_transaksi == TransactionType.income, Transaction.jumlah),
+                          else_=-Transaction.jumlah)
+            stored, rows = session.execute(
+                select(func.coalesce(func.sum(signed), 0), func.count(Transaction.id))
+                .where(Transaction.wallet_id == wallet_id)).one()
+            balance = session.get(Wallet, wallet_id).saldo_saat_ini
+        self.assertEqual(rows, statuses.count(201))
+        self.assertEqual(balance, saldo_awal + stored)
+        self.assertGreaterEqual(balance, 0)
+
+
+class TestBalanceSnapshots(FunctionalTest):
+
+    settings = {'backendlagi.balance_snapshot_every': '3'}
+
+    def balance_at(self, wallet_id, at):
+        res = self.testapp.get('/api/wallets/%d/balance' % wallet_id, {'at': at})
+        return res.json['data']
+
+    def snapshots(self, wallet_id):
+        from .models import BalanceSnapshot
+        with self.session_factory() as session:
+            return [
+                (s.as_of.isoformat(), s.balance) for s in
+                session.query(BalanceSnapshot).filter_by(wallet_id=wallet_id).order_by(BalanceSnapshot.as_of)
+            ]
+
+    def rebuilt_snapshots(self, wallet_id):
+        from .models import rebuild_snapshots
+        with self.session_factory() as session:
+            rebuild_snapshots(session, [wallet_id], every=3)
+            session.commit()
+        return self.snapshots(wallet_id)
+
+    def test_snapshots_are_cut_monthly_and_every_n_rows(self):
+        wallet_id = self.create_wallet(1000.0)
+        for day in (1, 2, 3, 4, 5):
+            self.create_transaction(wallet_id, jumlah=10, tanggal='2025-01-%02dT10:00:00' % day)
+        self.create_transaction(wallet_id, jumlah=100, category_id=12, tipe_transaksi='income',
+                                tanggal='2025-02-10T10:00:00')
+        self.assertEqual(self.snapshots(wallet_id), [
+            ('2025-01-04T10:00:00', 970.0),
+            ('2025-02-01T00:00:00', 950.0),
+        ])
+
+    def test_balance_at_combines_snapshot_and_later_rows(self):
+        wallet_id = self.create_wallet(1000.0)
+        for day in (1, 2, 3, 4, 5):
+            self.create_transaction(wallet_id, jumlah=10, tanggal='2025-01-%02dT10:00:00' % day)
+        self.create_transaction(wallet_id, jumlah=100, category_id=12, tipe_transaksi='income',
+                                tanggal='2025-02-10T10:00:00')
+
+        data = self.balance_at(wallet_id, '2025-01-04')
+        self.assertEqual(data['saldo'], 960.0)
+        self.assertEqual(data['snapshot_as_of'], '2025-01-04T10:00:00')
+        self.assertEqual(self.balance_at(wallet_id, '2025-01-04T09:00:00')['saldo'], 970.0)
+        self.assertEqual(self.balance_at(wallet_id, '2024-12-31')['saldo'], 1000.0)
+        self.assertIsNone(self.balance_at(wallet_id, '2024-12-31')['snapshot_as_of'])
+        self.assertEqual(self.balance_at(wallet_id, '2025-02-10')['saldo'], 1050.0)
+        self.assertEqual(self.balance_at(wallet_id, '2030-01-01')['saldo'], self.balance(wallet_id))
+
+    def test_back_dated_changes_keep_snapshots_exact(self):
+        wallet_id = self.create_wallet(1000.0)
+        ids = [
+            self.create_transaction(wallet_id, jumlah=10, tanggal='2025-%02d-05T10:00:00' % month).json['data']['id']
+            for month in (1, 2, 3, 4)
+        ]
+        self.create_transaction(wallet_id, jumlah=7, tanggal='2025-01-20T10:00:00')
+        self.testapp.put_json('/api/transactions/%d' % ids[1], {'jumlah': 25, 'tanggal': '2025-03-20T10:00:00'})
+        self.testapp.delete('/api/transactions/%d' % ids[2])
+        self.testapp.post_json('/api/transactions/bulk', [
+            {'tipe_transaksi': 'income', 'jumlah': 50, 'category_id': 12,
+             'wallet_id': wallet_id, 'tanggal': '2024-12-15T10:00:00'},
+        ], status=201)
+
+        current = self.snapshots(wallet_id)
+        self.assertEqual(current, self.rebuilt_snapshots(wallet_id))
+        self.assertEqual(current[-1], ('2025-04-01T00:00:00', 1008.0))
+        self.assertEqual(self.balance_at(wallet_id, '2025-03-31')['saldo'], 1008.0)
+
+    def test_invalid_at_is_rejected(self):
+        wallet_id = self.create_wallet(10.0)
+        res = self.testapp.get('/api/wallets/%d/balance' % wallet_id, {'at': 'kemarin'}, status=400)
+        self.assertEqual(res.json['status'], 'error')
+        self.testapp.get('/api/wallets/999/balance', {'at': '2025-01-01'}, status=404)
+
+
+class TestBalanceHistory(FunctionalTest):
+
+    def setUp(self):
+        super(TestBalanceHistory, self).setUp()
+        self.wallet_id = self.create_wallet(1000.0)
+        # 2025-03-03 adalah hari Senin
+        for tanggal, tipe, jumlah in [
+            ('2025-02-27T08:00:00', 'expense', 100),
+            ('2025-03-03T08:00:00', 'income', 50),
+            ('2025-03-03T19:00:00', 'expense', 20),
+            ('2025-03-09T23:00:00', 'expense', 30),
+            ('2025-03-10T08:00:00', 'income', 200),
+        ]:
+            category_id = 12 if tipe == 'income' else 1
+            self.create_transaction(self.wallet_id, tipe_transaksi=tipe, jumlah=jumlah,
+                                    category_id=category_id, tanggal=tanggal)
+
+    def history(self, **params):
+        return self.testapp.get('/api/wallets/%d/balance-history' % self.wallet_id, params).json['data']
+
+    def test_daily_running_balance(self):
+        data = self.history(bucket='day')
+        self.assertEqual(data['saldo_awal_periode'], 1000.0)
+        self.assertEqual(
+            [(p['bucket'], p['income'], p['expense'], p['count'], p['saldo']) for p in data['points']],
+            [('2025-02-27', 0.0, 100.0, 1, 900.0),
+             ('2025-03-03', 50.0, 20.0, 2, 930.0),
+             ('2025-03-09', 0.0, 30.0, 1, 900.0),
+             ('2025-03-10', 200.0, 0.0, 1, 1100.0)],
+        )
+
+    def test_week_and_month_buckets(self):
+        weeks = self.history(bucket='week')['points']
+        self.assertEqual([(p['bucket'], p['saldo']) for p in weeks],
+                         [('2025-02-24', 900.0), ('2025-03-03', 900.0), ('2025-03-10', 1100.0)])
+        months = self.history(bucket='month')['points']
+        self.assertEqual([(p['bucket'], p['saldo']) for p in months],
+                         [('2025-02-01', 900.0), ('2025-03-01', 1100.0)])
+
+    def test_range_starts_from_opening_balance(self):
+        data = self.history(**{'from': '2025-03-03', 'to': '2025-03-09'})
+        self.assertEqual(data['saldo_awal_periode'], 900.0)
+        self.assertEqual([(p['bucket'], p['saldo']) for p in data['points']],
+                         [('2025-03-03', 930.0), ('2025-03-09', 900.0)])
+
+    def test_downsampling_keeps_closing_balance(self):
+        data = self.history(points='2')
+        self.assertEqual(data['buckets'], 4)
+        self.assertEqual(
+            [(p['bucket'], p['income'], p['expense'], p['count'], p['saldo']) for p in data['points']],
+            [('2025-02-27', 50.0, 120.0, 3, 930.0), ('2025-03-09', 200.0, 30.0, 2, 1100.0)],
+        )
+
+    def test_invalid_params(self):
+        url = '/api/wallets/%d/balance-history' % self.wallet_id
+        self.testapp.get(url, {'bucket': 'hour'}, status=400)
+        self.testapp.get(url, {'from': 'besok'}, status=400)
+        self.testapp.get(url, {'points': '0'}, status=400)
+        self.testapp.get('/api/wallets/999/balance-history', status=404)
+
+
+class TestTextSearch(FunctionalTest):
+
+    def setUp(self):
+        super(TestTextSearch, self).setUp()
+        self.cash = self.create_wallet(1000.0)
+        self.bank = self.create_wallet(1000.0)
+        self.ids = {}
+        for key, wallet_id, tipe, deskripsi, catatan in [
+            ('kopi', self.cash, 'expense', 'Kopi kopi kopi', ''),
+            ('kopi_susu', self.cash, 'expense', 'Kopi susu gula aren ukuran besar sekali', ''),
+            ('makan', self.cash, 'expense', 'Makanan kucing', 'beli di toko'),
+            ('bank_kopi', self.bank, 'expense', 'Biji kopi', ''),
+            ('gaji', self.cash, 'income', 'Gaji', 'bonus kopi'),
+        ]:
+            category_id = 12 if tipe == 'income' else 1
+            res = self.create_transaction(wallet_id, tipe_transaksi=tipe, category_id=category_id,
+                                          deskripsi=deskripsi, catatan=catatan)
+            self.ids[key] = res.json['data']['id']
+
+    def search(self, **params):
+        return [row['id'] for row in self.testapp.get('/api/transactions', params).json['data']]
+
+    def test_prefix_match_in_description_and_notes(self):
+        self.assertEqual(self.search(q='makan'), [self.ids['makan']])
+        self.assertEqual(self.search(q='toko'), [self.ids['makan']])
+        self.assertEqual(self.search(q='kucing TOKO'), [self.ids['makan']])
+        self.assertEqual(self.search(q='gaji kopi'), [self.ids['gaji']])
+
+    def test_results_are_ranked_and_filtered(self):
+        self.assertEqual(self.search(q='kopi', wallet_id=self.cash, type='expense'),
+                         [self.ids['kopi'], self.ids['kopi_susu']])
+        self.assertEqual(set(self.search(q='kopi')), {
+            self.ids['kopi'], self.ids['kopi_susu'], self.ids['bank_kopi'], self.ids['gaji']})
+
+    def test_search_index_follows_writes(self):
+        self.testapp.put_json('/api/transactions/%d' % self.ids['makan'], {'deskripsi': 'Pulsa'})
+        self.assertEqual(self.search(q='makanan'), [])
+        self.assertEqual(self.search(q='pulsa'), [self.ids['makan']])
+        self.testapp.delete('/api/transactions/%d' % self.ids['makan'])
+        self.assertEqual(self.search(q='pulsa'), [])
+        self.testapp.post_json('/api/transactions/bulk', [
+            {'tipe_transaksi': 'expense', 'jumlah': 5, 'category_id': 1, 'wallet_id': self.bank,
+             'tanggal': '2025-03-02T10:00:00', 'deskripsi': 'Parkir'},
+        ], status=201)
+        self.assertEqual(len(self.search(q='parkir')), 1)
+
+    def test_cursor_walks_ranked_results(self):
+        seen = []
+        params = {'q': 'kopi', 'limit': '1'}
+        while True:
+            res = self.testapp.get('/api/transactions', params).json
+            seen.extend(row['id'] for row in res['data'])
+            if not res['next_cursor']:
+                break
+            params['cursor'] = res['next_cursor']
+        self.assertEqual(seen, self.search(q='kopi'))
+        self.assertEqual(len(seen), 4)
+        # a plain listing cursor is not a search cursor
+        plain = self.testapp.get('/api/transactions', {'limit': '1'}).json['next_cursor']
+        self.testapp.get('/api/transactions', {'q': 'kopi', 'cursor': plain}, status=400)
+
+    def test_blank_query_lists_everything(self):
+        self.assertEqual(len(self.search(q=' ?! ')), 5)
+
+    def test_other_databases_fall_back_to_substring_match(self):
+        from unittest import mock
+        from .models.search import apply_search
+        from .views import transaction_views
+
+        def other_dialect(dialect_name, stmt, terms):
+            return apply_search('mssql', stmt, terms)
+
+        with mock.patch.object(transaction_views, 'apply_search', other_dialect):
+            self.assertEqual(self.search(q='kucing TOKO'), [self.ids['makan']])
+            seen, params = [], {'q': 'kopi', 'limit': '1'}
+            while True:
+                res = self.testapp.get('/api/transactions', params).json
+                seen.extend(row['id'] for row in res['data'])
+                if not res['next_cursor']:
+                    break
+                params['cursor'] = res['next_cursor']
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(set(seen), {
+            self.ids['kopi'], self.ids['kopi_susu'], self.ids['bank_kopi'], self.ids['gaji']})
+
+
+class TestConditionalGet(FunctionalTest):
+
+    def revalidate(self, url, etag, **params):
+        return self.testapp.get(url, params, headers={'If-None-Match': etag}, status='*')
+
+    def test_wallet_list_revalidates_until_a_write(self):
+        wallet_id = self.create_wallet(100.0)
+        res = self.testapp.get('/api/wallets')
+        etag = res.headers['ETag']
+        self.assertEqual(res.headers['Cache-Control'], 'private, no-cache')
+
+        cached = self.revalidate('/api/wallets', etag)
+        self.assertEqual(cached.status_int, 304)
+        self.assertEqual(cached.body, b'')
+
+        self.create_transaction(wallet_id, jumlah=10)
+        res = self.revalidate('/api/wallets', etag)
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(res.json['data'][0]['saldo_saat_ini'], 90.0)
+        self.assertNotEqual(res.headers['ETag'], etag)
+
+    def test_transaction_edit_changes_validators(self):
+        wallet_id = self.create_wallet(100.0)
+        transaction_id = self.create_transaction(wallet_id, jumlah=10).json['data']['id']
+        url = '/api/transactions/%d' % transaction_id
+        list_etag = self.testapp.get('/api/transactions').headers['ETag']
+        detail_etag = self.testapp.get(url).headers['ETag']
+        self.assertEqual(self.revalidate(url, detail_etag).status_int, 304)
+        self.assertEqual(self.revalidate('/api/transactions', list_etag).status_int, 304)
+
+        self.testapp.put_json(url, {'deskripsi': 'Makan malam'})
+        res = self.revalidate(url, detail_etag)
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(res.json['data']['deskripsi'], 'Makan malam')
+        self.assertEqual(self.revalidate('/api/transactions', list_etag).status_int, 200)
+
+    def test_rejected_write_keeps_validators(self):
+        wallet_id = self.create_wallet(5.0)
+        etag = self.testapp.get('/api/transactions').headers['ETag']
+        self.assertEqual(self.create_transaction(wallet_id, jumlah=10).status_int, 400)
+        self.assertEqual(self.revalidate('/api/transactions', etag).status_int, 304)
+
+    def test_wallet_listing_ignores_other_wallets(self):
+        wallet_id = self.create_wallet(100.0)
+        other_id = self.create_wallet(100.0)
+        self.create_transaction(wallet_id, jumlah=10)
+        params = {'walletId': str(wallet_id)}
+        etag = self.testapp.get('/api/transactions', params).headers['ETag']
+        all_etag = self.testapp.get('/api/transactions').headers['ETag']
+
+        self.create_transaction(other_id, jumlah=10)
+        self.assertEqual(self.revalidate('/api/transactions', etag, **params).status_int, 304)
+        self.assertEqual(self.revalidate('/api/transactions', all_etag).status_int, 200)
+        self.create_transaction(wallet_id, jumlah=10)
+        self.assertEqual(self.revalidate('/api/transactions', etag, **params).status_int, 200)
+
+    def test_counters_without_upsert(self):
+        from unittest import mock
+        from .models.versions import TRANSACTIONS, get_versions
+        wallet_id = self.create_wallet(100.0)
+        etag = self.testapp.get('/api/transactions').headers['ETag']
+        with mock.patch.object(self.engine.dialect, 'name', 'mssql'):
+            self.assertEqual(self.create_transaction(wallet_id, jumlah=10).status_int, 201)
+            self.assertEqual(self.create_transaction(wallet_id, jumlah=10).status_int, 201)
+        with self.session_factory() as session:
+            self.assertEqual(get_versions(session, TRANSACTIONS)[TRANSACTIONS][0], 2)
+            self.assertEqual(get_versions(session, TRANSACTIONS, wallet_id=wallet_id)[TRANSACTIONS][0], 2)
+        self.assertEqual(self.revalidate('/api/transactions', etag).status_int, 200)
+
+    def test_wallet_balance_uses_updated_at(self):
+        wallet_id = self.create_wallet(100.0)
+        url = '/api/wallets/%d/balance' % wallet_id
+        res = self.testapp.get(url)
+        last_modified = res.headers['Last-Modified']
+        self.assertEqual(self.testapp.get(url, headers={'If-Modified-Since': last_modified},
+                                          status='*').status_int, 304)
+        self.assertEqual(self.revalidate(url, res.headers['ETag'], at='2025-03-01').status_int, 304)
+        self.create_transaction(wallet_id, jumlah=10, tanggal='2025-03-01T10:00:00')
+        res = self.revalidate(url, res.headers['ETag'], at='2025-03-01')
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(res.json['data']['saldo'], 90.0)
+
+
+
+class TestEncodedPayloads(FunctionalTest):
+
+    def test_static_lists_are_immutable_bytes(self):
+        first = self.testapp.get('/api/categories', {'type': 'expense'})
+        self.assertEqual(first.headers['Cache-Control'], 'public, max-age=86400, immutable')
+        self.assertEqual(first.content_type, 'application/json')
+        self.assertIn({'value': 1, 'label': 'Makanan & Minuman'}, first.json['data'])
+        self.assertEqual(self.testapp.get('/api/categories', {'type': 'expense'}).body, first.body)
+        cached = self.testapp.get('/api/categories', {'type': 'expense'},
+                                  headers={'If-None-Match': first.headers['ETag']}, status=304)
+        self.assertEqual(cached.body, b'')
+
+        every = self.testapp.get('/api/categories')
+        self.assertNotEqual(every.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(every.json['data']['income'][0]['type'], 'income')
+        self.assertEqual(self.testapp.get('/api/categories', {'type': 'other'}).body, every.body)
+        self.assertEqual(self.testapp.get('/api/wallet-types').json['data'][0]['value'], 'cash')
+
+    def test_category_table_payload_rebuilds_after_commit(self):
+        from .models import Category
+        from .models.category import TransactionType as CategoryType
+        from .views.category_view import CategoryPayloads
+
+        payloads = CategoryPayloads()
+        with self.session_factory() as session:
+            before = payloads.get(session, 'expense')
+            self.assertIs(payloads.get(session, 'expense'), before)
+
+            session.add(Category(id=2, name='transportasi', transaction_type=CategoryType.expense))
+            session.flush()
+            session.rollback()
+            self.assertIs(payloads.get(session, 'expense'), before)
+
+            session.add(Category(id=2, name='transportasi', transaction_type=CategoryType.expense))
+            session.commit()
+            after = payloads.get(session, 'expense')
+
+        self.assertNotEqual(after.etag, before.etag)
+        self.assertIn(b'transportasi', after.body)
+
+    def test_category_rows_from_other_writers_are_served(self):
+        from sqlalchemy import insert
+        from .models import Category
+        from .models.category import TransactionType as CategoryType
+        from .views.category_view import CategoryPayloads
+
+        payloads = CategoryPayloads()
+        with self.session_factory() as session:
+            before = payloads.get(session, 'expense')
+            session.rollback()
+        # Seperti ensure_categories di seed_db: insert Core, tanpa event ORM
+        with self.engine.begin() as connection:
+            connection.execute(insert(Category), [
+                {'id': 3, 'name': 'belanja', 'transaction_type': CategoryType.expense}])
+        with self.session_factory() as session:
+            after = payloads.get(session, 'expense')
+            self.assertIs(payloads.get(session, 'expense'), after)
+
+        self.assertNotEqual(after.etag, before.etag)
+        self.assertIn(b'belanja', after.body)
+
+
+class TestWalletCache(unittest.TestCase):
+
+    def setUp(self):
+        from .models.cache import WalletCache
+        self.now = 0.0
+        self.cache = WalletCache(max_entries=2, ttl=10, clock=lambda: self.now)
+
+    def test_ttl_and_lru(self):
+        self.assertEqual(self.cache.get('a', lambda: 1), 1)
+        self.assertEqual(self.cache.get('a', lambda: 2), 1)
+        self.cache.get('b', lambda: 1)
+        self.cache.get('a', lambda: 3)
+        self.cache.get('c', lambda: 1)
+        # "b" was the least recently used
+        self.assertEqual(self.cache.get('b', lambda: 4), 4)
+        self.now = 11.0
+        self.assertEqual(self.cache.get('b', lambda: 5), 5)
+        stats = self.cache.snapshot()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 5))
+        self.assertEqual((stats['evictions'], stats['expirations']), (2, 1))
+
+    def test_load_overlapping_an_invalidation_is_not_stored(self):
+        def stale():
+            self.cache.invalidate('a')
+            return 'old'
+        self.assertEqual(self.cache.get('a', stale), 'old')
+        self.assertEqual(self.cache.get('a', lambda: 'new'), 'new')
+        self.assertIsNone(self.cache.get('b', lambda: None))
+        self.assertEqual(self.cache.snapshot()['size'], 1)
+
+    def test_backend_receives_invalidations(self):
+        from .models.cache import LocalInvalidation, WalletCache
+
+        class Channel(LocalInvalidation):
+            published = []
+
+            def publish(self, keys):
+                self.published.append(keys)
+
+            def subscribe(self, callback):
+                self.remote = callback
+
+        channel = Channel()
+        cache = WalletCache(backend=channel)
+        cache.get(('wallet', 1), lambda: 'x')
+        cache.invalidate(('wallet', 1))
+        cache.get('wallets', lambda: 'y')
+        channel.remote(None)
+        self.assertEqual(channel.published, [[('wallet', 1)]])
+        self.assertEqual(cache.snapshot()['size'], 0)
+
+
+class TestWalletReadCache(FunctionalTest):
+
+    def stats(self):
+        res = self.testapp.get('/api/internal/cache', extra_environ={'REMOTE_ADDR': '127.0.0.1'})
+        return res.json['data']
+
+    def test_reads_are_served_from_cache_until_a_commit(self):
+        wallet_id = self.create_wallet(100.0)
+        self.testapp.get('/api/wallets')
+        self.testapp.get('/api/wallets/%d' % wallet_id)
+        self.assertEqual(self.balance(wallet_id), 100.0)
+        self.assertEqual(self.testapp.get('/api/wallets').json['data'][0]['saldo_saat_ini'], 100.0)
+        self.assertEqual(self.balance(wallet_id), 100.0)
+        stats = self.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 2))
+
+        # Ditolak (4xx): transaksi dibatalkan, cache tetap
+        self.assertEqual(self.create_transaction(wallet_id, jumlah=500).status_int, 400)
+        self.assertEqual(self.stats()['invalidations'], 1)
+        self.create_transaction(wallet_id, jumlah=30)
+        self.assertEqual(self.balance(wallet_id), 70.0)
+        self.assertEqual(self.testapp.get('/api/wallets').json['data'][0]['saldo_saat_ini'], 70.0)
+
+        self.testapp.put_json('/api/wallets/%d' % wallet_id, {'nama_dompet': 'Tabungan'})
+        self.assertEqual(self.testapp.get('/api/wallets/%d' % wallet_id).json['data']['nama_dompet'],
+                         'Tabungan')
+        self.testapp.delete('/api/wallets/%d' % wallet_id)
+        self.testapp.get('/api/wallets/%d' % wallet_id, status=404)
+        self.assertEqual(self.testapp.get('/api/wallets').json['data'], [])
+
+    def test_bulk_import_invalidates_touched_wallets(self):
+        wallet_id = self.create_wallet(100.0)
+        self.assertEqual(self.balance(wallet_id), 100.0)
+        rows = [{'tipe_transaksi': 'income', 'jumlah': 5, 'category_id': 12,
+                 'wallet_id': wallet_id, 'tanggal': '2025-03-01T10:00:00'}]
+        self.testapp.post_json('/api/transactions/bulk', rows)
+        self.assertEqual(self.balance(wallet_id), 105.0)
+
+
+class TestMetrics(FunctionalTest):
+
+    settings = {'backendlagi.metrics.query_warning': '5'}
+
+    def metrics(self):
+        res = self.testapp.get('/metrics', extra_environ={'REMOTE_ADDR': '127.0.0.1'})
+        self.assertEqual(res.content_type, 'text/plain')
+        samples = {}
+        for line in res.text.splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_are_recorded_per_route(self):
+        wallet_id = self.create_wallet()
+        self.testapp.get('/api/wallets')
+        self.testapp.get('/api/wallets/%d' % wallet_id)
+        self.testapp.get('/api/wallets/999', status=404)
+        self.testapp.get('/nope', status=404)
+        samples = self.metrics()
+
+        self.assertEqual(samples['backendlagi_requests_total{route="wallets",method="POST",status="201"}'], 1)
+        self.assertEqual(samples['backendlagi_requests_total{route="wallet_detail",method="GET",status="404"}'], 1)
+        self.assertEqual(samples['backendlagi_requests_total{route="<unmatched>",method="GET",status="404"}'], 1)
+        self.assertEqual(
+            samples['backendlagi_request_duration_seconds_count{route="wallet_detail",method="GET"}'], 2)
+        self.assertGreater(samples['backendlagi_request_sql_statements_sum{route="wallets",method="GET"}'], 0)
+        self.assertGreater(samples['backendlagi_request_db_seconds_sum{route="wallets",method="POST"}'], 0)
+        self.assertGreater(samples['backendlagi_response_size_bytes_sum{route="wallets",method="GET"}'], 0)
+        self.assertEqual(
+            samples['backendlagi_request_sql_statements_bucket{route="wallets",method="GET",le="+Inf"}'], 1)
+
+    def test_streamed_export_is_measured_on_close(self):
+        wallet_id = self.create_wallet()
+        self.create_transaction(wallet_id)
+        body = self.testapp.get('/api/transactions/export?format=csv').body
+        samples = self.metrics()
+        key = '{route="transactions_export",method="GET"}'
+        self.assertEqual(samples['backendlagi_response_size_bytes_sum' + key], len(body))
+        self.assertGreaterEqual(samples['backendlagi_request_sql_statements_sum' + key], 1)
+
+    def test_statement_heavy_request_logs_a_warning(self):
+        wallet_id = self.create_wallet()
+        with self.assertLogs('backendlagi.metrics', 'WARNING') as logs:
+            self.create_transaction(wallet_id)
+        self.assertIn('POST transactions ran', logs.output[0])
+        self.assertEqual(
+            self.metrics()['backendlagi_sql_statement_warnings_total{route="transactions",method="POST"}'], 1)
+
+    def test_metrics_are_internal(self):
+        self.testapp.get('/metrics', extra_environ={'REMOTE_ADDR': '10.1.2.3'}, status=403)
+
+
+class TestExpand(FunctionalTest):
+
+    def count_statements(self, url):
+        from sqlalchemy import event
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', record)
+        try:
+            res = self.testapp.get(url)
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', record)
+        return res, len(statements)
+
+    def test_listing_costs_one_query_per_relation(self):
+        wallets = [self.create_wallet(1000.0), self.create_wallet(1000.0)]
+        self.create_transaction(wallets[0])
+        self.create_transaction(wallets[1], tipe_transaksi='income', category_id=12, jumlah=5)
+        _, plain = self.count_statements('/api/transactions')
+        res, small = self.count_statements('/api/transactions?expand=category,wallet')
+        self.assertEqual(small, plain + 3)
+
+        data = res.json['data']
+        self.assertEqual(data[0]['category'], {'id': 12, 'name': 'gaji', 'transaction_type': 'income'})
+        self.assertEqual(data[1]['wallet'], {'id': wallets[0], 'nama_dompet': 'Dompet',
+                                             'tipe_dompet': 'cash', 'warna': '#000000'})
+        self.assertEqual(data[1]['category_id'], 1)
+
+        for day in range(1, 21):
+            self.create_transaction(wallets[day % 2], tanggal='2025-04-%02dT10:00:00' % day)
+        res, large = self.count_statements('/api/transactions?expand=wallet,category,wallet')
+        self.assertEqual(res.json['count'], 22)
+        self.assertEqual(large, small)
+        self.assertTrue(all(row['wallet'] and row['category'] for row in res.json['data']))
+
+    def test_detail_joins_relations(self):
+        wallet_id = self.create_wallet()
+        transaction_id = self.create_transaction(wallet_id).json['data']['id']
+        url = '/api/transactions/%d' % transaction_id
+        _, plain = self.count_statements(url)
+        res, expanded = self.count_statements(url + '?expand=category')
+        self.assertEqual(expanded, plain)
+        self.assertEqual(res.json['data']['category']['name'], 'makanan')
+        self.assertNotIn('wallet', res.json['data'])
+
+    def test_wallet_changes_move_expanded_etags(self):
+        wallet_id = self.create_wallet()
+        self.create_transaction(wallet_id)
+        plain = self.testapp.get('/api/transactions').headers['ETag']
+        expanded = self.testapp.get('/api/transactions?expand=wallet').headers['ETag']
+        self.testapp.put_json('/api/wallets/%d' % wallet_id, {'nama_dompet': 'Tabungan'})
+        self.assertEqual(self.testapp.get('/api/transactions').headers['ETag'], plain)
+        res = self.testapp.get('/api/transactions?expand=wallet', headers={'If-None-Match': expanded})
+        self.assertEqual(res.json['data'][0]['wallet']['nama_dompet'], 'Tabungan')
+
+    def test_unknown_relation_is_rejected(self):
+        self.testapp.get('/api/transactions?expand=owner', status=400)
+        self.testapp.get('/api/transactions/1?expand=owner', status=400)
+
+class TestBulkImport(FunctionalTest):
+
+    def setUp(self):
+        super(TestBulkImport, self).setUp()
+        self.wallet_id = self.create_wallet(saldo_awal=100.0)
+
+    def row(self, **fields):
+        data = {'tipe_transaksi': 'expense', 'jumlah': 10, 'category_id': 1,
+                'wallet_id': self.wallet_id, 'tanggal': '2025-03-01T10:00:00'}
+        data.update(fields)
+        return data
+
+    def count(self):
+        res = self.testapp.get('/api/transactions?walletId=%d' % self.wallet_id)
+        return res.json['count']
+
+    def test_json_array_updates_balance_once(self):
+        rows = [self.row(), self.row(tipe_transaksi='income', category_id=12, jumlah=50), self.row()]
+        res = self.testapp.post_json('/api/transactions/bulk', rows)
+        self.assertEqual(res.status_int, 201)
+        self.assertEqual(res.json['data']['inserted'], 3)
+        self.assertEqual(self.balance(self.wallet_id), 130.0)
+        self.assertEqual(self.count(), 3)
+
+    def test_atomic_mode_rejects_everything_on_one_bad_row(self):
+        rows = [self.row(), self.row(category_id=99), self.row(jumlah=1000)]
+        res = self.testapp.post_json('/api/transactions/bulk', rows, expect_errors=True)
+        self.assertEqual(res.status_int, 422)
+        self.assertEqual([e['row'] for e in res.json['data']['errors']], [2, 3])
+        self.assertEqual(self.balance(self.wallet_id), 100.0)
+        self.assertEqual(self.count(), 0)
+
+    def test_best_effort_ndjson_keeps_valid_rows(self):
+        import json
+        body = '\n'.join([json.dumps(self.row()), '{oops', json.dumps(self.row(jumlah=20))])
+        res = self.testapp.post(
+            '/api/transactions/bulk?mode=best_effort', body,
+            content_type='application/x-ndjson')
+        self.assertEqual(res.json['data']['inserted'], 2)
+        self.assertEqual(res.json['data']['errors'], [{'row': 2, 'message': 'Invalid JSON data'}])
+        self.assertEqual(self.balance(self.wallet_id), 70.0)
+
+    def test_csv_rows_and_rollups(self):
+        from .models import TransactionRollup
+        body = ('tipe_transaksi,jumlah,category_id,wallet_id,tanggal,deskripsi\n'
+                'expense,15,1,%d,2025-03-02T08:00:00,makan\n'
+                'expense,5,1,%d,2025-03-09T08:00:00,\n') % (self.wallet_id, self.wallet_id)
+        res = self.testapp.post('/api/transactions/bulk', body, content_type='text/csv')
+        self.assertEqual(res.json['data']['inserted'], 2)
+        with self.session_factory() as session:
+            rollup = session.query(TransactionRollup).one()
+            self.assertEqual((rollup.total, rollup.count), (20.0, 2))
+
+
+class TestExport(FunctionalTest):
+
+    def setUp(self):
+        super(TestExport, self).setUp()
+        self.wallet_id = self.create_wallet(saldo_awal=1000.0)
+        rows = [{'tipe_transaksi': 'expense', 'jumlah': i + 1, 'category_id': 1,
+                 'wallet_id': self.wallet_id, 'tanggal': '2025-03-%02dT10:00:00' % (i + 1),
+                 'deskripsi': 'baris, ke-%d' % i} for i in range(5)]
+        self.testapp.post_json('/api/transactions/bulk', rows)
+
+    def test_csv_export_streams_filtered_rows(self):
+        import csv
+        import io
+        res = self.testapp.get(
+            '/api/transactions/export?format=csv&walletId=%d&startDate=2025-03-02&endDate=2025-03-04'
+            % self.wallet_id)
+        self.assertEqual(res.content_type, 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(res.text)))
+        self.assertEqual([r['tanggal'][:10] for r in rows], ['2025-03-04', '2025-03-03', '2025-03-02'])
+        self.assertEqual(rows[0]['deskripsi'], 'baris, ke-3')
+
+    def test_ndjson_export(self):
+        import json
+        res = self.testapp.get('/api/transactions/export?format=ndjson&type=expense')
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[-1]['jumlah'], 1.0)
+
+    def test_body_is_generated_lazily(self):
+        import types
+        from webob import Request
+        res = Request.blank('/api/transactions/export').get_response(self.testapp.app)
+        self.assertIsInstance(res.app_iter, types.GeneratorType)
+
+    def test_invalid_format(self):
+        res = self.testapp.get('/api/transactions/export?format=xml', expect_errors=True)
+        self.assertEqual(res.status_int, 400)
+
+
+class TestCoreReadPath(LedgerTest):
+
+    def test_wallet_rows_match_to_dict(self):
+        from .models import Wallet
+        from .models.readers import wallet_serializer
+
+        expected = [w.to_dict() for w in self.session.query(Wallet).order_by(Wallet.id)]
+        rows = self.session.execute(wallet_serializer.select().order_by(Wallet.id))
+        self.assertEqual(wallet_serializer(rows), expected)
+
+    def test_transaction_rows_match_to_dict(self):
+        from .models.transaction import Transaction
+        from .models.readers import transaction_serializer
+
+        expected = [t.to_dict() for t in self.session.query(Transaction).order_by(Transaction.id)]
+        rows = self.session.execute(transaction_serializer.select().order_by(Transaction.id))
+        self.assertEqual(transaction_serializer(rows), expected)
+
+
+class TestMoney(FunctionalTest):
+
+    def test_to_sen(self):
+        from .models.money import to_sen
+
+        self.assertEqual(to_sen(0.1), 10)
+        self.assertEqual(to_sen(10.05), 1005)
+        self.assertEqual(to_sen('1234.565'), 123457)
+        self.assertEqual(to_sen(7), 700)
+        for bad in (float('nan'), float('inf'), 'abc', True, 1e20):
+            with self.assertRaises(ValueError):
+                to_sen(bad)
+
+    def test_amounts_are_stored_as_sen_and_summed_exactly(self):
+        from sqlalchemy import text
+
+        wallet_id = self.create_wallet(0.3)
+        for _ in range(10):
+            self.assertEqual(self.create_transaction(
+                wallet_id, tipe_transaksi='income', category_id=12, jumlah=0.1).status_int, 201)
+        res = self.create_transaction(wallet_id, jumlah=1.3)
+        self.assertEqual(res.status_int, 201)
+        self.assertEqual(res.json['data']['jumlah'], 1.3)
+        self.assertEqual(self.balance(wallet_id), 0.0)
+
+        with self.engine.connect() as connection:
+            stored = connection.execute(text(
+                'SELECT jumlah, typeof(jumlah) FROM transactions ORDER BY id DESC LIMIT 1')).one()
+        self.assertEqual(tuple(stored), (130, 'integer'))
+
+        summary = self.testapp.get('/api/summary?period=all-time').json['data']
+        self.assertEqual(summary['total_income'], 1.0)
+        self.assertEqual(summary['total_expense'], 1.3)
+        self.assertEqual(summary['net_flow'], -0.3)
+        report = self.testapp.get('/api/reports/monthly?year=2025').json['data']
+        self.assertEqual(report['months'][2]['income'], 1.0)
+        history = self.testapp.get('/api/wallets/%d/balance-history?bucket=month' % wallet_id).json['data']
+        self.assertEqual(history['points'][-1]['saldo'], 0.0)
+
+    def test_invalid_amount_is_rejected(self):
+        wallet_id = self.create_wallet()
+        for jumlah in ('NaN', 0.001):
+            self.assertEqual(self.create_transaction(wallet_id, jumlah=jumlah).status_int, 400)
+
+
+class TestPartitions(unittest.TestCase):
+
+    def test_month_helpers(self):
+        from datetime import datetime
+        from .models.partitions import add_months, month_start, partition_name
+
+        self.assertEqual(month_start(datetime(2026, 10, 17, 8, 30)), datetime(2026, 10, 1))
+        self.assertEqual(add_months(datetime(2026, 11, 1), 2), datetime(2027, 1, 1))
+        self.assertEqual(add_months(datetime(2026, 1, 1), -1), datetime(2025, 12, 1))
+        self.assertEqual(partition_name(datetime(2027, 3, 1)), 'transactions_p2027_03')
+
+    def test_postgresql_ddl_is_partitioned(self):
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateTable
+        from .models import Transaction, Wallet
+
+        ddl = str(CreateTable(Transaction.__table__).compile(dialect=postgresql.dialect()))
+        self.assertIn('PRIMARY KEY (id, tanggal)', ddl)
+        self.assertIn('PARTITION BY RANGE (tanggal)', ddl)
+        ddl = str(CreateTable(Wallet.__table__).compile(dialect=postgresql.dialect()))
+        self.assertIn('PRIMARY KEY (id)', ddl)
+        self.assertNotIn('PARTITION BY', ddl)
+
+    def test_sqlite_is_a_no_op(self):
+        from sqlalchemy import create_engine
+        from .models import ensure_partitions
+
+        engine = create_engine('sqlite://')
+        with engine.connect() as connection:
+            self.assertEqual(ensure_partitions(connection), [])
+
+    def test_cursor_page_bounds_the_partition_key(self):
+        from datetime import datetime
+        from sqlalchemy import select
+        from .models import Transaction
+        from .views.transaction_views import encode_cursor, page_statement
+
+        cursor = encode_cursor(Transaction(id=9, tanggal=datetime(2025, 3, 4)))
+        sql = str(page_statement(select(Transaction.id, Transaction.tanggal), cursor, 10))
+        # Perbandingan kolom biasa, yang dipakai PostgreSQL untuk memangkas partisi
+        self.assertIn('transactions.tanggal <= :tanggal_1', sql)
+
+
+class TestArchive(FunctionalTest):
+
+    def setUp(self):
+        import tempfile
+        self.archive_dir = tempfile.mkdtemp()
+        self.settings = {'backendlagi.archive.directory': self.archive_dir,
+                         'backendlagi.balance_snapshot_every': '2'}
+        super(TestArchive, self).setUp()
+        self.wallet_id = self.create_wallet(1000.0)
+        for tanggal, tipe, jumlah in [
+            ('2025-01-05T08:00:00', 'income', 300),
+            ('2025-01-20T09:00:00', 'expense', 45.5),
+            ('2025-01-20T09:00:00', 'expense', 12),
+            ('2025-02-02T10:00:00', 'expense', 80),
+            ('2025-02-27T23:59:00', 'income', 25.25),
+            ('2025-03-01T00:00:00', 'expense', 10),
+            ('2025-03-15T12:00:00', 'income', 100),
+        ]:
+            category_id = 12 if tipe == 'income' else 1
+            self.create_transaction(self.wallet_id, tipe_transaksi=tipe, jumlah=jumlah, category_id=category_id,
+                                    tanggal=tanggal, deskripsi='%s %s' % (tipe, tanggal[:10]))
+
+    def tearDown(self):
+        import shutil
+        super(TestArchive, self).tearDown()
+        shutil.rmtree(self.archive_dir)
+
+    def archive(self, *months):
+        from datetime import date
+        from sqlalchemy.orm import Session
+        from .scripts.archive_transactions import archive_month
+
+        archive = self.app.registry['archive']
+        with Session(self.engine) as session, session.begin():
+            for month in months:
+                archive_month(session, archive, self.wallet_id, date(2025, month, 1))
+
+    def reads(self):
+        """Every read that covers archived months, as the API returns it."""
+        url = '/api/wallets/%d' % self.wallet_id
+        pages, cursor = [], None
+        while True:
+            params = {'limit': '2', 'walletId': str(self.wallet_id)}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.testapp.get('/api/transactions', params).json
+            pages.append(body['data'])
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+        return {
+            'pages': pages,
+            'filtered': self.testapp.get('/api/transactions', {
+                'type': 'expense', 'startDate': '2025-01-20', 'endDate': '2025-03-01'}).json['data'],
+            'export': self.testapp.get('/api/transactions/export?format=csv').text,
+            'days': self.testapp.get(url + '/balance-history', {'bucket': 'day'}).json['data'],
+            'months': self.testapp.get(url + '/balance-history', {
+                'bucket': 'month', 'from': '2025-01-10', 'to': '2025-03-20'}).json['data'],
+            'at': self.testapp.get(url + '/balance', {'at': '2025-02-10'}).json['data']['saldo'],
+            'summary': self.testapp.get('/api/summary', {
+                'period': 'custom', 'startDate': '2025-01-10', 'endDate': '2025-03-31'}).json['data'],
+            'report': self.testapp.get('/api/reports/monthly', {'year': '2025'}).json['data'],
+        }
+
+    def test_reads_are_unchanged_by_archiving(self):
+        import os
+        from .models import Transaction
+
+        before = self.reads()
+        self.archive(1, 2)
+        with self.session_factory() as session:
+            self.assertEqual(session.query(Transaction).count(), 2)
+        self.assertEqual(len([f for _, _, files in os.walk(self.archive_dir) for f in files]), 2)
+        self.assertEqual(self.reads(), before)
+
+    def test_export_reads_manifest_with_its_rows(self):
+        from webob import Request
+        before = self.testapp.get('/api/transactions/export?format=csv').text
+        # Pengarsipan berjalan setelah view selesai, sebelum body dibaca
+        res = Request.blank('/api/transactions/export?format=csv').get_response(self.testapp.app)
+        self.archive(1, 2)
+        self.assertEqual(b''.join(res.app_iter).decode('utf-8'), before)
+
+    def test_search_covers_archived_months(self):
+        def search(q, limit):
+            ids, cursor = [], None
+            while True:
+                params = {'q': q, 'limit': str(limit)}
+                if cursor:
+                    params['cursor'] = cursor
+                body = self.testapp.get('/api/transactions', params).json
+                ids += [row['id'] for row in body['data']]
+                cursor = body['next_cursor']
+                if not cursor:
+                    return ids
+
+        expenses = search('expense', 100)
+        self.assertEqual(len(expenses), 4)
+        january = search('expense 2025 01', 100)
+        self.archive(1, 2)
+
+        for limit in (1, 2, 100):
+            found = search('expense', limit)
+            self.assertEqual(sorted(found), sorted(expenses))
+            # Hasil dari arsip (Januari-Februari) menyusul hasil indeks, terbaru dulu
+            self.assertEqual(found[1:], sorted(found[1:], reverse=True))
+        self.assertEqual(sorted(search('expense 2025 01', 1)), sorted(january))
+        self.assertEqual(search('expense 2026', 1), [])
+
+    def test_archived_months_are_read_only(self):
+        archived_id = self.testapp.get('/api/transactions', {'endDate': '2025-01-31'}).json['data'][0]['id']
+        detail = self.testapp.get('/api/transactions/%d?expand=category' % archived_id).json['data']
+        self.archive(1)
+
+        self.assertEqual(self.testapp.get('/api/transactions/%d?expand=category' % archived_id).json['data'],
+                         detail)
+        self.assertEqual(self.create_transaction(self.wallet_id, tanggal='2025-01-31T10:00:00').status_int, 409)
+        self.assertEqual(self.create_transaction(self.wallet_id, tanggal='2025-02-01T00:00:00').status_int, 201)
+        url = '/api/transactions/%d' % archived_id
+        self.assertEqual(self.testapp.put_json(url, {'jumlah': 1}, expect_errors=True).status_int, 409)
+        self.assertEqual(self.testapp.delete(url, expect_errors=True).status_int, 409)
+        hot_id = self.testapp.get('/api/transactions', {'startDate': '2025-03-01'}).json['data'][0]['id']
+        res = self.testapp.put_json('/api/transactions/%d' % hot_id, {'tanggal': '2025-01-02T00:00:00'},
+                                    expect_errors=True)
+        self.assertEqual(res.status_int, 409)
+
+        res = self.testapp.post_json('/api/transactions/bulk?mode=best_effort', [
+            {'tipe_transaksi': 'income', 'jumlah': 5, 'category_id': 12,
+             'wallet_id': self.wallet_id, 'tanggal': tanggal}
+            for tanggal in ('2025-01-15T00:00:00', '2025-04-01T00:00:00')
+        ], expect_errors=True)
+        self.assertEqual(res.json['data']['inserted'], 1)
+        self.assertEqual([e['row'] for e in res.json['data']['errors']], [1])
+
+    def test_rebuilds_keep_archived_months(self):
+        from sqlalchemy.orm import Session
+        from .models import rebuild_rollups, rebuild_snapshots
+
+        before = self.reads()
+        self.archive(1, 2)
+        with Session(self.engine) as session, session.begin():
+            rebuild_rollups(session, [self.wallet_id])
+            rebuild_snapshots(session, [self.wallet_id])
+        self.assertEqual(self.reads(), before)
+
+    def test_segment_round_trip_and_checksum(self):
+        from datetime import date, datetime
+        from .models import ArchiveError, TransactionArchive
+        from .models.archive import decode_segment
+
+        created = datetime(2025, 1, 2, 3, 4, 5, 6)
+        rows = [(7, 'income', 150, 'gaji', 12, 1, datetime(2025, 1, 1), None, created),
+                (9, 'expense', 2575, 'kopi ☕', 1, 1, datetime(2025, 1, 1, 0, 0, 1), 'catatan', None)]
+        archive = TransactionArchive(self.archive_dir)
+        values = archive.write(1, date(2025, 1, 1), rows)
+        self.assertEqual((values['row_count'], values['min_id'], values['max_id']), (2, 7, 9))
+        self.assertEqual((values['income'], values['expense']), (1.5, 25.75))
+
+        with open(archive.full_path(values['path']), 'rb') as f:
+            data = f.read()
+        columns = decode_segment(data)
+        self.assertEqual(list(zip(*columns.values())), rows)
+        self.assertEqual(decode_segment(data, ('jumlah',)), {'jumlah': [150, 2575]})
+
+        class Segment(object):
+            path = values['path']
+            checksum = '0' * 64
+        with self.assertRaises(ArchiveError):
+            archive.read(Segment())
+
+
+class TestBatch(FunctionalTest):
+
+    def setUp(self):
+        super(TestBatch, self).setUp()
+        self.wallet_id = self.create_wallet(saldo_awal=100.0)
+        self.create_transaction(self.wallet_id, jumlah=10)
+
+    def batch(self, requests, status=200, **options):
+        options['requests'] = requests
+        return self.testapp.post_json('/api/batch', options, status=status)
+
+    def test_reads_answer_together_like_separate_requests(self):
+        wallet = '/api/wallets/%d' % self.wallet_id
+        res = self.batch([
+            {'id': 'wallets', 'path': '/api/wallets'},
+            {'id': 'recent', 'path': '/api/transactions?limit=20'},
+            {'id': 'wallet', 'path': wallet},
+            {'id': 'types', 'path': '/api/wallet-types'},
+        ])
+        self.assertEqual(res.json['status'], 'success')
+        results = {item['id']: item for item in res.json['data']}
+        self.assertEqual([item['id'] for item in res.json['data']], ['wallets', 'recent', 'wallet', 'types'])
+        self.assertEqual(results['recent']['body'], self.testapp.get('/api/transactions?limit=20').json)
+        direct = self.testapp.get(wallet)
+        self.assertEqual(results['wallet']['body'], direct.json)
+        self.assertEqual(results['wallet']['headers']['ETag'], direct.headers['ETag'])
+        self.assertTrue(all(item['status'] == 200 for item in res.json['data']))
+
+    def test_failed_read_does_not_fail_the_batch(self):
+        res = self.batch([
+            {'path': '/api/wallets/999'},
+            {'path': '/api/nowhere'},
+            {'path': '/api/wallets'},
+        ])
+        self.assertEqual([item['status'] for item in res.json['data']], [404, 404, 200])
+        self.assertEqual([item['id'] for item in res.json['data']], [0, 1, 2])
+        self.assertEqual(res.json['data'][1]['body']['status'], 'error')
+
+    def test_wallet_reads_bypass_the_wallet_cache(self):
+        from .models import Wallet
+        wallet = '/api/wallets/%d' % self.wallet_id
+        self.testapp.get('/api/wallets')
+        self.testapp.get(wallet)
+        # Perubahan di luar aplikasi: cache proses ini masih berisi nama lama
+        with self.session_factory() as session:
+            session.query(Wallet).update({'nama_dompet': 'Baru'})
+            session.commit()
+        self.assertEqual(self.testapp.get(wallet).json['data']['nama_dompet'], 'Dompet')
+        res = self.batch([{'path': '/api/wallets'}, {'path': wallet}])
+        self.assertEqual(res.json['data'][0]['body']['data'][0]['nama_dompet'], 'Baru')
+        self.assertEqual(res.json['data'][1]['body']['data']['nama_dompet'], 'Baru')
+
+    def test_writes_commit_in_order(self):
+        res = self.batch([
+            {'method': 'POST', 'path': '/api/transactions', 'body': {
+                'tipe_transaksi': 'expense', 'jumlah': 5, 'category_id': 1,
+                'wallet_id': self.wallet_id, 'tanggal': '2025-03-02T10:00:00'}},
+            {'id': 'balance', 'path': '/api/wallets/%d/balance' % self.wallet_id},
+        ])
+        self.assertEqual([item['status'] for item in res.json['data']], [201, 200])
+        self.assertEqual(res.json['data'][1]['body']['data']['saldo_saat_ini'], 85.0)
+        self.assertEqual(self.balance(self.wallet_id), 85.0)
+
+    def test_failed_write_keeps_nothing(self):
+        res = self.batch([
+            {'method': 'POST', 'path': '/api/transactions', 'body': {
+                'tipe_transaksi': 'expense', 'jumlah': 5, 'category_id': 1,
+                'wallet_id': self.wallet_id, 'tanggal': '2025-03-02T10:00:00'}},
+            {'method': 'POST', 'path': '/api/transactions', 'body': {
+                'tipe_transaksi': 'expense', 'jumlah': 5, 'category_id': 99,
+                'wallet_id': self.wallet_id, 'tanggal': '2025-03-02T10:00:00'}},
+        ], status=422)
+        self.assertEqual(res.json['message'], 'No changes were saved')
+        self.assertEqual(res.json['data'][0]['status'], 201)
+        self.assertGreaterEqual(res.json['data'][1]['status'], 400)
+        self.assertEqual(self.balance(self.wallet_id), 90.0)
+
+    def test_invalid_batches(self):
+        self.batch([{'path': '/api/batch', 'method': 'POST'}], status=400)
+        self.batch([{'path': '/api/transactions/export'}], status=400)
+        self.batch([{'path': '/api/%62atch', 'method': 'POST'}], status=400)
+        self.batch([{'path': '/api/transactions/%65xport'}], status=400)
+        self.batch([{'path': '/api/wallets'}] * 21, status=400)
+        self.batch([{'path': '/api/wallets', 'method': 'PATCH'}], status=400)
+        self.batch([], status=400)
+        res = self.testapp.post('/api/batch', '{oops', content_type='application/json', status=400)
+        self.assertEqual(res.json['message'], 'Invalid JSON data')
+
+
+class TestSeedDatabase(FunctionalTest):
+
+    def seed(self, wallets, transactions):
+        import random
+        from datetime import datetime, timedelta
+        from sqlalchemy.orm import Session
+        from .scripts import seed_db
+
+        rnd = random.Random(7)
+        end = datetime(2025, 6, 30)
+        with Session(self.engine) as session, session.begin():
+            added = seed_db.ensure_categories(session)
+            created = seed_db.create_wallets(session, wallets, rnd)
+        counts = seed_db.split_counts(transactions, wallets, rnd)
+        work = [(wallet_id, saldo, count, i) for i, ((wallet_id, saldo), count) in enumerate(zip(created, counts))]
+        settings = {'sqlalchemy.url': 'sqlite:///' + self.db_path}
+        inserted = seed_db.seed_chunk(settings, work, end - timedelta(days=365), end, 50, 100)
+        return added, [wallet_id for wallet_id, _ in created], inserted
+
+    def test_balances_match_rows(self):
+        from sqlalchemy import case, func, select
+        from .models import Category, Transaction, TransactionRollup, Wallet
+        from .models.transaction import TransactionType
+
+        added, wallet_ids, inserted = self.seed(4, 600)
+        self.assertEqual(added, 16)
+        self.assertEqual(inserted, 600)
+
+        signed = case((Transaction.tipe_transaksi == TransactionType.income, Transaction.jumlah),
+                      else_=-Transaction.jumlah)
+        with self.session_factory() as session:
+            for wallet in session.query(Wallet).filter(Wallet.id.in_(wallet_ids)):
+                total = session.execute(select(func.coalesce(func.sum(signed), 0.0))
+                                        .where(Transaction.wallet_id == wallet.id)).scalar()
+                self.assertAlmostEqual(wallet.saldo_saat_ini, wallet.saldo_awal + total)
+                self.assertGreaterEqual(wallet.saldo_saat_ini, 0)
+
+            # Kategori selalu sesuai dengan tipe transaksinya
+            pairs = session.execute(
+                select(Category.transaction_type, Transaction.tipe_transaksi).distinct()
+                .join(Category, Category.id == Transaction.category_id)
+            ).all()
+            self.assertEqual({(kind.value, tipe.value) for kind, tipe in pairs},
+                             {('expense', 'expense'), ('income', 'income')})
+            self.assertEqual(session.execute(select(func.sum(TransactionRollup.count))).scalar(), 600)
+
+        wallet_id = wallet_ids[0]
+        res = self.testapp.get('/api/wallets/%d/balance?at=2030-01-01T00:00:00' % wallet_id)
+        self.assertAlmostEqual(res.json['data']['saldo'], self.balance(wallet_id))
+
+
+class TestPreforkServer(FunctionalTest):
+
+    def serve(self, **options):
+        import multiprocessing
+        import socket
+        from .prefork import serve
+
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        self.port = probe.getsockname()[1]
+        probe.close()
+        process = multiprocessing.get_context('fork').Process(
+            target=serve, args=(self.app, '127.0.0.1:%d' % self.port), kwargs=options)
+        process.start()
+        self.addCleanup(process.join, 5)
+        self.addCleanup(process.terminate)
+        return process
+
+    def get(self, path):
+        import time
+        import urllib.request
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                with urllib.request.urlopen('http://127.0.0.1:%d%s' % (self.port, path)) as res:
+                    return res.status
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def workers(self, process):
+        with open('/proc/%d/task/%d/children' % (process.pid, process.pid)) as f:
+            return set(f.read().split())
+
+    def test_workers_are_recycled_and_stop_gracefully(self):
+        import os
+        import signal
+        import time
+
+        wallet_id = self.create_wallet()
+        process = self.serve(workers=2, max_requests=3, threads=2, graceful_timeout=5)
+        self.assertEqual(self.get('/api/wallets/%d' % wallet_id), 200)
+        first = self.workers(process)
+        self.assertEqual(len(first), 2)
+
+        statuses = {self.get('/api/wallets/%d' % wallet_id) for _ in range(12)}
+        self.assertEqual(statuses, {200})
+        time.sleep(0.5)
+        # Pekerja melayani paling banyak 3 request lalu diganti master
+        current = self.workers(process)
+        self.assertEqual(len(current), 2)
+        self.assertNotEqual(current, first)
+
+        os.kill(process.pid, signal.SIGTERM)
+        process.join(10)
+        self.assertEqual(process.exitcode, 0)
+
+    def test_after_fork_replaces_the_pool(self):
+        from .models import after_fork
+
+        engine = self.engine
+        with engine.connect():
+            pool = engine.pool
+            cache = self.app.registry['wallet_cache']
+            after_fork(self.app.registry)
+        self.assertIsNot(engine.pool, pool)
+        self.assertEqual(engine.pool.checkedout(), 0)
+        self.assertIsNot(self.app.registry['wallet_cache'], cache)
+
+    def test_warm_pool_fills_the_pool(self):
+        from .models import warm_pool
+
+        self.engine.dispose()
+        warm_pool(self.app.registry).join(5)
+        self.assertEqual(self.engine.pool.checkedin(), self.engine.pool.size())
+
+
+class TestStartup(unittest.TestCase):
+    """Cold start stays within ``benchmarks/startup.py``'s budget."""
+
+    def setUp(self):
+        import importlib.util
+        import os
+        import tempfile
+        from sqlalchemy import create_engine
+        from .models.base import Base
+
+        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'startup.py')
+        spec = importlib.util.spec_from_file_location('startup_benchmark', path)
+        self.startup = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.startup)
+
+        fd, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        engine = create_engine('sqlite:///' + self.db_path)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+    def tearDown(self):
+        import os
+        os.remove(self.db_path)
+
+    def test_within_budget(self):
+        result = self.startup.measure('sqlite:///' + self.db_path, repeat=3)
+        self.assertEqual(self.startup.over_budget(result), [])
+        self.assertEqual(result['statuses'], [200])
+        self.assertEqual(result['engines_at_import'], 0)
+
+        # Hanya model dan view yang dimuat; tidak ada scan seluruh paket
+        for module in ('backendlagi.tests', 'backendlagi.scripts', 'backendlagi.prefork', 'backendlagi.pshell'):
+            self.assertNotIn(module, result['modules'])
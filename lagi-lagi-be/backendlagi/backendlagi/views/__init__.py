@@ -0,0 +1,171 @@
+from pyramid.response import Response
+from pyramid_retry import is_error_retryable, mark_error_retryable
+from sqlalchemy.exc import DBAPIError
+from transaction.interfaces import TransientError
+from backendlagi.models.cache import WALLET_LIST, wallet_key
+from backendlagi.models.snapshot import SNAPSHOT_EVERY
+from datetime import timezone
+import hashlib
+import json
+
+# Data referensi yang hanya berubah saat deploy
+IMMUTABLE = 'public, max-age=86400, immutable'
+# Penanda di environ sub-request POST /api/batch
+BATCH_ENVIRON = 'backendlagi.batch'
+
+
+def matched_id(request, key='id'):
+    """Return ``request.matchdict[key]`` as an int, or ``None`` if it is not one.
+
+    Comparing an integer primary key with the raw string from the URL fails
+    on drivers that bind parameters server side (psycopg 3).
+    """
+    value = request.matchdict.get(key, '')
+    return int(value) if value.isdigit() else None
+
+
+def is_retryable(request, exc):
+    """True if ``exc`` is a transient DB error pyramid_retry should replay.
+
+    Views that turn unexpected exceptions into 500 responses must re-raise
+    these (serialization failures, deadlocks) so pyramid_tm can abort and
+    pyramid_retry can run the request again. Such errors are marked
+    retryable here; on the last attempt this returns ``False``.
+    """
+    if isinstance(exc, DBAPIError):
+        # SQLSTATE kelas 40: transaction rollback (40001 serialisasi, 40P01 deadlock)
+        sqlstate = getattr(exc.orig, 'sqlstate', None) or getattr(exc.orig, 'pgcode', None) or ''
+        if sqlstate.startswith('40'):
+            mark_error_retryable(exc)
+    elif isinstance(exc, TransientError):
+        mark_error_retryable(exc)
+    return is_error_retryable(request, exc)
+
+
+def snapshot_every(request):
+    """Transactions between balance snapshots (``backendlagi.balance_snapshot_every``)."""
+    return int(request.registry.settings.get('backendlagi.balance_snapshot_every', SNAPSHOT_EVERY))
+
+
+def read_cached(request, key, load):
+    """``load()`` through the wallet cache under ``key``.
+
+    Sub-requests of ``POST /api/batch`` skip the cache and call ``load()``
+    directly, so everything a batch returns comes from its one snapshot.
+    """
+    if request.environ.get(BATCH_ENVIRON):
+        return load()
+    return request.registry['wallet_cache'].get(key, load)
+
+
+def wallets_changed(request, *wallet_ids):
+    """Invalidate the cached wallet list and ``wallet_ids`` once the request commits.
+
+    Nothing is dropped if the transaction aborts; dropping before the
+    commit would let a concurrent read cache the old rows again.
+    """
+    cache = request.registry['wallet_cache']
+    keys = [WALLET_LIST] + [wallet_key(wallet_id) for wallet_id in set(wallet_ids)]
+
+    def invalidate(committed):
+        if committed:
+            cache.invalidate(*keys)
+
+    request.tm.get().addAfterCommitHook(invalidate)
+
+
+def not_modified(request, etag, last_modified=None):
+    """Set cache validators on the response; return it as a 304 if the client is current.
+
+    ``last_modified`` is a naive UTC datetime. ``If-None-Match`` wins over
+    ``If-Modified-Since`` when both are sent. Returns ``None`` when the view
+    has to render the body.
+    """
+    response = request.response
+    response.etag = etag
+    # always revalidate: the data belongs to the user and changes on writes
+    response.cache_control = 'private, no-cache'
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    if request.if_none_match:
+        fresh = etag in request.if_none_match
+    else:
+        fresh = (last_modified is not None and request.if_modified_since is not None
+                 and response.last_modified <= request.if_modified_since)
+    if not fresh:
+        return None
+    response.status = 304
+    del response.content_type
+    return response
+
+
+class EncodedPayload(object):
+    """A JSON response body encoded once, with its strong ETag.
+
+    Serving it costs a header comparison and a ``Response`` around the
+    same bytes; nothing is rebuilt or re-encoded per request.
+    """
+
+    def __init__(self, data):
+        self.body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+    def response(self, request, cache_control=IMMUTABLE):
+        if self.etag in request.if_none_match:
+            response = Response(status=304)
+            del response.content_type
+        else:
+            response = Response(body=self.body, content_type='application/json', charset='utf-8')
+        response.etag = self.etag
+        response.cache_control = cache_control
+        return response
+
+
+# (view, route, request method, renderer); didaftarkan eksplisit tanpa config.scan()
+VIEWS = [
+    ('.default.my_view', 'home', None, 'backendlagi:templates/mytemplate.jinja2'),
+
+    ('.wallet_views.get_wallets', 'wallets', 'GET', 'json'),
+    ('.wallet_views.create_wallet', 'wallets', 'POST', 'json'),
+    ('.wallet_views.get_wallet', 'wallet_detail', 'GET', 'json'),
+    ('.wallet_views.update_wallet', 'wallet_detail', 'PUT', 'json'),
+    ('.wallet_views.delete_wallet', 'wallet_detail', 'DELETE', 'json'),
+    ('.wallet_views.get_wallet_balance', 'wallet_balance', 'GET', 'json'),
+    ('.wallet_views.get_wallet_balance_history', 'wallet_balance_history', 'GET', 'json'),
+
+    ('.transaction_views.get_transactions', 'transactions', 'GET', 'json'),
+    ('.transaction_views.create_transaction', 'transactions', 'POST', 'json'),
+    ('.bulk_views.bulk_create_transactions', 'transactions_bulk', 'POST', 'json'),
+    ('.export_views.export_transactions', 'transactions_export', 'GET', None),
+    ('.transaction_views.get_transaction', 'transaction_detail', 'GET', 'json'),
+    ('.transaction_views.update_transaction', 'transaction_detail', 'PUT', 'json'),
+    ('.transaction_views.delete_transaction', 'transaction_detail', 'DELETE', 'json'),
+
+    ('.utility_views.get_categories', 'categories', 'GET', None),
+    ('.utility_views.get_wallet_types', 'wallet_types', 'GET', None),
+    ('.utility_views.get_transaction_types', 'transaction_types', 'GET', None),
+    ('.category_view.get_categories', 'get_categories', 'GET', None),
+
+    ('.summary_views.get_summary', 'summary', 'GET', 'json'),
+    ('.summary_views.get_monthly_report', 'monthly_report', 'GET', 'json'),
+
+    ('.batch_views.batch', 'batch', 'POST', 'json'),
+
+    ('.internal_views.get_pool_stats', 'pool_stats', 'GET', 'json'),
+    ('.internal_views.get_wallet_cache_stats', 'wallet_cache_stats', 'GET', 'json'),
+    ('.internal_views.get_metrics', 'metrics', 'GET', None),
+]
+
+
+def includeme(config):
+    """
+    Register the views of ``VIEWS`` and the not-found view.
+
+    Include after ``backendlagi.routes``. Only the view modules are
+    imported, in a fixed order, instead of scanning the whole package.
+
+    """
+    for view, route_name, request_method, renderer in VIEWS:
+        config.add_view(view, route_name=route_name, request_method=request_method, renderer=renderer)
+    config.add_notfound_view('.notfound.notfound_view', renderer='backendlagi:templates/404.jinja2')
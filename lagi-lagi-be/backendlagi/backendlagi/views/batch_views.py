@@ -0,0 +1,210 @@
+# views/batch_views.py
+"""``POST /api/batch``: several API requests in one round trip.
+
+The body lists sub-requests against the existing routes::
+
+    {"requests": [
+        {"id": "wallets", "method": "GET", "path": "/api/wallets"},
+        {"id": "recent", "path": "/api/transactions?limit=20"},
+        {"method": "POST", "path": "/api/transactions", "body": {...}}
+    ], "parallel": false}
+
+Each sub-request goes through routing and its usual view, but not through
+the tweens: every one shares the batch's transaction, its
+``request.dbsession`` and its CORS preflight. Sub-requests bypass the
+per-process wallet cache, which holds rows from earlier transactions. The answer lists
+``{"id", "status", "headers", "body"}`` per sub-request, in order; JSON
+bodies are embedded as they were rendered, without decoding them again.
+
+A batch of GETs reads one snapshot (``REPEATABLE READ READ ONLY`` on
+PostgreSQL, one deferred transaction on SQLite). With ``"parallel": true``
+on PostgreSQL they run on worker threads, each on its own connection that
+imports the batch's snapshot, so they still see the same data; this helps
+when the sub-requests wait on the database. Elsewhere ``parallel`` is
+ignored.
+
+A batch with writes runs them in order in one transaction, in the
+default isolation level; later sub-requests see earlier writes. If any
+sub-request fails the batch answers 422 and nothing it wrote is kept.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pyramid.httpexceptions import HTTPException
+from pyramid.interfaces import IRoutesMapper
+from pyramid.request import Request
+from pyramid.response import Response
+from sqlalchemy import text
+import json
+import re
+import transaction
+
+from backendlagi.models import READ_SNAPSHOT, begin_read_snapshot, get_tm_session
+from backendlagi.views import BATCH_ENVIRON
+
+DEFAULT_MAX_REQUESTS = 20
+DEFAULT_MAX_WORKERS = 4
+METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+# Rute yang tidak bisa berjalan di dalam batch: batch bersarang, dan ekspor
+# yang mengalir lewat koneksinya sendiri setelah view selesai
+EXCLUDED_ROUTES = ('batch', 'transactions_export')
+# Header respons yang diteruskan ke klien per sub-request
+FORWARDED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+# Data environ yang diwarisi sub-request dari request batch; retry.* agar galat
+# transien di sub-request mengulang seluruh batch
+FORWARDED_ENVIRON = ('REMOTE_ADDR', 'HTTP_ORIGIN', 'HTTP_USER_AGENT', 'retry.attempt', 'retry.attempts')
+SNAPSHOT_ID = re.compile(r'^[0-9A-F]+-[0-9A-F]+(-[0-9]+)?$')
+
+
+def parse_batch(data, max_requests):
+    """Validate a batch body; return ``(specs, parallel)``.
+
+    Each spec is ``(id, method, path, headers, body)``. Raises
+    ``ValueError`` with the client-facing message.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise ValueError('Body must be an object with a "requests" list')
+    items = data['requests']
+    if not items:
+        raise ValueError('No requests in batch')
+    if len(items) > max_requests:
+        raise ValueError(f'At most {max_requests} requests per batch')
+
+    specs = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f'Request {index} must be an object')
+        method = str(item.get('method', 'GET')).upper()
+        if method not in METHODS:
+            raise ValueError(f'Request {index}: invalid method. Valid methods: {METHODS}')
+        path = item.get('path')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise ValueError(f'Request {index}: path must start with /api/')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise ValueError(f'Request {index}: headers must be an object')
+        specs.append((item.get('id', index), method, path, headers, item.get('body')))
+    return specs, bool(data.get('parallel'))
+
+
+def make_subrequest(request, method, path, headers, body):
+    subrequest = Request.blank(path, base_url=request.application_url, method=method)
+    for key in FORWARDED_ENVIRON:
+        if key in request.environ:
+            subrequest.environ[key] = request.environ[key]
+    for name, value in headers.items():
+        subrequest.headers[str(name)] = str(value)
+    if body is not None:
+        subrequest.body = json.dumps(body).encode('utf-8')
+        subrequest.content_type = 'application/json'
+    return subrequest
+
+
+def check_routes(request, specs, subrequests):
+    """Raise ``ValueError`` if a sub-request routes to a view that cannot be batched.
+
+    Checked on the routed (percent-decoded) path, not the raw one.
+    """
+    mapper = request.registry.queryUtility(IRoutesMapper)
+    for index, ((_, _, path, _, _), subrequest) in enumerate(zip(specs, subrequests)):
+        route = mapper(subrequest)['route']
+        if route is not None and route.name in EXCLUDED_ROUTES:
+            raise ValueError(f'Request {index}: {path} cannot be batched')
+
+
+def run_subrequest(request, subrequest, manager, session):
+    """Invoke ``subrequest`` inside ``manager``'s transaction, on ``session``."""
+    # request.tm diambil dari environ; dbsession di-reify, jadi nilai
+    # instance ini dipakai alih-alih membuka sesi baru
+    subrequest.environ['tm.manager'] = manager
+    subrequest.environ[BATCH_ENVIRON] = True
+    subrequest.dbsession = session
+    try:
+        return request.invoke_subrequest(subrequest, use_tweens=False)
+    except HTTPException as e:
+        # Tanpa tween tidak ada exception view (rute tidak cocok dan sejenisnya)
+        return Response(json_body={'status': 'error', 'message': e.title}, status=e.status_int)
+
+
+def parallel_reads(request, subrequests, workers):
+    """Run GET ``subrequests`` on worker threads sharing the batch's snapshot."""
+    session = request.dbsession
+    begin_read_snapshot(session)
+    snapshot_id = session.execute(text('SELECT pg_export_snapshot()')).scalar()
+    if not SNAPSHOT_ID.match(snapshot_id):
+        raise ValueError('Unexpected snapshot id %r' % snapshot_id)
+    factory = request.registry['dbsession_factory']
+
+    def run(subrequest):
+        manager = transaction.TransactionManager(explicit=True)
+        manager.begin()
+        try:
+            worker_session = get_tm_session(factory, manager)
+            worker_session.connection(execution_options=READ_SNAPSHOT)
+            worker_session.execute(text("SET TRANSACTION SNAPSHOT '%s'" % snapshot_id))
+            return run_subrequest(request, subrequest, manager, worker_session)
+        finally:
+            manager.abort()
+
+    # Transaksi batch tetap terbuka sampai semua pekerja selesai, jadi
+    # snapshot yang diekspor tetap berlaku
+    with ThreadPoolExecutor(max_workers=min(workers, len(subrequests))) as executor:
+        return list(executor.map(run, subrequests))
+
+
+def encode_result(request_id, response):
+    """One result object as JSON text, embedding a JSON body without re-encoding it."""
+    headers = {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+    if response.status_int == 304 or not response.body:
+        body = 'null'
+    elif response.content_type == 'application/json':
+        body = response.body.decode(response.charset or 'utf-8')
+    else:
+        body = json.dumps(response.text)
+    return '{"id":%s,"status":%d,"headers":%s,"body":%s}' % (
+        json.dumps(request_id), response.status_int, json.dumps(headers), body)
+
+
+def batch(request):
+    settings = request.registry.settings
+    max_requests = int(settings.get('backendlagi.batch.max_requests', DEFAULT_MAX_REQUESTS))
+    workers = int(settings.get('backendlagi.batch.max_workers', DEFAULT_MAX_WORKERS))
+    try:
+        data = request.json_body
+    except:
+        request.response.status = 400
+        return {'status': 'error', 'message': 'Invalid JSON data'}
+    try:
+        specs, parallel = parse_batch(data, max_requests)
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+
+    subrequests = [make_subrequest(request, method, path, headers, body)
+                   for _, method, path, headers, body in specs]
+    try:
+        check_routes(request, specs, subrequests)
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+    read_only = all(method == 'GET' for _, method, _, _, _ in specs)
+    session = request.dbsession
+    if read_only and parallel and workers > 1 and session.get_bind().dialect.name == 'postgresql':
+        responses = parallel_reads(request, subrequests, workers)
+    else:
+        if read_only:
+            begin_read_snapshot(session)
+        responses = [run_subrequest(request, subrequest, request.tm, session) for subrequest in subrequests]
+
+    results = ','.join(encode_result(request_id, response)
+                       for (request_id, _, _, _, _), response in zip(specs, responses))
+    failed = any(response.status_int >= 400 for response in responses)
+    response = request.response
+    if failed and not read_only:
+        # 4xx membuat pyramid_tm membatalkan semua tulisan batch ini
+        response.status = 422
+        body = '{"status":"error","message":"No changes were saved","data":[%s]}' % results
+    else:
+        body = '{"status":"success","data":[%s]}' % results
+    response.content_type = 'application/json'
+    response.charset = 'utf-8'
+    response.text = body
+    return response
@@ -0,0 +1,253 @@
+# views/bulk_views.py
+from zope.sqlalchemy import mark_changed
+from backendlagi.models.wallet import Wallet, adjust_wallet_balance
+from backendlagi.models.archive import ArchiveSegment, month_bounds
+from backendlagi.models.transaction import Transaction, TransactionType
+from backendlagi.models.money import from_sen, sen, to_sen
+from backendlagi.models.rollup import apply_rollup_delta, month_of
+from backendlagi.models.snapshot import SNAPSHOT_EVERY, discard_snapshots, refresh_snapshots
+from backendlagi.models.versions import TRANSACTIONS, WALLETS, bump_versions
+from backendlagi.views import is_retryable, snapshot_every, wallets_changed
+from backendlagi.views.transaction_views import signed_amount, validate_transaction_data
+from collections import defaultdict
+from sqlalchemy import func, select
+import csv
+import io
+import json
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+MODES = ['atomic', 'best_effort']
+
+
+def iter_json_rows(request):
+    """Yield ``(data, error)`` for each element of a JSON array body."""
+    try:
+        rows = request.json_body
+    except ValueError:
+        raise ValueError('Invalid JSON data')
+    if not isinstance(rows, list):
+        raise ValueError('Expected a JSON array of transactions')
+    for data in rows:
+        yield data, None
+
+
+def iter_ndjson_rows(request):
+    """Yield one row per non-empty line without reading the whole body."""
+    for line in request.body_file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, 'Invalid JSON data'
+
+
+def iter_csv_rows(request):
+    """Yield rows of a CSV body whose header names the transaction fields."""
+    text = io.TextIOWrapper(request.body_file, encoding='utf-8', newline='')
+    try:
+        for record in csv.DictReader(text):
+            # empty cells behave like missing JSON fields
+            yield {key: (value if value != '' else None) for key, value in record.items()}, None
+    except csv.Error as e:
+        raise ValueError(f'Invalid CSV data: {e}')
+
+
+READERS = {
+    'json': iter_json_rows,
+    'ndjson': iter_ndjson_rows,
+    'csv': iter_csv_rows,
+}
+
+CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'text/csv': 'csv',
+}
+
+
+class BulkImport(object):
+    """Validate and insert transaction rows in batches.
+
+    Each batch costs one wallet lookup (locking the wallets it touches), one
+    executemany INSERT, and nothing else. Balances are tracked in memory
+    while validating; ``finish`` writes each wallet's net change with one
+    atomic UPDATE and each rollup key once.
+    """
+
+    def __init__(self, session, atomic=True, snapshot_every=SNAPSHOT_EVERY):
+        self.session = session
+        self.atomic = atomic
+        self.snapshot_every = snapshot_every
+        # wallet_id -> [saldo awal batch, saldo berjalan] dalam sen, None bila tidak ada
+        self.wallets = {}
+        self.rollups = defaultdict(lambda: [0, 0])
+        # tanggal paling awal yang diimpor per dompet
+        self.earliest = {}
+        # wallet_id -> awal bulan pertama yang belum diarsipkan
+        self.archived_through = {}
+        self.batch = []
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'message': message})
+
+    def add(self, row, data, error=None):
+        if error is None:
+            try:
+                self.batch.append((row, validate_transaction_data(data)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            self.error(row, error)
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush_batch()
+
+    def _load_wallets(self, wallet_ids):
+        missing = [wallet_id for wallet_id in wallet_ids if wallet_id not in self.wallets]
+        if not missing:
+            return
+        stmt = (
+            select(Wallet.id, sen(Wallet.saldo_saat_ini))
+            .where(Wallet.id.in_(missing))
+            .with_for_update()
+        )
+        found = dict(self.session.execute(stmt).all())
+        for wallet_id in missing:
+            balance = found.get(wallet_id)
+            self.wallets[wallet_id] = None if balance is None else [balance, balance]
+        archived = self.session.execute(
+            select(ArchiveSegment.wallet_id, func.max(ArchiveSegment.month))
+            .where(ArchiveSegment.wallet_id.in_(missing))
+            .group_by(ArchiveSegment.wallet_id)
+        ).all()
+        for wallet_id, month in archived:
+            self.archived_through[wallet_id] = month_bounds(month)[1]
+
+    def flush_batch(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        self._load_wallets({values['wallet_id'] for _, values in batch})
+
+        rows = []
+        for row, values in batch:
+            wallet = self.wallets[values['wallet_id']]
+            if wallet is None:
+                self.error(row, 'Wallet not found')
+                continue
+            boundary = self.archived_through.get(values['wallet_id'])
+            if boundary is not None and values['tanggal'].replace(tzinfo=None) < boundary:
+                self.error(row, f'Transactions dated before {boundary.date().isoformat()} are archived and read-only')
+                continue
+
+            jumlah = to_sen(values['jumlah'])
+            if values['tipe_transaksi'] == TransactionType.expense and jumlah > wallet[1]:
+                self.error(row, f'Insufficient balance. Current balance: {from_sen(wallet[1])}')
+                continue
+            wallet[1] += signed_amount(values['tipe_transaksi'], jumlah)
+            wallet_id = values['wallet_id']
+            if wallet_id not in self.earliest or values['tanggal'] < self.earliest[wallet_id]:
+                self.earliest[wallet_id] = values['tanggal']
+
+            key = (values['wallet_id'], month_of(values['tanggal']),
+                   values['category_id'], values['tipe_transaksi'])
+            self.rollups[key][0] += jumlah
+            self.rollups[key][1] += 1
+            rows.append(values)
+
+        # Setelah ada error, mode atomic hanya memvalidasi sisa baris
+        if rows and not (self.atomic and self.failed):
+            self.session.execute(Transaction.__table__.insert(), rows)
+            self.inserted += len(rows)
+
+    def finish(self):
+        self.flush_batch()
+        if self.atomic and self.failed:
+            return
+
+        # Saldo dompet diperbarui sekali per dompet dengan selisih bersihnya
+        # (juga saat selisihnya nol, supaya updated_at ikut berubah)
+        for wallet_id, wallet in self.wallets.items():
+            if wallet is None or wallet_id not in self.earliest:
+                continue
+            delta = wallet[1] - wallet[0]
+            balance = adjust_wallet_balance(self.session, wallet_id, from_sen(delta), require_funds=delta < 0)
+            if balance is None:
+                raise ValueError(f'Insufficient balance in wallet {wallet_id}')
+            wallet[1] = to_sen(balance)
+        for (wallet_id, month, category_id, tipe), (amount, count) in self.rollups.items():
+            apply_rollup_delta(self.session, wallet_id, month, category_id, tipe, from_sen(amount), count)
+        # Snapshot setelah baris impor paling awal dipotong ulang dari ledger
+        for wallet_id, tanggal in self.earliest.items():
+            discard_snapshots(self.session, wallet_id, after=tanggal)
+        self.session.flush()
+        for wallet_id in self.earliest:
+            refresh_snapshots(self.session, wallet_id, self.snapshot_every)
+        if self.earliest:
+            bump_versions(self.session, self.earliest, WALLETS, TRANSACTIONS)
+        mark_changed(self.session)
+
+    def balances(self):
+        return [
+            {'wallet_id': wallet_id, 'saldo_saat_ini': from_sen(wallet[1])}
+            for wallet_id, wallet in self.wallets.items() if wallet is not None
+        ]
+
+
+def bulk_create_transactions(request):
+    mode = request.params.get('mode', 'atomic')
+    if mode not in MODES:
+        request.response.status = 400
+        return {'status': 'error', 'message': f'Invalid mode. Valid modes: {MODES}'}
+
+    fmt = request.params.get('format') or CONTENT_TYPES.get(request.content_type)
+    if fmt not in READERS:
+        request.response.status = 415
+        return {'status': 'error', 'message': f'Unsupported format. Valid formats: {list(READERS)}'}
+
+    bulk = BulkImport(request.dbsession, atomic=(mode == 'atomic'),
+                      snapshot_every=snapshot_every(request))
+    try:
+        row = 0
+        for row, (data, error) in enumerate(READERS[fmt](request), start=1):
+            bulk.add(row, data, error)
+        if row == 0:
+            request.response.status = 400
+            return {'status': 'error', 'message': 'No transactions to import'}
+        bulk.finish()
+        wallets_changed(request, *bulk.earliest)
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+    except Exception as e:
+        if is_retryable(request, e):
+            raise
+        request.response.status = 500
+        return {'status': 'error', 'message': str(e)}
+
+    result = {
+        'mode': mode,
+        'inserted': bulk.inserted if not (bulk.atomic and bulk.failed) else 0,
+        'failed': bulk.failed,
+        'errors': bulk.errors,
+    }
+    if bulk.atomic and bulk.failed or not bulk.inserted:
+        # 4xx makes pyramid_tm abort, discarding any batch already inserted
+        request.response.status = 422
+        return {'status': 'error', 'data': result, 'message': 'No transactions were imported'}
+
+    result['wallet_balances'] = bulk.balances()
+    request.response.status = 201
+    return {
+        'status': 'success',
+        'data': result,
+        'message': f'{bulk.inserted} transactions imported',
+    }
@@ -1,20 +1,86 @@
-from pyramid.view import view_config
 from pyramid.response import Response
-from sqlalchemy.orm import joinedload
-from backendlagi.models.base import get_db_session
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, joinedload
 from backendlagi.models.wallet import Wallet
 from backendlagi.models.transaction import Transaction, TransactionType, expenseCategory, incomeCategory
+from backendlagi.views import EncodedPayload
 from ..models import Category, TransactionType
+import threading
+
+
+class CategoryPayloads(object):
+    """Encoded ``category`` lists per transaction type, one build per table change.
+
+    A payload is keyed on the row count and highest id of its type, read
+    from the database on every request, so rows added or removed by any
+    writer (the seeder's Core inserts, migrations, other processes) are
+    served on the next request. ``generation`` additionally covers updates:
+    it is bumped when a session of this process commits a ``Category``
+    change. A session with uncommitted category changes gets a fresh
+    payload that is not cached.
+    """
+
+    generation = 0
+    _generation_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payloads = {}
+
+    @classmethod
+    def invalidate(cls):
+        with cls._generation_lock:
+            cls.generation += 1
+
+    def get(self, session, tipe):
+        transaction_type = TransactionType(tipe)
+        # Kunci dibaca sebelum daftar: perubahan di tengah jalan memicu build ulang
+        key = (CategoryPayloads.generation,) + tuple(session.execute(
+            select(func.count(Category.id), func.max(Category.id))
+            .where(Category.transaction_type == transaction_type)
+        ).one())
+        cached = self._payloads.get(tipe)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        categories = (
+            session.query(Category)
+            .filter(Category.transaction_type == transaction_type)
+            .all()
+        )
+        payload = EncodedPayload([cat.to_dict() for cat in categories])
+        if not session.info.get('categories_changed'):
+            with self._lock:
+                self._payloads[tipe] = (key, payload)
+        return payload
+
+
+def _mark_categories_changed(mapper, connection, target):
+    Session.object_session(target).info['categories_changed'] = True
+
+
+def _categories_committed(session):
+    if session.info.pop('categories_changed', False):
+        CategoryPayloads.invalidate()
+
+
+def _categories_rolled_back(session, previous_transaction):
+    session.info.pop('categories_changed', None)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Category, _event, _mark_categories_changed)
+event.listen(Session, 'after_commit', _categories_committed)
+event.listen(Session, 'after_soft_rollback', _categories_rolled_back)
+
 
-@view_config(route_name='get_categories', renderer='json', request_method='GET')
 def get_categories(request):
     tipe = request.params.get('transaction_type')
 
     if tipe not in ['income', 'expense']:
         return Response(json_body={'error': 'transaction_type harus income atau expense'}, status=400)
 
-    # Ambil session dari request (bukan DBSession global)
-    session = request.dbsession
-
-    categories = session.query(Category).filter(Category.transaction_type == TransactionType(tipe)).all()
-    return [cat.to_dict() for cat in categories]
\ No newline at end of file
+    # Satu cache per aplikasi; daftar hanya dibangun ulang setelah tabel category berubah
+    payloads = request.registry.setdefault('category_payloads', CategoryPayloads())
+    # tabel category bisa berubah kapan saja, jadi klien selalu revalidasi
+    return payloads.get(request.dbsession, tipe).response(request, cache_control='public, no-cache')
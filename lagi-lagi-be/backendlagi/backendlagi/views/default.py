@@ -1,12 +1,10 @@
 from pyramid.response import Response
-from pyramid.view import view_config
 
 from sqlalchemy.exc import DBAPIError
 
 from .. import models
 
 
-@view_config(route_name='home', renderer='../templates/mytemplate.jinja2')
 def my_view(request):
     try:
         query = request.dbsession.query(models.MyModel)
@@ -0,0 +1,116 @@
+# views/export_views.py
+from pyramid.response import Response
+from sqlalchemy import select
+from backendlagi.models import begin_read_snapshot
+from backendlagi.models.transaction import Transaction, TransactionType
+from backendlagi.models.archive import row_key
+from backendlagi.views.transaction_views import archived_rows, parse_transaction_filter
+import csv
+import heapq
+import io
+import json
+
+EXPORT_COLUMNS = [
+    'id', 'tipe_transaksi', 'jumlah', 'deskripsi', 'category_id',
+    'wallet_id', 'tanggal', 'catatan', 'created_at',
+]
+FETCH_SIZE = 1000
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _type_value(tipe):
+    # Baris arsip menyimpan nama enum, baris tabel anggota enum
+    if tipe is None:
+        return None
+    return (tipe if isinstance(tipe, TransactionType) else TransactionType[tipe]).value
+
+
+def export_rows(engine, archive, flt):
+    """Yield export rows matching ``flt`` as plain tuples through a server-side cursor.
+
+    Runs on its own connection: the body is produced after the view has
+    returned and pyramid_tm has already closed the request's session. The
+    archive manifest is read on that connection, in one snapshot with the
+    rows, so a month archived meanwhile is neither doubled nor lost. Its
+    rows (newest first, see ``archived_rows``) are merged into the stream
+    in the same order.
+    """
+    columns = [getattr(Transaction, name) for name in EXPORT_COLUMNS]
+    stmt = (
+        select(*columns)
+        .where(*flt.criteria())
+        .order_by(Transaction.tanggal.desc(), Transaction.id.desc())
+    )
+    with engine.connect() as connection:
+        begin_read_snapshot(connection)
+        archived = archived_rows(connection, archive, flt)
+        result = connection.execution_options(stream_results=True, yield_per=FETCH_SIZE).execute(stmt)
+        if archived:
+            result = heapq.merge(result, archived, key=row_key, reverse=True)
+        for row in result:
+            yield (
+                row.id,
+                _type_value(row.tipe_transaksi),
+                row.jumlah,
+                row.deskripsi,
+                row.category_id,
+                row.wallet_id,
+                row.tanggal.isoformat() if row.tanggal else None,
+                row.catatan,
+                row.created_at.isoformat() if row.created_at else None,
+            )
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % FETCH_SIZE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+        if len(chunk) == FETCH_SIZE:
+            yield ('\n'.join(chunk) + '\n').encode('utf-8')
+            chunk = []
+    if chunk:
+        yield ('\n'.join(chunk) + '\n').encode('utf-8')
+
+
+ENCODERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+}
+
+
+def export_transactions(request):
+    fmt = request.params.get('format', 'csv')
+    if fmt not in FORMATS:
+        return Response(
+            json_body={'status': 'error', 'message': f'Invalid format. Valid formats: {list(FORMATS)}'},
+            status=400,
+        )
+    try:
+        flt = parse_transaction_filter(request.params)
+    except ValueError as e:
+        return Response(json_body={'status': 'error', 'message': str(e)}, status=400)
+
+    engine = request.registry['dbsession_factory'].kw['bind']
+    response = Response(
+        content_type=FORMATS[fmt],
+        charset='utf-8',
+        app_iter=ENCODERS[fmt](export_rows(engine, request.registry['archive'], flt)),
+    )
+    response.content_disposition = f'attachment; filename="transactions.{fmt}"'
+    return response
@@ -0,0 +1,40 @@
+# views/internal_views.py
+from pyramid.response import Response
+from pyramid.settings import aslist
+
+DEFAULT_INTERNAL_HOSTS = '127.0.0.1 ::1'
+
+
+def is_internal_client(request):
+    """Only hosts listed in ``backendlagi.internal_hosts`` may read internals."""
+    settings = request.registry.settings
+    allowed = aslist(settings.get('backendlagi.internal_hosts', DEFAULT_INTERNAL_HOSTS))
+    return '*' in allowed or request.remote_addr in allowed
+
+
+def get_pool_stats(request):
+    if not is_internal_client(request):
+        request.response.status = 403
+        return {'status': 'error', 'message': 'Forbidden'}
+
+    engine = request.registry['dbsession_factory'].kw['bind']
+    stats = request.registry['pool_stats']
+    return {'status': 'success', 'data': stats.snapshot(engine.pool)}
+
+
+def get_wallet_cache_stats(request):
+    if not is_internal_client(request):
+        request.response.status = 403
+        return {'status': 'error', 'message': 'Forbidden'}
+
+    return {'status': 'success', 'data': request.registry['wallet_cache'].snapshot()}
+
+
+def get_metrics(request):
+    if not is_internal_client(request):
+        return Response('Forbidden\n', status=403, content_type='text/plain')
+
+    # Format teks Prometheus (exposition format 0.0.4)
+    response = Response(request.registry['metrics'].render(), content_type='text/plain', charset='utf-8')
+    response.cache_control = 'no-store'
+    return response
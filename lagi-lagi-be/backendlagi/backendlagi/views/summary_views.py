@@ -0,0 +1,243 @@
+# views/summary_views.py
+from sqlalchemy import and_, case, func, select
+from backendlagi.models.wallet import Wallet
+from backendlagi.models.transaction import Transaction, TransactionType
+from backendlagi.models.rollup import TransactionRollup
+from backendlagi.models.money import from_sen, sen
+from datetime import date, datetime, timedelta
+
+PERIODS = ['today', 'this-week', 'this-month', 'last-month', 'this-year', 'all-time', 'custom']
+
+
+def _month_start(day):
+    return datetime(day.year, day.month, 1)
+
+
+def _next_month(start):
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
+
+
+def period_range(period, today=None, start_date=None, end_date=None):
+    """Return ``(start, end)`` datetimes for a dashboard period.
+
+    ``end`` is exclusive; ``all-time`` yields ``(None, None)``. The period
+    names are the ones the dashboard period selector already uses.
+    """
+    today = today or date.today()
+    midnight = datetime(today.year, today.month, today.day)
+
+    if period == 'today':
+        return midnight, midnight + timedelta(days=1)
+    if period == 'this-week':
+        # Minggu dimulai hari Minggu, sama seperti di frontend
+        start = midnight - timedelta(days=(today.weekday() + 1) % 7)
+        return start, start + timedelta(days=7)
+    if period == 'this-month':
+        start = _month_start(today)
+        return start, _next_month(start)
+    if period == 'last-month':
+        end = _month_start(today)
+        return _month_start(end - timedelta(days=1)), end
+    if period == 'this-year':
+        return datetime(today.year, 1, 1), datetime(today.year + 1, 1, 1)
+    if period == 'all-time':
+        return None, None
+    if period == 'custom':
+        try:
+            start = datetime.fromisoformat(start_date) if start_date else None
+            end = datetime.fromisoformat(end_date) if end_date else None
+        except ValueError:
+            raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DD)')
+        if end is not None and len(end_date) == 10:
+            end += timedelta(days=1)
+        return start, end
+    raise ValueError(f'Invalid period. Valid periods: {PERIODS}')
+
+
+def summary_statement(start=None, end=None, wallet_id=None):
+    """Per-wallet balance and cash flow inside ``[start, end)``, as integer sen.
+
+    Wallets are outer-joined to their transactions inside the period so
+    wallets without activity still contribute their balance.
+    """
+    income = func.coalesce(func.sum(case(
+        (Transaction.tipe_transaksi == TransactionType.income, Transaction.jumlah),
+        else_=0,
+    )), 0)
+    expense = func.coalesce(func.sum(case(
+        (Transaction.tipe_transaksi == TransactionType.expense, Transaction.jumlah),
+        else_=0,
+    )), 0)
+
+    join_on = [Transaction.wallet_id == Wallet.id]
+    if start is not None:
+        join_on.append(Transaction.tanggal >= start)
+    if end is not None:
+        join_on.append(Transaction.tanggal < end)
+
+    stmt = (
+        select(
+            Wallet.id,
+            Wallet.nama_dompet,
+            sen(Wallet.saldo_saat_ini).label('saldo_saat_ini'),
+            sen(income).label('income'),
+            sen(expense).label('expense'),
+            func.count(Transaction.id).label('transaction_count'),
+        )
+        .outerjoin(Transaction, and_(*join_on))
+        .group_by(Wallet.id, Wallet.nama_dompet, Wallet.saldo_saat_ini)
+        .order_by(Wallet.id)
+    )
+    if wallet_id is not None:
+        stmt = stmt.where(Wallet.id == wallet_id)
+    return stmt
+
+
+def compute_summary(session, start=None, end=None, wallet_id=None, archive=None):
+    """Aggregate balances and period cash flow in a single GROUP BY query.
+
+    Amounts are summed as integer sen, in SQL and here, and converted to
+    rupiah last. Archived transactions in the period are added from
+    ``archive``.
+    """
+    archived = {}
+    if archive is not None:
+        segments = archive.segments(session, wallet_id, start, end)
+        archived = archive.totals(segments, start, end, inclusive=False)
+
+    wallets = []
+    balance = income_total = expense_total = count = 0
+    for row in session.execute(summary_statement(start, end, wallet_id)):
+        saldo = int(row.saldo_saat_ini or 0)
+        archived_income, archived_expense, archived_count = archived.get(row.id, (0, 0, 0))
+        row_income, row_expense = int(row.income) + archived_income, int(row.expense) + archived_expense
+        transaction_count = row.transaction_count + archived_count
+        wallets.append({
+            'wallet_id': row.id,
+            'nama_dompet': row.nama_dompet,
+            'saldo_saat_ini': from_sen(saldo),
+            'income': from_sen(row_income),
+            'expense': from_sen(row_expense),
+            'net_flow': from_sen(row_income - row_expense),
+            'transaction_count': transaction_count,
+        })
+        balance += saldo
+        income_total += row_income
+        expense_total += row_expense
+        count += transaction_count
+
+    return {
+        'total_balance': from_sen(balance),
+        'total_income': from_sen(income_total),
+        'total_expense': from_sen(expense_total),
+        'transaction_count': count,
+        'net_flow': from_sen(income_total - expense_total),
+        'wallets': wallets,
+    }
+
+
+def get_summary(request):
+    period = request.params.get('period', 'this-month')
+    wallet_id = request.params.get('wallet_id') or request.params.get('walletId')
+
+    try:
+        start, end = period_range(
+            period,
+            start_date=request.params.get('startDate'),
+            end_date=request.params.get('endDate'),
+        )
+        if wallet_id:
+            if not wallet_id.isdigit():
+                raise ValueError('Invalid wallet id')
+            wallet_id = int(wallet_id)
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+
+    session = request.dbsession
+    try:
+        result = compute_summary(session, start, end, wallet_id or None, request.registry['archive'])
+        result['period'] = period
+        result['start_date'] = start.isoformat() if start else None
+        result['end_date'] = end.isoformat() if end else None
+        return {'status': 'success', 'data': result}
+    except Exception as e:
+        request.response.status = 500
+        return {'status': 'error', 'message': str(e)}
+
+
+def monthly_report(session, year, wallet_id=None):
+    """Per-month income/expense totals for ``year``, read from the rollup table.
+
+    Each month is at most a handful of rollup rows (one per category and
+    type), so a full year costs a few dozen rows regardless of history size.
+    """
+    query = (
+        session.query(
+            TransactionRollup.month,
+            TransactionRollup.tipe_transaksi,
+            TransactionRollup.category_id,
+            sen(func.sum(TransactionRollup.total)).label('total'),
+            func.sum(TransactionRollup.count).label('count'),
+        )
+        .filter(TransactionRollup.month >= date(year, 1, 1))
+        .filter(TransactionRollup.month < date(year + 1, 1, 1))
+        .group_by(TransactionRollup.month, TransactionRollup.tipe_transaksi, TransactionRollup.category_id)
+    )
+    if wallet_id is not None:
+        query = query.filter(TransactionRollup.wallet_id == wallet_id)
+
+    # Total per bulan dalam sen; dikonversi ke rupiah di akhir
+    months = {
+        m: {'month': date(year, m, 1).isoformat(), 'income': 0, 'expense': 0,
+            'transaction_count': 0, 'categories': []}
+        for m in range(1, 13)
+    }
+    for row in query:
+        if not row.count:
+            continue
+        entry = months[row.month.month]
+        entry[row.tipe_transaksi.value] += int(row.total)
+        entry['transaction_count'] += int(row.count)
+        entry['categories'].append({
+            'category_id': row.category_id,
+            'tipe_transaksi': row.tipe_transaksi.value,
+            'total': from_sen(row.total),
+            'count': int(row.count),
+        })
+
+    result = list(months.values())
+    total_income = sum(m['income'] for m in result)
+    total_expense = sum(m['expense'] for m in result)
+    for entry in result:
+        entry['income'] = from_sen(entry['income'])
+        entry['expense'] = from_sen(entry['expense'])
+    return {
+        'year': year,
+        'months': result,
+        'total_income': from_sen(total_income),
+        'total_expense': from_sen(total_expense),
+    }
+
+
+def get_monthly_report(request):
+    year = request.params.get('year', str(date.today().year))
+    wallet_id = request.params.get('wallet_id') or request.params.get('walletId')
+
+    if not year.isdigit() or (wallet_id and not wallet_id.isdigit()):
+        request.response.status = 400
+        return {'status': 'error', 'message': 'year and wallet_id must be integers'}
+    # Tahun 9999 tidak punya awal tahun berikutnya (batas atas datetime)
+    if not 1 <= int(year) <= 9998:
+        request.response.status = 400
+        return {'status': 'error', 'message': 'year must be between 1 and 9998'}
+
+    session = request.dbsession
+    try:
+        result = monthly_report(session, int(year), int(wallet_id) if wallet_id else None)
+        return {'status': 'success', 'data': result}
+    except Exception as e:
+        request.response.status = 500
+        return {'status': 'error', 'message': str(e)}
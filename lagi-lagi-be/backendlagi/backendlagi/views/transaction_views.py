@@ -1,102 +1,417 @@
 # views/transaction_views.py
-from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
-from backendlagi.models.base import get_db_session
-from backendlagi.models.wallet import Wallet
+from backendlagi.models.wallet import Wallet, adjust_wallet_balance
 from backendlagi.models.transaction import Transaction, TransactionType, expenseCategory, incomeCategory
 from backendlagi.models.category import Category
-from datetime import datetime
+from backendlagi.models.archive import TransactionFilter, archived_through, month_bounds, row_key
+from backendlagi.models.money import parse_amount
+from backendlagi.models.rollup import apply_rollup_delta
+from backendlagi.models.snapshot import refresh_snapshots, shift_snapshots
+from backendlagi.models.readers import EXPANSIONS, expand_transactions, transaction_serializer, wallet_summary
+from backendlagi.models.search import apply_search, matches_terms, search_terms
+from backendlagi.models.versions import TRANSACTIONS, WALLETS, bump_versions, get_versions
+from backendlagi.views import is_retryable, matched_id, not_modified, snapshot_every, wallets_changed
+from sqlalchemy import and_, or_, select, tuple_
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
+from itertools import islice
+import base64
+import heapq
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Peringkat hasil pencarian dari arsip: di bawah semua peringkat indeks
+# (ts_rank dan -bm25 tidak negatif), jadi baris arsip selalu tampil terakhir
+ARCHIVED_RANK = -1.0
+
+
+def encode_cursor(transaction, rank=None):
+    """Build the opaque keyset cursor pointing just past ``transaction``.
+
+    Search results also carry their ``rank``, the leading sort key.
+    """
+    key = [transaction.tanggal.isoformat(), transaction.id]
+    if rank is not None:
+        key.append(rank)
+    payload = json.dumps(key)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, ranked=False):
+    """Return the ``(tanggal, id)`` pair stored in a cursor from ``encode_cursor``.
+
+    With ``ranked`` the cursor must come from a search and
+    ``(tanggal, id, rank)`` is returned.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if len(key) != (3 if ranked else 2):
+            raise ValueError(cursor)
+        tanggal, transaction_id = datetime.fromisoformat(key[0]), int(key[1])
+        if ranked:
+            return tanggal, transaction_id, float(key[2])
+        return tanggal, transaction_id
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_date_bounds(start_date, end_date):
+    """Turn the ``startDate``/``endDate`` params into ``(start, end, end_inclusive)``.
+
+    A bare ``YYYY-MM-DD`` end date includes the whole day.
+    """
+    start = end = None
+    inclusive = True
+    try:
+        if start_date:
+            start = datetime.fromisoformat(start_date)
+        if end_date:
+            end = datetime.fromisoformat(end_date)
+            if len(end_date) == 10:
+                end, inclusive = end + timedelta(days=1), False
+    except ValueError:
+        raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DD)')
+    return start, end, inclusive
+
+
+def parse_date_range(start_date, end_date):
+    """Turn the ``startDate``/``endDate`` params into SQL criteria on ``tanggal``."""
+    start, end, inclusive = parse_date_bounds(start_date, end_date)
+    return TransactionFilter(start=start, end=end, end_inclusive=inclusive).criteria()
+
+
+def parse_transaction_filter(params):
+    """Translate list query params into the ``TransactionFilter`` shared by every listing."""
+    wallet_id = params.get('wallet_id') or params.get('walletId')
+    if wallet_id:
+        try:
+            wallet_id = int(wallet_id)
+        except ValueError:
+            raise ValueError('Invalid wallet id')
+    else:
+        wallet_id = None
+
+    tipe = None
+    transaction_type = params.get('type')
+    if transaction_type and transaction_type != 'all':
+        try:
+            tipe = TransactionType(transaction_type)
+        except ValueError:
+            valid_types = [tt.value for tt in TransactionType]
+            raise ValueError(f'Invalid transaction type. Valid types: {valid_types}')
+
+    start, end, inclusive = parse_date_bounds(params.get('startDate'), params.get('endDate'))
+    return TransactionFilter(wallet_id, tipe, start, end, inclusive)
+
+
+def transaction_filters(params):
+    """Translate list query params into SQL criteria shared by every listing."""
+    return parse_transaction_filter(params).criteria()
+
+
+class ArchivedRows(object):
+    """The archived rows of a listing, read lazily, newest first.
+
+    ``newest`` bounds them: every row is dated before it.
+    """
+
+    def __init__(self, archive, segments, flt, before):
+        self.archive = archive
+        self.segments = segments
+        self.flt = flt
+        self.before = before
+        self.newest = month_bounds(segments[0].month)[1]
+
+    def __iter__(self):
+        return self.archive.rows(self.segments, self.flt, self.before)
+
+
+def archived_rows(session, archive, flt, before=None):
+    """``ArchivedRows`` matching ``flt`` before the ``(tanggal, id)`` key ``before``, or ``None``.
+
+    ``None`` when there is no archive or the range reaches no archived
+    month; the listing then only reads ``transactions``.
+    """
+    if archive is None:
+        return None
+    end = flt.end
+    if before is not None and (end is None or before[0] < end):
+        end = before[0]
+    segments = archive.segments(session, flt.wallet_id, flt.start, end)
+    if not segments:
+        return None
+    return ArchivedRows(archive, segments, flt, before)
+
+
+def page_statement(stmt, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """``stmt`` restricted to the keyset page after ``cursor`` (plus one row)."""
+    if cursor:
+        tanggal, transaction_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Transaction.tanggal, Transaction.id) < (tanggal, transaction_id),
+            # Redundan untuk index, tapi PostgreSQL hanya memangkas partisi
+            # bulanan dari perbandingan kolom biasa, bukan dari row comparison
+            Transaction.tanggal <= tanggal,
+        )
+    return stmt.order_by(Transaction.tanggal.desc(), Transaction.id.desc()).limit(limit + 1)
+
+
+def paginate_transactions(session, stmt, cursor=None, limit=DEFAULT_PAGE_SIZE, archived=None):
+    """Return one keyset page of ``stmt`` and the cursor for the next page.
+
+    Rows are ordered by ``(tanggal DESC, id DESC)`` so every page, however
+    deep, is a single range scan on the ``(wallet_id, tanggal, id)`` or
+    ``(tanggal, id)`` index instead of an OFFSET over skipped rows. ``stmt``
+    must select the ``tanggal`` and ``id`` columns.
+
+    ``archived`` (from ``archived_rows``) is merged in by the same order;
+    archive files are only opened when the page reaches past
+    ``archived.newest``, and only as far as the page needs.
+    """
+    rows = session.execute(page_statement(stmt, cursor, limit)).all()
+    if archived is not None and (len(rows) <= limit or rows[limit].tanggal < archived.newest):
+        rows = list(islice(heapq.merge(rows, archived, key=row_key, reverse=True), limit + 1))
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def paginate_search(session, stmt, rank, cursor=None, limit=DEFAULT_PAGE_SIZE, archived=None, terms=()):
+    """Like ``paginate_transactions`` for search results, best match first.
+
+    Rows are ordered by ``(rank DESC, tanggal DESC, id DESC)``; the rank is
+    appended to each row as its last column. ``archived`` rows matching
+    ``terms`` follow every indexed result with ``ARCHIVED_RANK``, newest
+    first.
+    """
+    ranked = stmt.add_columns(rank.label('rank')).subquery()
+    stmt = select(ranked)
+    if cursor:
+        tanggal, transaction_id, rank_value = decode_cursor(cursor, ranked=True)
+        stmt = stmt.where(or_(
+            ranked.c.rank < rank_value,
+            and_(ranked.c.rank == rank_value,
+                 tuple_(ranked.c.tanggal, ranked.c.id) < (tanggal, transaction_id)),
+        ))
+
+    rows = session.execute(
+        stmt.order_by(ranked.c.rank.desc(), ranked.c.tanggal.desc(), ranked.c.id.desc())
+        .limit(limit + 1)
+    ).all()
+    ranks = [row.rank for row in rows]
+    if archived is not None and len(rows) <= limit:
+        matches = (row for row in archived if matches_terms(f'{row.deskripsi or ""} {row.catatan or ""}', terms))
+        extra = list(islice(matches, limit + 1 - len(rows)))
+        rows += extra
+        ranks += [ARCHIVED_RANK] * len(extra)
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(rows[limit - 1], ranks[limit - 1])
+    return rows[:limit], next_cursor
+
+
+def parse_expand(value):
+    """Relations named in ``expand=category,wallet``, sorted and without duplicates."""
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    if fields - set(EXPANSIONS):
+        raise ValueError(f'Invalid expand. Valid values: {sorted(EXPANSIONS)}')
+    return sorted(fields)
+
+
+def expanded_validators(session, etag, last_modified, expand):
+    """Extend a transaction ETag for embedded wallets, which change on their own.
+
+    Categories are reference data without a change counter.
+    """
+    if 'wallet' not in expand:
+        return etag, last_modified
+    version, changed_at = get_versions(session, WALLETS)[WALLETS]
+    stamp = changed_at.isoformat() if changed_at else ''
+    if changed_at is not None and (last_modified is None or changed_at > last_modified):
+        last_modified = changed_at
+    return f'{etag}-{WALLETS}-{version}-{stamp}', last_modified
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid limit')
+    if limit <= 0:
+        raise ValueError('Limit must be greater than 0')
+    return min(limit, MAX_PAGE_SIZE)
 
-class TransactionViews:
-    
-    def __init__(self, request):
-        self.request = request
-        self.session = get_db_session()
-    
-    def __del__(self):
-        if hasattr(self, 'session'):
-            self.session.close()
 
-@view_config(route_name='transactions', request_method='GET', renderer='json')
 def get_transactions(request):
-    session = get_db_session()
+    # Offset paging is gone; deeper pages are reached through next_cursor.
+    if request.params.get('page', '1') != '1' and not request.params.get('cursor'):
+        request.response.status = 400
+        return {'status': 'error', 'message': 'Page-based paging is not supported, use cursor'}
+
     try:
-        # Get query parameters for filtering
-        wallet_id = request.params.get('wallet_id')
-        transaction_type = request.params.get('type')
-        limit = request.params.get('limit', 100)
-        
-        query = session.query(Transaction)
-        
-        if wallet_id:
-            query = query.filter(Transaction.wallet_id == wallet_id)
-        
-        if transaction_type:
-            try:
-                trans_type = TransactionType(transaction_type)
-                query = query.filter(Transaction.tipe_transaksi == trans_type)
-            except ValueError:
-                pass
+        flt = parse_transaction_filter(request.params)
+        criteria = flt.criteria()
+        terms = search_terms(request.params.get('q', ''))
+        limit = parse_limit(request.params.get('limit', DEFAULT_PAGE_SIZE))
+        expand = parse_expand(request.params.get('expand', ''))
+        cursor = request.params.get('cursor')
+        if cursor:
+            decode_cursor(cursor, ranked=bool(terms))
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+
+    session = request.dbsession
+    try:
+        # Validator dibaca sebelum data, jadi tidak pernah lebih baru dari body
+        version, changed_at = get_versions(session, TRANSACTIONS, wallet_id=flt.wallet_id)[TRANSACTIONS]
+        stamp = changed_at.isoformat() if changed_at else ''
+        etag, last_modified = expanded_validators(
+            session, f'{TRANSACTIONS}-{version}-{stamp}', changed_at, expand)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
         
-        transactions = query.order_by(Transaction.created_at.desc()).limit(int(limit)).all()
-        result = [transaction.to_dict() for transaction in transactions]
+        # Column rows straight to dicts: no ORM instances or identity map
+        stmt = transaction_serializer.select().where(*criteria)
+        archive = request.registry['archive']
+        if terms:
+            # Baris arsip dicocokkan di Python, setelah semua hasil indeks
+            before = None
+            if cursor:
+                tanggal, transaction_id, rank_value = decode_cursor(cursor, ranked=True)
+                if rank_value <= ARCHIVED_RANK:
+                    before = (tanggal, transaction_id)
+            archived = archived_rows(session, archive, flt, before)
+            stmt, rank = apply_search(session.get_bind().dialect.name, stmt, terms)
+            rows, next_cursor = paginate_search(session, stmt, rank, cursor, limit, archived, terms)
+        else:
+            archived = archived_rows(session, archive, flt, decode_cursor(cursor) if cursor else None)
+            rows, next_cursor = paginate_transactions(session, stmt, cursor, limit, archived)
+        result = transaction_serializer(rows)
+        # Relasi dimuat per halaman (satu query per relasi), bukan per baris
+        expand_transactions(session, result, expand)
         
-        return {'status': 'success', 'data': result, 'count': len(result)}
+        return {'status': 'success', 'data': result, 'count': len(result), 'next_cursor': next_cursor}
     except Exception as e:
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='transaction_detail', request_method='GET', renderer='json')
 def get_transaction(request):
-    transaction_id = request.matchdict['id']
-    session = get_db_session()
+    transaction_id = matched_id(request)
     try:
-        transaction = session.query(Transaction).filter(Transaction.id == transaction_id).first()
+        expand = parse_expand(request.params.get('expand', ''))
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+    
+    session = request.dbsession
+    try:
+        # Transaksi tidak punya updated_at; perubahan terlihat dari penghitung koleksi
+        version, changed_at = get_versions(session, TRANSACTIONS)[TRANSACTIONS]
+        # Relasi yang diminta ikut dalam query yang sama (JOIN)
+        transaction = (
+            session.query(Transaction)
+            .options(*[joinedload(getattr(Transaction, field)) for field in expand])
+            .filter(Transaction.id == transaction_id)
+            .first()
+        )
         if not transaction:
-            request.response.status = 404
-            return {'status': 'error', 'message': 'Transaction not found'}
+            return get_archived_transaction(request, session, transaction_id, expand, version, changed_at)
+        
+        etag, last_modified = expanded_validators(
+            session, f'transaction-{transaction.id}-{transaction.created_at.isoformat()}-{version}',
+            changed_at or transaction.created_at, expand)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
         
-        return {'status': 'success', 'data': transaction.to_dict()}
+        data = transaction.to_dict()
+        if 'category' in expand:
+            data['category'] = transaction.category.to_dict() if transaction.category else None
+        if 'wallet' in expand:
+            data['wallet'] = wallet_summary(transaction.wallet) if transaction.wallet else None
+        return {'status': 'success', 'data': data}
     except Exception as e:
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='transactions', request_method='POST', renderer='json')
-def create_transaction(request):
-    try:
-        data = request.json_body
-    except:
-        request.response.status = 400
-        return {'status': 'error', 'message': 'Invalid JSON data'}
-    
+def get_archived_transaction(request, session, transaction_id, expand, version, changed_at):
+    """``get_transaction`` for an id that is no longer in ``transactions``."""
+    archive = request.registry['archive']
+    row = archive.find(session, transaction_id) if archive is not None else None
+    if row is None:
+        request.response.status = 404
+        return {'status': 'error', 'message': 'Transaction not found'}
+
+    etag, last_modified = expanded_validators(
+        session, f'transaction-{row.id}-{row.created_at.isoformat()}-{version}',
+        changed_at or row.created_at, expand)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    data = transaction_serializer([row])
+    expand_transactions(session, data, expand)
+    return {'status': 'success', 'data': data[0]}
+
+
+def archived_conflict(request, session, wallet_id, tanggal):
+    """409 response when ``tanggal`` falls in an archived month of the wallet, else ``None``.
+
+    Archived months are read-only: their totals are kept in the manifest,
+    the rollups and the balance snapshots, which a write would invalidate.
+    """
+    boundary = archived_through(session, wallet_id)
+    if boundary is None or tanggal.replace(tzinfo=None) >= boundary:
+        return None
+    request.response.status = 409
+    return {
+        'status': 'error',
+        'message': f'Transactions dated before {boundary.date().isoformat()} are archived and read-only',
+    }
+
+
+def archived_transaction_conflict(request, session, transaction_id):
+    """404 for an unknown transaction id, 409 for an archived one."""
+    archive = request.registry['archive']
+    if archive is not None and archive.find(session, transaction_id) is not None:
+        request.response.status = 409
+        return {'status': 'error', 'message': 'Transaction is archived and read-only'}
+    request.response.status = 404
+    return {'status': 'error', 'message': 'Transaction not found'}
+
+
+def validate_transaction_data(data):
+    """Check a new transaction payload and return the column values to insert.
+
+    Raises ``ValueError`` with the client-facing message on the first problem.
+    Shared by ``create_transaction`` and the bulk import so both enforce the
+    same rules.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Invalid JSON data')
+
     # Validate required fields
     required_fields = ['tipe_transaksi', 'jumlah', 'category_id', 'wallet_id', 'tanggal']
     for field in required_fields:
         if field not in data or data[field] is None:
-            request.response.status = 400
-            return {'status': 'error', 'message': f'Field {field} is required'}
+            raise ValueError(f'Field {field} is required')
     
     # Validate transaction type
     try:
         tipe_transaksi = TransactionType(data['tipe_transaksi'])
     except ValueError:
-        request.response.status = 400
         valid_types = [tt.value for tt in TransactionType]
-        return {'status': 'error', 'message': f'Invalid transaction type. Valid types: {valid_types}'}
+        raise ValueError(f'Invalid transaction type. Valid types: {valid_types}')
     
     # Validate amount
     try:
-        jumlah = float(data['jumlah'])
-        if jumlah <= 0:
-            request.response.status = 400
-            return {'status': 'error', 'message': 'Amount must be greater than 0'}
+        jumlah = parse_amount(data['jumlah'])
     except (ValueError, TypeError):
-        request.response.status = 400
-        return {'status': 'error', 'message': 'Invalid amount format'}
+        raise ValueError('Invalid amount format')
+    if jumlah <= 0:
+        raise ValueError('Amount must be greater than 0')
     
     # Validate category based on transaction type
     if tipe_transaksi == TransactionType.expense:
@@ -104,64 +419,104 @@ def create_transaction(request):
     else:
         valid_categories = [cat.value for cat in incomeCategory]
     
-    if data['category_id'] not in valid_categories:
+    category_id = data['category_id']
+    if isinstance(category_id, str) and category_id.isdigit():
+        category_id = int(category_id)
+    if category_id not in valid_categories:
+        raise ValueError(
+            f'Invalid category for {tipe_transaksi.value} transaction. Valid categories: {valid_categories}'
+        )
+    
+    try:
+        wallet_id = int(data['wallet_id'])
+    except (ValueError, TypeError):
+        raise ValueError('Invalid wallet id')
+    
+    # Parse date
+    try:
+        if isinstance(data['tanggal'], str):
+            tanggal = datetime.fromisoformat(data['tanggal'].replace('Z', '+00:00'))
+        else:
+            tanggal = data['tanggal']
+    except ValueError:
+        raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)')
+    if not isinstance(tanggal, datetime):
+        raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)')
+    
+    return {
+        'tipe_transaksi': tipe_transaksi,
+        'jumlah': jumlah,
+        'deskripsi': data.get('deskripsi', '') or '',
+        'category_id': category_id,
+        'wallet_id': wallet_id,
+        'tanggal': tanggal,
+        'catatan': data.get('catatan', '') or '',
+    }
+
+
+def signed_amount(tipe_transaksi, jumlah):
+    """Effect of a transaction on its wallet's balance."""
+    return jumlah if tipe_transaksi == TransactionType.income else -jumlah
+
+
+def wallet_update_failed(request, session, wallet_id):
+    """Error response for an ``adjust_wallet_balance`` that updated no row."""
+    balance = session.query(Wallet.saldo_saat_ini).filter(Wallet.id == wallet_id).scalar()
+    if balance is None:
+        request.response.status = 404
+        return {'status': 'error', 'message': 'Wallet not found'}
+    request.response.status = 400
+    return {
+        'status': 'error',
+        'message': f'Insufficient balance. Current balance: {balance}'
+    }
+
+
+def create_transaction(request):
+    try:
+        data = request.json_body
+    except:
         request.response.status = 400
-        return {
-            'status': 'error', 
-            'message': f'Invalid category for {tipe_transaksi.value} transaction. Valid categories: {valid_categories}'
-        }
+        return {'status': 'error', 'message': 'Invalid JSON data'}
     
-    session = get_db_session()
     try:
-        # Check if wallet exists
-        wallet = session.query(Wallet).filter(Wallet.id == data['wallet_id']).first()
-        if not wallet:
-            request.response.status = 404
-            return {'status': 'error', 'message': 'Wallet not found'}
-        
-        # Check if expense amount doesn't exceed wallet balance
-        if tipe_transaksi == TransactionType.expense and jumlah > wallet.saldo_saat_ini:
-            request.response.status = 400
-            return {
-                'status': 'error', 
-                'message': f'Insufficient balance. Current balance: {wallet.saldo_saat_ini}'
-            }
-        
-        # Parse date
-        try:
-            if isinstance(data['tanggal'], str):
-                tanggal = datetime.fromisoformat(data['tanggal'].replace('Z', '+00:00'))
-            else:
-                tanggal = data['tanggal']
-        except:
-            request.response.status = 400
-            return {'status': 'error', 'message': 'Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}
+        values = validate_transaction_data(data)
+    except ValueError as e:
+        request.response.status = 400
+        return {'status': 'error', 'message': str(e)}
+    tipe_transaksi = values['tipe_transaksi']
+    jumlah = values['jumlah']
+    
+    session = request.dbsession
+    try:
+        conflict = archived_conflict(request, session, values['wallet_id'], values['tanggal'])
+        if conflict is not None:
+            return conflict
         
-        # Create transaction
-        transaction = Transaction(
-            tipe_transaksi=tipe_transaksi,
-            jumlah=jumlah,
-            deskripsi=data.get('deskripsi', ''),
-            category_id=data['category_id'],
-            wallet_id=data['wallet_id'],
-            tanggal=tanggal,
-            catatan=data.get('catatan', '')
+        # Saldo diubah langsung di DB; pengeluaran hanya lolos jika saldo cukup
+        balance = adjust_wallet_balance(
+            session, values['wallet_id'], signed_amount(tipe_transaksi, jumlah),
+            require_funds=(tipe_transaksi == TransactionType.expense),
         )
+        if balance is None:
+            return wallet_update_failed(request, session, values['wallet_id'])
         
-        # Update wallet balance
-        if tipe_transaksi == TransactionType.income:
-            wallet.saldo_saat_ini += jumlah
-        else:
-            wallet.saldo_saat_ini -= jumlah
-        
-        wallet.updated_at = datetime.utcnow()
-        
+        # Create transaction
+        transaction = Transaction(**values)
         session.add(transaction)
-        session.commit()
-        session.refresh(transaction)
+        apply_rollup_delta(
+            session, transaction.wallet_id, transaction.tanggal,
+            transaction.category_id, transaction.tipe_transaksi, jumlah, 1,
+        )
+        shift_snapshots(session, transaction.wallet_id, transaction.tanggal,
+                        signed_amount(tipe_transaksi, jumlah))
+        session.flush()
+        refresh_snapshots(session, transaction.wallet_id, snapshot_every(request))
+        bump_versions(session, [transaction.wallet_id], WALLETS, TRANSACTIONS)
+        wallets_changed(request, transaction.wallet_id)
         
         result = transaction.to_dict()
-        result['wallet_balance'] = wallet.saldo_saat_ini
+        result['wallet_balance'] = balance
         
         request.response.status = 201
         return {
@@ -170,15 +525,13 @@ def create_transaction(request):
             'message': 'Transaction created successfully'
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='transaction_detail', request_method='PUT', renderer='json')
 def update_transaction(request):
-    transaction_id = request.matchdict['id']
+    transaction_id = matched_id(request)
     
     try:
         data = request.json_body
@@ -186,22 +539,22 @@ def update_transaction(request):
         request.response.status = 400
         return {'status': 'error', 'message': 'Invalid JSON data'}
     
-    session = get_db_session()
+    session = request.dbsession
     try:
-        transaction = session.query(Transaction).filter(Transaction.id == transaction_id).first()
+        # Row lock so concurrent edits of the same transaction apply one after another
+        transaction = (
+            session.query(Transaction)
+            .filter(Transaction.id == transaction_id)
+            .with_for_update()
+            .first()
+        )
         if not transaction:
-            request.response.status = 404
-            return {'status': 'error', 'message': 'Transaction not found'}
+            return archived_transaction_conflict(request, session, transaction_id)
         
-        wallet = transaction.wallet
         old_amount = transaction.jumlah
         old_type = transaction.tipe_transaksi
-        
-        # Revert old transaction effect on wallet balance
-        if old_type == TransactionType.income:
-            wallet.saldo_saat_ini -= old_amount
-        else:
-            wallet.saldo_saat_ini += old_amount
+        old_tanggal = transaction.tanggal
+        old_category_id = transaction.category_id
         
         # Update transaction fields
         if 'tipe_transaksi' in data:
@@ -214,7 +567,7 @@ def update_transaction(request):
         
         if 'jumlah' in data:
             try:
-                new_amount = float(data['jumlah'])
+                new_amount = parse_amount(data['jumlah'])
                 if new_amount <= 0:
                     request.response.status = 400
                     return {'status': 'error', 'message': 'Amount must be greater than 0'}
@@ -254,25 +607,40 @@ def update_transaction(request):
             except:
                 request.response.status = 400
                 return {'status': 'error', 'message': 'Invalid date format'}
+            conflict = archived_conflict(request, session, transaction.wallet_id, transaction.tanggal)
+            if conflict is not None:
+                return conflict
         
-        # Apply new transaction effect on wallet balance
-        if transaction.tipe_transaksi == TransactionType.income:
-            wallet.saldo_saat_ini += transaction.jumlah
-        else:
-            if transaction.jumlah > wallet.saldo_saat_ini:
-                request.response.status = 400
-                return {
-                    'status': 'error', 
-                    'message': f'Insufficient balance. Current balance: {wallet.saldo_saat_ini}'
-                }
-            wallet.saldo_saat_ini -= transaction.jumlah
+        # Revert the old effect and apply the new one in a single balance update
+        delta = (signed_amount(transaction.tipe_transaksi, transaction.jumlah)
+                 - signed_amount(old_type, old_amount))
+        balance = adjust_wallet_balance(
+            session, transaction.wallet_id, delta,
+            require_funds=(transaction.tipe_transaksi == TransactionType.expense),
+        )
+        if balance is None:
+            return wallet_update_failed(request, session, transaction.wallet_id)
         
-        wallet.updated_at = datetime.utcnow()
-        session.commit()
-        session.refresh(transaction)
+        # Move the transaction out of its old rollup bucket and into the new one
+        apply_rollup_delta(
+            session, transaction.wallet_id, old_tanggal,
+            old_category_id, old_type, -old_amount, -1,
+        )
+        apply_rollup_delta(
+            session, transaction.wallet_id, transaction.tanggal,
+            transaction.category_id, transaction.tipe_transaksi, transaction.jumlah, 1,
+        )
+        shift_snapshots(session, transaction.wallet_id, old_tanggal,
+                        -signed_amount(old_type, old_amount))
+        shift_snapshots(session, transaction.wallet_id, transaction.tanggal,
+                        signed_amount(transaction.tipe_transaksi, transaction.jumlah))
+        session.flush()
+        refresh_snapshots(session, transaction.wallet_id, snapshot_every(request))
+        bump_versions(session, [transaction.wallet_id], WALLETS, TRANSACTIONS)
+        wallets_changed(request, transaction.wallet_id)
         
         result = transaction.to_dict()
-        result['wallet_balance'] = wallet.saldo_saat_ini
+        result['wallet_balance'] = balance
         
         return {
             'status': 'success', 
@@ -280,44 +648,51 @@ def update_transaction(request):
             'message': 'Transaction updated successfully'
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='transaction_detail', request_method='DELETE', renderer='json')
 def delete_transaction(request):
-    transaction_id = request.matchdict['id']
-    session = get_db_session()
+    transaction_id = matched_id(request)
+    session = request.dbsession
     try:
-        transaction = session.query(Transaction).filter(Transaction.id == transaction_id).first()
+        transaction = (
+            session.query(Transaction)
+            .filter(Transaction.id == transaction_id)
+            .with_for_update()
+            .first()
+        )
         if not transaction:
-            request.response.status = 404
-            return {'status': 'error', 'message': 'Transaction not found'}
+            return archived_transaction_conflict(request, session, transaction_id)
         
-        wallet = transaction.wallet
         transaction_desc = transaction.deskripsi or f"{transaction.tipe_transaksi.value} - {transaction.jumlah}"
         
         # Revert transaction effect on wallet balance
-        if transaction.tipe_transaksi == TransactionType.income:
-            wallet.saldo_saat_ini -= transaction.jumlah
-        else:
-            wallet.saldo_saat_ini += transaction.jumlah
+        balance = adjust_wallet_balance(
+            session, transaction.wallet_id,
+            -signed_amount(transaction.tipe_transaksi, transaction.jumlah),
+        )
         
-        wallet.updated_at = datetime.utcnow()
+        apply_rollup_delta(
+            session, transaction.wallet_id, transaction.tanggal,
+            transaction.category_id, transaction.tipe_transaksi, -transaction.jumlah, -1,
+        )
+        shift_snapshots(session, transaction.wallet_id, transaction.tanggal,
+                        -signed_amount(transaction.tipe_transaksi, transaction.jumlah))
         
         session.delete(transaction)
-        session.commit()
+        session.flush()
+        bump_versions(session, [transaction.wallet_id], WALLETS, TRANSACTIONS)
+        wallets_changed(request, transaction.wallet_id)
         
         return {
             'status': 'success', 
             'message': f'Transaction "{transaction_desc}" deleted successfully',
-            'wallet_balance': wallet.saldo_saat_ini
+            'wallet_balance': balance
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
-        return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
\ No newline at end of file
+        return {'status': 'error', 'message': str(e)}
\ No newline at end of file
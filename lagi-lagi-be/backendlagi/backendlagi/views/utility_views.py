@@ -1,72 +1,65 @@
 # views/utility_views.py
-from pyramid.view import view_config
 from backendlagi.models import expenseCategory, incomeCategory, WalletType, TransactionType
+from backendlagi.views import EncodedPayload
 
-@view_config(route_name='categories', request_method='GET', renderer='json')
-def get_categories(request):
-    transaction_type = request.params.get('type', 'all')
-    
-    if transaction_type == 'expense':
-        categories = [
-            {
-                'value': cat.value, 
-                'label': cat.value.replace('_', ' ').replace('dan', '&').title()
-            } 
-            for cat in expenseCategory
-        ]
-        return {'status': 'success', 'data': categories}
-    elif transaction_type == 'income':
-        categories = [
-            {
-                'value': cat.value, 
-                'label': cat.value.replace('_', ' ').title()
-            } 
-            for cat in incomeCategory
-        ]
-        return {'status': 'success', 'data': categories}
-    else:
-        expense_cats = [
-            {
-                'value': cat.value, 
-                'label': cat.value.replace('_', ' ').replace('dan', '&').title(), 
-                'type': 'expense'
-            } 
-            for cat in expenseCategory
-        ]
-        income_cats = [
-            {
-                'value': cat.value, 
-                'label': cat.value.replace('_', ' ').title(), 
-                'type': 'income'
-            } 
-            for cat in incomeCategory
-        ]
-        return {
-            'status': 'success', 
-            'data': {
-                'expense': expense_cats, 
-                'income': income_cats
-            }
+# Label dan body JSON dibangun sekali saat modul dimuat; enum hanya berubah saat deploy.
+# Nilai enum kategori berupa angka, jadi label diambil dari nama member.
+expense_cats = [
+    {
+        'value': cat.value,
+        'label': cat.name.replace('_', ' ').replace('dan', '&').title()
+    }
+    for cat in expenseCategory
+]
+income_cats = [
+    {
+        'value': cat.value,
+        'label': cat.name.replace('_', ' ').title()
+    }
+    for cat in incomeCategory
+]
+
+CATEGORY_PAYLOADS = {
+    'expense': EncodedPayload({'status': 'success', 'data': expense_cats}),
+    'income': EncodedPayload({'status': 'success', 'data': income_cats}),
+    'all': EncodedPayload({
+        'status': 'success',
+        'data': {
+            'expense': [dict(cat, type='expense') for cat in expense_cats],
+            'income': [dict(cat, type='income') for cat in income_cats]
         }
+    }),
+}
 
-@view_config(route_name='wallet_types', request_method='GET', renderer='json')
-def get_wallet_types(request):
-    wallet_types = [
+WALLET_TYPES_PAYLOAD = EncodedPayload({
+    'status': 'success',
+    'data': [
         {
             'value': wt.value,
             'label': wt.value.replace('_', ' ').title()
         }
         for wt in WalletType
-    ]
-    return {'status': 'success', 'data': wallet_types}
+    ],
+})
 
-@view_config(route_name='transaction_types', request_method='GET', renderer='json')
-def get_transaction_types(request):
-    transaction_types = [
+TRANSACTION_TYPES_PAYLOAD = EncodedPayload({
+    'status': 'success',
+    'data': [
         {
             'value': tt.value,
             'label': tt.value.title()
         }
         for tt in TransactionType
-    ]
-    return {'status': 'success', 'data': transaction_types}
\ No newline at end of file
+    ],
+})
+
+def get_categories(request):
+    transaction_type = request.params.get('type', 'all')
+    payload = CATEGORY_PAYLOADS.get(transaction_type, CATEGORY_PAYLOADS['all'])
+    return payload.response(request)
+
+def get_wallet_types(request):
+    return WALLET_TYPES_PAYLOAD.response(request)
+
+def get_transaction_types(request):
+    return TRANSACTION_TYPES_PAYLOAD.response(request)
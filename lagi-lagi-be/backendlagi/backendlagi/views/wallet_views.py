@@ -1,50 +1,116 @@
 # views/wallet_views.py
-from pyramid.view import view_config
 from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
-from backendlagi.models import get_db_session, Wallet, WalletType
-from datetime import datetime
+from backendlagi.models import (
+    Wallet, WalletType, TransactionRollup, balance_at, balance_history, discard_archive, discard_snapshots,
+)
+from backendlagi.models.money import parse_amount
+from backendlagi.models.rollup import BUCKETS
+from backendlagi.models.readers import wallet_serializer
+from backendlagi.models.versions import TRANSACTIONS, WALLETS, bump_versions, get_versions
+from backendlagi.models.cache import WALLET_LIST, wallet_key
+from backendlagi.views import is_retryable, matched_id, not_modified, read_cached, wallets_changed
+from datetime import datetime, timedelta
+
+MAX_HISTORY_POINTS = 500
+
+
+def parse_at(value):
+    """Return ``(at, inclusive)`` for the ``at`` query param.
+
+    A bare ``YYYY-MM-DD`` means the end of that day.
+    """
+    try:
+        at = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DD)')
+    if len(value) == 10:
+        return at + timedelta(days=1), False
+    return at, True
+
+
+def downsample(points, max_points):
+    """Merge consecutive buckets so at most ``max_points`` remain.
+
+    Each merged point starts at its first bucket, sums the flows and keeps
+    the closing balance of its last bucket.
+    """
+    if len(points) <= max_points:
+        return points
+    size = -(-len(points) // max_points)
+    merged = []
+    for i in range(0, len(points), size):
+        group = points[i:i + size]
+        merged.append({
+            'bucket': group[0]['bucket'],
+            'income': sum(point['income'] for point in group),
+            'expense': sum(point['expense'] for point in group),
+            'count': sum(point['count'] for point in group),
+            'saldo': group[-1]['saldo'],
+        })
+    return merged
+
+
+def version_etag(name, version, changed_at):
+    """ETag of a whole collection from its change counter."""
+    stamp = changed_at.isoformat() if changed_at else ''
+    return f'{name}-{version}-{stamp}'
+
+
+def wallet_etag(kind, wallet_id, updated_at):
+    """ETag of a per-wallet resource; any change to it moves ``updated_at``."""
+    stamp = updated_at.isoformat() if updated_at else ''
+    return f'{kind}-{wallet_id}-{stamp}'
+
+
+def cached_wallet(request, wallet_id):
+    """``(wallet.to_dict(), updated_at)`` read through the wallet cache, or ``None``.
+
+    The dict is shared by every request that hits the entry; do not modify it.
+    """
+    def load():
+        wallet = request.dbsession.query(Wallet).filter(Wallet.id == wallet_id).first()
+        return None if wallet is None else (wallet.to_dict(), wallet.updated_at)
+    return read_cached(request, wallet_key(wallet_id), load)
 
-class WalletViews:
-    
-    def __init__(self, request):
-        self.request = request
-        self.session = get_db_session()
-    
-    def __del__(self):
-        if hasattr(self, 'session'):
-            self.session.close()
 
-@view_config(route_name='wallets', request_method='GET', renderer='json')
 def get_wallets(request):
-    session = get_db_session()
+    session = request.dbsession
+    
+    def load():
+        # Validator dibaca sebelum data, jadi tidak pernah lebih baru dari body
+        version, changed_at = get_versions(session, WALLETS)[WALLETS]
+        stmt = wallet_serializer.select().order_by(Wallet.id)
+        return version_etag(WALLETS, version, changed_at), changed_at, wallet_serializer(session.execute(stmt))
+    
     try:
-        wallets = session.query(Wallet).all()
-        result = [wallet.to_dict() for wallet in wallets]
+        etag, changed_at, result = read_cached(request, WALLET_LIST, load)
+        cached = not_modified(request, etag, changed_at)
+        if cached is not None:
+            return cached
+        
         return {'status': 'success', 'data': result}
     except Exception as e:
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='wallet_detail', request_method='GET', renderer='json')
 def get_wallet(request):
-    wallet_id = request.matchdict['id']
-    session = get_db_session()
+    wallet_id = matched_id(request)
     try:
-        wallet = session.query(Wallet).filter(Wallet.id == wallet_id).first()
-        if not wallet:
+        entry = cached_wallet(request, wallet_id)
+        if not entry:
             request.response.status = 404
             return {'status': 'error', 'message': 'Wallet not found'}
         
-        return {'status': 'success', 'data': wallet.to_dict()}
+        data, updated_at = entry
+        cached = not_modified(request, wallet_etag('wallet', wallet_id, updated_at), updated_at)
+        if cached is not None:
+            return cached
+        
+        return {'status': 'success', 'data': data}
     except Exception as e:
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='wallets', request_method='POST', renderer='json')
 def create_wallet(request):
     try:
         data = request.json_body
@@ -67,18 +133,19 @@ def create_wallet(request):
         valid_types = [wt.value for wt in WalletType]
         return {'status': 'error', 'message': f'Invalid wallet type. Valid types: {valid_types}'}
     
-    session = get_db_session()
+    session = request.dbsession
     try:
         wallet = Wallet(
             nama_dompet=data['nama_dompet'],
             deskripsi=data.get('deskripsi', ''),
-            saldo_awal=float(data.get('saldo_awal', 0.0)),
+            saldo_awal=parse_amount(data.get('saldo_awal', 0.0)),
             tipe_dompet=tipe_dompet,
             warna=data.get('warna', '#000000')
         )
         session.add(wallet)
-        session.commit()
-        session.refresh(wallet)
+        session.flush()
+        bump_versions(session, [wallet.id], WALLETS)
+        wallets_changed(request)
         
         request.response.status = 201
         return {
@@ -87,15 +154,13 @@ def create_wallet(request):
             'message': 'Wallet created successfully'
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='wallet_detail', request_method='PUT', renderer='json')
 def update_wallet(request):
-    wallet_id = request.matchdict['id']
+    wallet_id = matched_id(request)
     
     try:
         data = request.json_body
@@ -103,7 +168,7 @@ def update_wallet(request):
         request.response.status = 400
         return {'status': 'error', 'message': 'Invalid JSON data'}
     
-    session = get_db_session()
+    session = request.dbsession
     try:
         wallet = session.query(Wallet).filter(Wallet.id == wallet_id).first()
         if not wallet:
@@ -126,8 +191,9 @@ def update_wallet(request):
             wallet.warna = data['warna']
         
         wallet.updated_at = datetime.utcnow()
-        session.commit()
-        session.refresh(wallet)
+        session.flush()
+        bump_versions(session, [wallet.id], WALLETS)
+        wallets_changed(request, wallet.id)
         
         return {
             'status': 'success', 
@@ -135,16 +201,14 @@ def update_wallet(request):
             'message': 'Wallet updated successfully'
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='wallet_detail', request_method='DELETE', renderer='json')
 def delete_wallet(request):
-    wallet_id = request.matchdict['id']
-    session = get_db_session()
+    wallet_id = matched_id(request)
+    session = request.dbsession
     try:
         wallet = session.query(Wallet).filter(Wallet.id == wallet_id).first()
         if not wallet:
@@ -152,41 +216,123 @@ def delete_wallet(request):
             return {'status': 'error', 'message': 'Wallet not found'}
         
         wallet_name = wallet.nama_dompet
+        session.query(TransactionRollup).filter(TransactionRollup.wallet_id == wallet.id).delete()
+        discard_snapshots(session, wallet.id)
+        archived_paths = discard_archive(session, wallet.id)
         session.delete(wallet)
-        session.commit()
+        session.flush()
+        bump_versions(session, [wallet_id], WALLETS, TRANSACTIONS)
+        wallets_changed(request, wallet_id)
+        archive = request.registry['archive']
+        if archived_paths and archive is not None:
+            # File arsip dihapus hanya jika penghapusan dompet jadi di-commit
+            def remove_files(committed):
+                if committed:
+                    for path in archived_paths:
+                        archive.remove(path)
+            request.tm.get().addAfterCommitHook(remove_files)
         
         return {
             'status': 'success', 
             'message': f'Wallet "{wallet_name}" deleted successfully'
         }
     except Exception as e:
-        session.rollback()
+        if is_retryable(request, e):
+            raise
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
 
-@view_config(route_name='wallet_balance', request_method='GET', renderer='json')
 def get_wallet_balance(request):
-    wallet_id = request.matchdict['id']
-    session = get_db_session()
+    wallet_id = matched_id(request)
+    at = None
+    if request.params.get('at'):
+        try:
+            at, inclusive = parse_at(request.params['at'])
+        except ValueError as e:
+            request.response.status = 400
+            return {'status': 'error', 'message': str(e)}
+    
+    session = request.dbsession
+    try:
+        entry = cached_wallet(request, wallet_id)
+        if not entry:
+            request.response.status = 404
+            return {'status': 'error', 'message': 'Wallet not found'}
+        
+        wallet, updated_at = entry
+        cached = not_modified(request, wallet_etag('balance', wallet_id, updated_at), updated_at)
+        if cached is not None:
+            return cached
+        
+        data = {
+            'wallet_id': wallet['id'],
+            'wallet_name': wallet['nama_dompet'],
+            'saldo_awal': wallet['saldo_awal'],
+            'saldo_saat_ini': wallet['saldo_saat_ini']
+        }
+        
+        # Saldo pada waktu tertentu: snapshot terdekat + transaksi setelahnya
+        if at is not None:
+            wallet = session.get(Wallet, wallet_id)
+            if not wallet:
+                request.response.status = 404
+                return {'status': 'error', 'message': 'Wallet not found'}
+            saldo, snapshot_as_of = balance_at(session, wallet, at, inclusive, request.registry['archive'])
+            data['at'] = request.params['at']
+            data['saldo'] = saldo
+            data['snapshot_as_of'] = snapshot_as_of.isoformat() if snapshot_as_of else None
+        
+        return {
+            'status': 'success', 
+            'data': data
+        }
+    except Exception as e:
+        request.response.status = 500
+        return {'status': 'error', 'message': str(e)}
+
+def get_wallet_balance_history(request):
+    wallet_id = matched_id(request)
+    bucket = request.params.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        request.response.status = 400
+        return {'status': 'error', 'message': f'Invalid bucket. Valid buckets: {BUCKETS}'}
+    
+    try:
+        start = datetime.fromisoformat(request.params['from']) if request.params.get('from') else None
+        end, inclusive = parse_at(request.params['to']) if request.params.get('to') else (None, True)
+    except ValueError:
+        request.response.status = 400
+        return {'status': 'error', 'message': 'Invalid date format. Use ISO format (YYYY-MM-DD)'}
+    
+    points = request.params.get('points', str(MAX_HISTORY_POINTS))
+    if not points.isdigit() or int(points) < 1:
+        request.response.status = 400
+        return {'status': 'error', 'message': 'points must be a positive integer'}
+    max_points = min(int(points), MAX_HISTORY_POINTS)
+    
+    session = request.dbsession
     try:
         wallet = session.query(Wallet).filter(Wallet.id == wallet_id).first()
         if not wallet:
             request.response.status = 404
             return {'status': 'error', 'message': 'Wallet not found'}
         
+        cached = not_modified(request, wallet_etag('history', wallet.id, wallet.updated_at), wallet.updated_at)
+        if cached is not None:
+            return cached
+        
+        opening, points = balance_history(
+            session, wallet, bucket, start, end, inclusive, request.registry['archive'])
         return {
-            'status': 'success', 
+            'status': 'success',
             'data': {
                 'wallet_id': wallet.id,
-                'wallet_name': wallet.nama_dompet,
-                'saldo_awal': wallet.saldo_awal,
-                'saldo_saat_ini': wallet.saldo_saat_ini
+                'bucket': bucket,
+                'saldo_awal_periode': opening,
+                'buckets': len(points),
+                'points': downsample(points, max_points),
             }
         }
     except Exception as e:
         request.response.status = 500
         return {'status': 'error', 'message': str(e)}
-    finally:
-        session.close()
\ No newline at end of file
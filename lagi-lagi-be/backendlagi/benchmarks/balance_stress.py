@@ -0,0 +1,99 @@
+"""Concurrent transaction posts against a single wallet.
+
+Seeds one wallet, then ``--threads`` workers post ``--requests`` income and
+expense transactions each to that wallet through the real WSGI pipeline.
+Reports throughput and checks that the final ``saldo_saat_ini`` equals
+``saldo_awal`` plus the signed sum of the rows that were stored::
+
+    python benchmarks/balance_stress.py --url postgresql+psycopg://...
+
+Exits non-zero if the balance does not match or any request failed with a
+status other than 201 (created) or 400 (insufficient balance).
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import case, create_engine, func, select, update
+from sqlalchemy.orm import Session
+from webob import Request
+
+from backendlagi.models.transaction import Transaction, TransactionType
+from backendlagi.models.wallet import Wallet
+from session_throughput import build_app, seed
+
+
+def run(app, threads, per_thread):
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker(n):
+        for i in range(per_thread):
+            payload = {'tipe_transaksi': 'expense', 'jumlah': 3, 'category_id': 1,
+                       'wallet_id': 1, 'tanggal': '2025-01-01T10:00:00'}
+            if (n + i) % 2:
+                payload.update(tipe_transaksi='income', jumlah=1, category_id=12)
+            req = Request.blank('/api/transactions', method='POST',
+                                body=json.dumps(payload).encode('utf-8'))
+            req.content_type = 'application/json'
+            status = req.get_response(app).status_int
+            with lock:
+                statuses[status] += 1
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return threads * per_thread / (time.perf_counter() - started), statuses
+
+
+def set_balance(url, saldo_awal):
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(update(Wallet).values(saldo_awal=saldo_awal, saldo_saat_ini=saldo_awal))
+    engine.dispose()
+
+
+def check_balance(url):
+    engine = create_engine(url)
+    signed = case((Transaction.tipe_transaksi == TransactionType.income, Transaction.jumlah),
+                  else_=-Transaction.jumlah)
+    with Session(engine) as session:
+        stored = session.execute(
+            select(func.coalesce(func.sum(signed), 0)).where(Transaction.wallet_id == 1)
+        ).scalar()
+        wallet = session.get(Wallet, 1)
+        expected, actual = wallet.saldo_awal + stored, wallet.saldo_saat_ini
+    engine.dispose()
+    return expected, actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=250, help='requests per thread')
+    parser.add_argument('--pool-size', type=int, default=0)
+    parser.add_argument('--saldo-awal', type=float, default=1000.0,
+                        help='starting balance; low values exercise the insufficient-funds path')
+    args = parser.parse_args()
+
+    seed(args.url, 1, 0)
+    set_balance(args.url, args.saldo_awal)
+    app = build_app(args.url, args.pool_size)
+    rps, statuses = run(app, args.threads, args.requests)
+    expected, actual = check_balance(args.url)
+    print('%.1f req/s over %d requests (%d threads), statuses %s'
+          % (rps, args.threads * args.requests, args.threads, dict(statuses)))
+    print('saldo_saat_ini %.2f, expected %.2f' % (actual, expected))
+    if abs(actual - expected) > 1e-6 or set(statuses) - {201, 400}:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Peak RSS of a full /api/transactions/export download.
+
+Seed and measure in separate runs so seeding does not inflate the peak::
+
+    python benchmarks/export_memory.py --url ... --seed 1000000
+    python benchmarks/export_memory.py --url ... --format csv
+
+"""
+import argparse
+import resource
+import time
+
+from webob import Request
+
+from session_throughput import build_app, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--seed', type=int, default=0, help='seed this many transactions and exit')
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson'])
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.url, 20, args.seed)
+        return
+
+    app = build_app(args.url, 0)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    response = Request.blank('/api/transactions/export?format=' + args.format).get_response(app)
+    size = sum(len(chunk) for chunk in response.app_iter)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%s: %.1f MB in %.1fs, peak RSS %.1f MB (%.1f MB above app start)'
+          % (args.format, size / 1e6, elapsed, peak / 1024.0, (peak - before) / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+"""Latency and throughput of the frontend's flows through the real WSGI app.
+
+Builds the app with ``backendlagi.main`` against ``--url`` (a temporary
+SQLite file by default), seeds it, then runs ``--users`` concurrent virtual
+users. Each one replays ``--iterations`` flows picked from ``--mix``:
+
+    dashboard           wallets, summary, this month's transactions, categories
+    wallet_detail       wallets, wallet, wallet's transactions, balance
+    create_transaction  POST, then the refresh the frontend does
+    edit_transaction    GET one of the user's transactions, PUT, refresh
+    delete_transaction  DELETE one of the user's transactions, refresh
+
+p50/p95/p99 latency and requests per second are reported per route (the
+median over ``--repeat`` runs, each on freshly seeded data) and written
+to ``--output``. With ``--baseline`` the run is compared against
+a stored result, and the script exits non-zero when a route's p95 grew or
+its throughput dropped by more than the thresholds::
+
+    python benchmarks/loadtest.py --users 8 --output /tmp/run.json \\
+        --baseline benchmarks/loadtest_baseline.json
+
+By default requests go straight to the WSGI app in this process. With
+``--server waitress`` or ``--server prefork`` the app is served over HTTP
+from a child process (one waitress process, or ``--workers`` forked
+workers sharing the socket) so the two set-ups can be compared::
+
+    python benchmarks/loadtest.py --server waitress --output /tmp/single.json
+    python benchmarks/loadtest.py --server prefork --workers 4 --output /tmp/prefork.json
+
+Baselines depend on the machine and the database; record one with
+``--save-baseline`` on the machine the comparison runs on.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlencode
+
+import waitress
+from sqlalchemy.orm import Session
+from webob import Request
+from webob.client import send_request_app
+
+from backendlagi import prefork
+from backendlagi.models import after_fork, get_engine, rebuild_rollups, rebuild_snapshots, warm_pool
+from backendlagi.models.wallet import Wallet
+from session_throughput import build_app, seed
+
+FLOWS = ('dashboard', 'wallet_detail', 'create_transaction', 'edit_transaction', 'delete_transaction')
+DEFAULT_MIX = 'dashboard=4,wallet_detail=3,create_transaction=2,edit_transaction=1,delete_transaction=1'
+# Perubahan di bawah angka ini dianggap noise, bukan regresi
+MIN_P95_DELTA_MS = 1.0
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in FLOWS:
+            raise argparse.ArgumentTypeError('unknown flow %r, valid flows: %s' % (name, ', '.join(FLOWS)))
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(int(round(fraction * len(values) + 0.5)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def prepare(url, wallets, transactions):
+    """Seed the database and build the rollups/snapshots the app maintains on writes."""
+    seed(url, wallets, transactions)
+    engine = get_engine({'sqlalchemy.url': url})
+    with Session(engine) as session:
+        ids = [wallet_id for (wallet_id,) in session.query(Wallet.id)]
+        rebuild_rollups(session, ids)
+        rebuild_snapshots(session, ids)
+        session.commit()
+    engine.dispose()
+
+
+class VirtualUser(object):
+    """Replays frontend flows and records the latency of every request."""
+
+    def __init__(self, app, wallets, rnd, samples, statuses, base_url=None):
+        self.app = app
+        self.base_url = base_url
+        self.wallets = wallets
+        self.rnd = rnd
+        self.samples = samples
+        self.statuses = statuses
+        self.created = []
+
+    def call(self, route, method, path, body=None, **params):
+        req = Request.blank(path + ('?' + urlencode(params) if params else ''), method=method,
+                            base_url=self.base_url)
+        if body is not None:
+            req.body = json.dumps(body).encode('utf-8')
+            req.content_type = 'application/json'
+        started = time.perf_counter()
+        response = req.get_response(self.app if self.base_url is None else send_request_app)
+        elapsed = time.perf_counter() - started
+        key = '%s %s' % (method, route)
+        self.samples[key].append(elapsed)
+        self.statuses[key][response.status_int] += 1
+        return response
+
+    def wallet_id(self):
+        return self.rnd.randint(1, self.wallets)
+
+    def refresh(self, wallet_id):
+        self.call('/api/transactions', 'GET', '/api/transactions', page='1', limit='10', walletId=str(wallet_id))
+        self.call('/api/wallets', 'GET', '/api/wallets')
+        self.call('/api/summary', 'GET', '/api/summary', period='this-month')
+
+    def dashboard(self):
+        now = datetime.utcnow()
+        self.call('/api/wallets', 'GET', '/api/wallets')
+        self.call('/api/summary', 'GET', '/api/summary', period='this-month')
+        self.call('/api/transactions', 'GET', '/api/transactions', page='1', limit='10',
+                  startDate='%04d-%02d-01' % (now.year, now.month), endDate=now.date().isoformat())
+        self.call('/api/categories', 'GET', '/api/categories')
+
+    def wallet_detail(self):
+        wallet_id = self.wallet_id()
+        self.call('/api/wallets', 'GET', '/api/wallets')
+        self.call('/api/wallets/{id}', 'GET', '/api/wallets/%d' % wallet_id)
+        self.call('/api/transactions', 'GET', '/api/transactions', page='1', limit='10', walletId=str(wallet_id))
+        self.call('/api/wallets/{id}/balance', 'GET', '/api/wallets/%d/balance' % wallet_id)
+
+    def create_transaction(self):
+        wallet_id = self.wallet_id()
+        income = self.rnd.random() < 0.3
+        response = self.call('/api/transactions', 'POST', '/api/transactions', body={
+            'tipe_transaksi': 'income' if income else 'expense',
+            'jumlah': float(self.rnd.randint(1, 500)),
+            'category_id': self.rnd.randint(12, 18) if income else self.rnd.randint(1, 11),
+            'wallet_id': wallet_id,
+            'tanggal': datetime.utcnow().replace(microsecond=0).isoformat(),
+            'deskripsi': 'loadtest',
+        })
+        if response.status_int == 201:
+            self.created.append((response.json['data']['id'], wallet_id))
+        self.refresh(wallet_id)
+
+    def edit_transaction(self):
+        if not self.created:
+            return self.create_transaction()
+        transaction_id, wallet_id = self.rnd.choice(self.created)
+        path = '/api/transactions/%d' % transaction_id
+        self.call('/api/transactions/{id}', 'GET', path)
+        self.call('/api/transactions/{id}', 'PUT', path, body={
+            'jumlah': float(self.rnd.randint(1, 500)), 'deskripsi': 'loadtest (edited)'})
+        self.refresh(wallet_id)
+
+    def delete_transaction(self):
+        if not self.created:
+            return self.create_transaction()
+        transaction_id, wallet_id = self.created.pop(self.rnd.randrange(len(self.created)))
+        self.call('/api/transactions/{id}', 'DELETE', '/api/transactions/%d' % transaction_id)
+        self.refresh(wallet_id)
+
+
+def start_server(app, server, workers, threads):
+    """Serve ``app`` over HTTP from a forked child; return the process and its URL."""
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    listen = '127.0.0.1:%d' % probe.getsockname()[1]
+    probe.close()
+
+    def serve():
+        if server == 'prefork':
+            prefork.serve(app, listen, workers=workers, threads=threads)
+        else:
+            after_fork(app.registry)
+            httpd = waitress.create_server(app, listen=listen, threads=threads)
+            warm_pool(app.registry)
+            httpd.run()
+
+    process = multiprocessing.get_context('fork').Process(target=serve)
+    process.start()
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(listen.split(':')).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                process.terminate()
+                raise RuntimeError('%s server did not start' % server)
+            time.sleep(0.05)
+    return process, 'http://' + listen
+
+
+def stop_server(process):
+    os.kill(process.pid, signal.SIGTERM)
+    process.join(60)
+
+
+def run(app, wallets, users, iterations, mix, seed_value=0, base_url=None):
+    """Run ``users`` threads of ``iterations`` flows each; return the raw samples."""
+    names = sorted(mix)
+    weights = [mix[name] for name in names]
+    samples = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+
+    def worker(n):
+        rnd = random.Random(seed_value * 1000 + n)
+        own_samples = defaultdict(list)
+        own_statuses = defaultdict(lambda: defaultdict(int))
+        user = VirtualUser(app, wallets, rnd, own_samples, own_statuses, base_url)
+        for _ in range(iterations):
+            getattr(user, rnd.choices(names, weights)[0])()
+        with lock:
+            for key, values in own_samples.items():
+                samples[key].extend(values)
+            for key, counts in own_statuses.items():
+                for status, count in counts.items():
+                    statuses[key][status] += count
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(users)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, statuses, time.perf_counter() - started
+
+
+def summarize(samples, statuses, elapsed):
+    routes = {}
+    for key in sorted(samples):
+        values = sorted(samples[key])
+        routes[key] = {
+            'requests': len(values),
+            'rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+            'statuses': {str(status): count for status, count in sorted(statuses[key].items())},
+        }
+    total = sum(route['requests'] for route in routes.values())
+    return {'elapsed_s': round(elapsed, 3), 'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0.0, 'routes': routes}
+
+
+def merge(results):
+    """Combine repeated runs: the median of every per-route figure, summed statuses."""
+    if len(results) == 1:
+        return results[0]
+
+    def median(values):
+        return sorted(values)[len(values) // 2]
+
+    routes = {}
+    for key in sorted({key for result in results for key in result['routes']}):
+        runs = [result['routes'][key] for result in results if key in result['routes']]
+        route = {name: median([run[name] for run in runs])
+                 for name in ('requests', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')}
+        statuses = defaultdict(int)
+        for run in runs:
+            for status, count in run['statuses'].items():
+                statuses[status] += count
+        route['statuses'] = dict(sorted(statuses.items()))
+        routes[key] = route
+    return {
+        'elapsed_s': median([result['elapsed_s'] for result in results]),
+        'requests': median([result['requests'] for result in results]),
+        'rps': median([result['rps'] for result in results]),
+        'routes': routes,
+    }
+
+
+def compare(result, baseline, p95_threshold, rps_threshold, min_samples=0):
+    """Return a list of regression messages (empty when the run is acceptable).
+
+    The p95 of a route with fewer than ``min_samples`` requests in either
+    run is too noisy to compare and only its throughput is checked.
+    """
+    regressions = []
+    for key, route in sorted(result['routes'].items()):
+        before = baseline['routes'].get(key)
+        if before is None:
+            continue
+        if min(route['requests'], before['requests']) < min_samples:
+            p95_limit = float('inf')
+        else:
+            p95_limit = before['p95_ms'] * (1 + p95_threshold)
+        if route['p95_ms'] > p95_limit and route['p95_ms'] - before['p95_ms'] > MIN_P95_DELTA_MS:
+            regressions.append('%s: p95 %.2f ms > %.2f ms (baseline %.2f ms)'
+                               % (key, route['p95_ms'], p95_limit, before['p95_ms']))
+        rps_limit = before['rps'] * (1 - rps_threshold)
+        if route['rps'] < rps_limit:
+            regressions.append('%s: %.1f req/s < %.1f req/s (baseline %.1f req/s)'
+                               % (key, route['rps'], rps_limit, before['rps']))
+    return regressions
+
+
+def print_report(result, baseline=None):
+    print('%-34s %8s %9s %9s %9s %9s  %s' % ('route', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'statuses'))
+    for key, route in result['routes'].items():
+        line = '%-34s %8d %9.1f %9.2f %9.2f %9.2f  %s' % (
+            key, route['requests'], route['rps'], route['p50_ms'], route['p95_ms'], route['p99_ms'],
+            ' '.join('%s:%d' % item for item in route['statuses'].items()))
+        before = (baseline or {}).get('routes', {}).get(key)
+        if before:
+            line += '  (p95 was %.2f)' % before['p95_ms']
+        print(line)
+    print('total: %d requests in %.2f s, %.1f req/s' % (result['requests'], result['elapsed_s'], result['rps']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='database URL (default: a temporary SQLite file)')
+    parser.add_argument('--wallets', type=int, default=20)
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users (threads)')
+    parser.add_argument('--iterations', type=int, default=100, help='flows per user')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='reseed and run this many times, reporting medians (default 3)')
+    parser.add_argument('--warmup', type=int, default=5, help='flows per user before measuring')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help='flow weights, default %s' % DEFAULT_MIX)
+    parser.add_argument('--pool-size', type=int, default=0)
+    parser.add_argument('--server', choices=('inprocess', 'waitress', 'prefork'), default='inprocess',
+                        help='call the WSGI app directly (default) or over HTTP from a '
+                             'single waitress process or the prefork server')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='prefork worker processes (default: one per CPU)')
+    parser.add_argument('--threads', type=int, default=4, help='waitress threads per process (default 4)')
+    parser.add_argument('--output', help='write the result as JSON to this file')
+    parser.add_argument('--baseline', help='compare against this stored result')
+    parser.add_argument('--save-baseline', action='store_true', help='write the result to --baseline instead')
+    parser.add_argument('--p95-threshold', type=float, default=0.25,
+                        help='allowed relative p95 increase per route (default 0.25)')
+    parser.add_argument('--rps-threshold', type=float, default=0.20,
+                        help='allowed relative throughput drop per route (default 0.20)')
+    parser.add_argument('--min-samples', type=int, default=100,
+                        help='compare the p95 of routes with at least this many requests (default 100)')
+    args = parser.parse_args()
+    # Antrean waitress memang penuh saat diuji beban
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+
+    path = None
+    url = args.url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        url = 'sqlite:///' + path
+
+    results = []
+    try:
+        for repeat in range(args.repeat):
+            # Setiap ulangan mulai dari data yang sama
+            prepare(url, args.wallets, args.transactions)
+            app = build_app(url, args.pool_size)
+            process = base_url = None
+            if args.server != 'inprocess':
+                process, base_url = start_server(app, args.server, args.workers, args.threads)
+            try:
+                if args.warmup:
+                    run(app, args.wallets, args.users, args.warmup, args.mix, seed_value=1, base_url=base_url)
+                samples, statuses, elapsed = run(app, args.wallets, args.users, args.iterations, args.mix,
+                                                 base_url=base_url)
+            finally:
+                if process is not None:
+                    stop_server(process)
+            app.registry['dbsession_factory'].kw['bind'].dispose()
+            results.append(summarize(samples, statuses, elapsed))
+    finally:
+        if path is not None:
+            os.remove(path)
+
+    result = merge(results)
+    result['config'] = {
+        'database': url.split(':', 1)[0] if path is None else 'sqlite (temporary file)',
+        'wallets': args.wallets, 'transactions': args.transactions, 'users': args.users,
+        'iterations': args.iterations, 'mix': args.mix, 'repeat': args.repeat,
+        'server': args.server, 'workers': args.workers if args.server == 'prefork' else 1,
+        'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+    }
+
+    baseline = None
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if baseline:
+        for name in ('database', 'wallets', 'transactions', 'users', 'iterations', 'mix', 'repeat', 'cpus',
+                     'server', 'workers'):
+            if baseline['config'].get(name) != result['config'][name]:
+                print('warning: baseline %s was %r, this run %r' % (name, baseline['config'].get(name),
+                                                                    result['config'][name]))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error('--save-baseline needs --baseline')
+        with open(args.baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+        print('baseline written to %s' % args.baseline)
+        return
+
+    errors = sum(count for route in result['routes'].values()
+                 for status, count in route['statuses'].items() if status.startswith('5'))
+    regressions = compare(result, baseline, args.p95_threshold, args.rps_threshold,
+                                  args.min_samples) if baseline else []
+    for message in regressions:
+        print('REGRESSION ' + message)
+    if errors:
+        print('%d requests failed with a 5xx status' % errors)
+    if regressions or errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Recent-month queries against a growing history of monthly partitions.
+
+PostgreSQL only. Builds the schema with ``create_all`` (partitioned), then
+grows the transaction history backwards in stages (``--months 3,12,24,48``)
+with the same number of rows per month. After each stage it times the
+date-filtered reads of the current month (listing, listing per wallet,
+second cursor page, summary, export), checks with ``EXPLAIN`` that each
+reads only the current month's partition, and reports the median server
+time (planning plus execution, from ``EXPLAIN ANALYZE``) of each query and
+the median latency of the matching API requests::
+
+    python benchmarks/partitions.py --url postgresql+psycopg://localhost/bench
+
+Exits with status 1 when a query reads other partitions or its median
+server time at the largest history is more than ``--threshold`` above the
+first. The request latencies are mostly Python and are only reported.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+from webob import Request
+
+import backendlagi
+from backendlagi import models
+from backendlagi.models.base import Base
+from backendlagi.models.partitions import add_months, list_partitions, month_start, partition_name, scanned_partitions
+from backendlagi.models.readers import transaction_serializer
+from backendlagi.scripts.seed_db import Ledger, create_wallets, ensure_categories, write_rows
+from backendlagi.views.export_views import EXPORT_COLUMNS
+from backendlagi.views.summary_views import period_range, summary_statement
+from backendlagi.views.transaction_views import page_statement, transaction_filters
+
+
+def reset(engine, wallets):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session, session.begin():
+        ensure_categories(session)
+        return [wallet_id for wallet_id, _ in create_wallets(session, wallets, random.Random(1))]
+
+
+def grow(engine, wallet_ids, start, end, per_month, rnd):
+    """Add ``per_month`` rows for every month in ``[start, end)``."""
+    with engine.connect() as connection:
+        models.ensure_partitions(connection, start=start, end=end)
+    months = (end.year - start.year) * 12 + end.month - start.month
+    count = per_month * months // len(wallet_ids)
+    with engine.begin() as connection:
+        for wallet_id in wallet_ids:
+            ledger = Ledger(random.Random(rnd.getrandbits(32)))
+            write_rows(connection, ledger.rows(wallet_id, count, 10 ** 12, start, end), 1000)
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('ANALYZE transactions'))
+
+
+def requests(wallet_id, start, today, app):
+    query = 'startDate=%s&endDate=%s&limit=50' % (start.date().isoformat(), today.date().isoformat())
+    first = Request.blank('/api/transactions?' + query).get_response(app).json
+    return {
+        'list': '/api/transactions?' + query,
+        'wallet': '/api/transactions?%s&wallet_id=%d' % (query, wallet_id),
+        'page 2': '/api/transactions?%s&cursor=%s' % (query, first['next_cursor']),
+        'summary': '/api/summary?period=this-month',
+    }, first['next_cursor']
+
+
+def statements(wallet_id, start, today, cursor):
+    """The SQL each timed request runs against ``transactions``, plus the export."""
+    params = {'startDate': start.date().isoformat(), 'endDate': today.date().isoformat()}
+    criteria = transaction_filters(params)
+    by_wallet = transaction_filters(dict(params, wallet_id=str(wallet_id)))
+    return {
+        'list': page_statement(transaction_serializer.select().where(*criteria), None, 50),
+        'wallet': page_statement(transaction_serializer.select().where(*by_wallet), None, 50),
+        'page 2': page_statement(transaction_serializer.select().where(*criteria), cursor, 50),
+        'summary': summary_statement(*period_range('this-month', today.date())),
+        'export': select(*[getattr(models.Transaction, name) for name in EXPORT_COLUMNS]).where(*criteria),
+    }
+
+
+def server_time(connection, stmt, repeat):
+    sql = stmt.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}).string
+    samples = []
+    for _ in range(repeat):
+        plan = connection.exec_driver_sql('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql).scalar()[0]
+        samples.append(plan['Planning Time'] + plan['Execution Time'])
+    return statistics.median(samples)
+
+
+def timed(app, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = Request.blank(path).get_response(app)
+        samples.append(time.perf_counter() - started)
+        assert response.status_int == 200, (path, response.status)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True, help='PostgreSQL database URL (its tables are recreated)')
+    parser.add_argument('--months', default='3,12,24,48', help='history sizes to measure, in months')
+    parser.add_argument('--per-month', type=int, default=20000, help='transactions per month')
+    parser.add_argument('--wallets', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=100, help='runs of each query and request per stage')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown of the largest history over the first (default 0.25)')
+    args = parser.parse_args()
+
+    stages = sorted(int(value) for value in args.months.split(','))
+    engine = create_engine(args.url)
+    if engine.dialect.name != 'postgresql':
+        parser.error('partitioning needs PostgreSQL')
+    wallet_ids = reset(engine, args.wallets)
+    app = backendlagi.main({}, **{'sqlalchemy.url': args.url, 'backendlagi.wallet_cache.max_entries': '0'})
+
+    rnd = random.Random(42)
+    today = datetime.utcnow()
+    current = month_start(today)
+    covered = add_months(current, 1)
+    results = []
+    failed = False
+    for months in stages:
+        start = add_months(current, 1 - months)
+        grow(engine, wallet_ids, start, covered, args.per_month, rnd)
+        covered = start
+
+        paths, cursor = requests(wallet_ids[0], current, today, app)
+        with engine.connect() as connection:
+            rows = connection.execute(text('SELECT count(*) FROM transactions')).scalar()
+            partitions = len(list_partitions(connection))
+            stmts = statements(wallet_ids[0], current, today, cursor)
+            for name, stmt in stmts.items():
+                scanned = scanned_partitions(connection, stmt)
+                if scanned != {partition_name(current)}:
+                    print('  %s reads %s' % (name, ', '.join(sorted(scanned))))
+                    failed = True
+            server = {name: server_time(connection, stmt, args.repeat) for name, stmt in stmts.items()}
+        latency = {name: timed(app, path, args.repeat) for name, path in paths.items()}
+        results.append((months, server))
+        print('%3d months, %8d rows, %3d partitions' % (months, rows, partitions))
+        for name, value in server.items():
+            print('    %-8s server %6.2f ms%s' % (
+                name, value, '   request %6.1f ms' % latency[name] if name in latency else ''))
+
+    first, last = results[0][1], results[-1][1]
+    for name in first:
+        ratio = last[name] / first[name]
+        print('%-8s server time x%.2f from %d to %d months' % (name, ratio, results[0][0], results[-1][0]))
+        if ratio > 1 + args.threshold:
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
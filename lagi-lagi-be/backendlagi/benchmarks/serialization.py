@@ -0,0 +1,61 @@
+"""Per-row cost of turning list query results into JSON-ready dicts.
+
+Compares the ORM path (hydrate ``Transaction``/``Wallet`` instances, then
+``to_dict()``) with the Core column path in ``backendlagi.models.readers``::
+
+    python benchmarks/serialization.py --url sqlite:////tmp/bench.sqlite --rows 100000
+
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backendlagi.models import Transaction, Wallet
+from backendlagi.models.readers import transaction_serializer, wallet_serializer
+from session_throughput import seed
+
+
+def orm_path(session, model):
+    return [obj.to_dict() for obj in session.query(model).order_by(model.id)]
+
+
+def core_path(session, model, serializer):
+    return serializer(session.execute(serializer.select().order_by(model.id)))
+
+
+def timed(engine, fn, repeat):
+    best = None
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            rows = fn(session)
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--wallets', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    seed(args.url, args.wallets, args.rows)
+    engine = create_engine(args.url)
+    cases = [
+        ('transactions', Transaction, transaction_serializer),
+        ('wallets', Wallet, wallet_serializer),
+    ]
+    for name, model, serializer in cases:
+        orm, n = timed(engine, lambda s: orm_path(s, model), args.repeat)
+        core, _ = timed(engine, lambda s: core_path(s, model, serializer), args.repeat)
+        print('%-12s %7d rows  orm %6.2f us/row  core %6.2f us/row  (%.1fx)'
+              % (name, n, orm / n * 1e6, core / n * 1e6, orm / core))
+
+
+if __name__ == '__main__':
+    main()
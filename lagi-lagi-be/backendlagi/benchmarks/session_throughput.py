@@ -0,0 +1,150 @@
+"""Requests per second of the JSON API through the real WSGI pipeline.
+
+Builds the app with ``backendlagi.main`` against ``--url``, seeds it with
+wallets and transactions, then replays list/detail/create requests from
+``--threads`` worker threads. Used to compare session handling strategies::
+
+    python benchmarks/session_throughput.py --url postgresql+psycopg://localhost/bench
+
+Seeding drops and recreates every table of the app. The script refuses a
+database that already has tables unless ``--recreate`` is given, so point it
+at a scratch database, never at the one in ``development.ini`` or
+``production.ini``.
+
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, inspect
+from webob import Request
+
+import backendlagi
+from backendlagi.models.base import Base
+from backendlagi.models.category import Category, TransactionType as CategoryType
+from backendlagi.models.transaction import Transaction, TransactionType, expenseCategory, incomeCategory
+from backendlagi.models.wallet import Wallet, WalletType
+from sqlalchemy.orm import Session
+
+
+def seed(url, wallets, transactions):
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rnd = random.Random(42)
+    with Session(engine) as session:
+        session.add_all(
+            [Category(id=c.value, name=c.name, transaction_type=CategoryType.expense) for c in expenseCategory]
+            + [Category(id=c.value, name=c.name, transaction_type=CategoryType.income) for c in incomeCategory]
+        )
+        for i in range(wallets):
+            session.add(Wallet('Dompet %d' % i, '', 10 ** 9, WalletType.bank, '#000000'))
+        session.flush()
+        start = datetime(2024, 1, 1)
+        rows = [
+            {
+                'tipe_transaksi': TransactionType.expense,
+                'jumlah': float(rnd.randint(1, 500)),
+                'deskripsi': 'seed',
+                'wallet_id': rnd.randint(1, wallets),
+                'category_id': rnd.choice(list(expenseCategory)).value,
+                'tanggal': start + timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+                'catatan': '',
+                'created_at': start,
+            }
+            for _ in range(transactions)
+        ]
+        if rows:
+            session.execute(Transaction.__table__.insert(), rows)
+        session.commit()
+    engine.dispose()
+
+
+def build_app(url, pool_size):
+    settings = {
+        'sqlalchemy.url': url,
+        'retry.attempts': '3',
+    }
+    if pool_size:
+        settings['sqlalchemy.pool_size'] = str(pool_size)
+    return backendlagi.main({}, **settings)
+
+
+def make_requests(wallets):
+    body = json.dumps({
+        'tipe_transaksi': 'expense',
+        'jumlah': 1,
+        'category_id': 1,
+        'wallet_id': 1,
+        'tanggal': '2025-01-01T10:00:00',
+        'deskripsi': 'bench',
+    }).encode('utf-8')
+
+    def post():
+        req = Request.blank('/api/transactions', method='POST', body=body)
+        req.content_type = 'application/json'
+        return req
+
+    return [
+        ('GET /api/wallets', lambda: Request.blank('/api/wallets')),
+        ('GET /api/wallets/{id}', lambda: Request.blank('/api/wallets/%d' % random.randint(1, wallets))),
+        ('GET /api/transactions', lambda: Request.blank('/api/transactions?limit=50&wallet_id=%d' % random.randint(1, wallets))),
+        ('POST /api/transactions', post),
+    ]
+
+
+def run(app, requests, threads, per_thread):
+    errors = []
+
+    def worker():
+        for i in range(per_thread):
+            name, factory = requests[i % len(requests)]
+            response = factory().get_response(app)
+            if response.status_int >= 400:
+                errors.append((name, response.status, response.text[:200]))
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return threads * per_thread / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True,
+                        help='database URL of a scratch database; all its tables are dropped and recreated')
+    parser.add_argument('--recreate', action='store_true',
+                        help='allow a database that already has tables (their data is lost)')
+    parser.add_argument('--wallets', type=int, default=20)
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='requests per thread')
+    parser.add_argument('--pool-size', type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    tables = inspect(engine).get_table_names()
+    engine.dispose()
+    if tables and not args.recreate:
+        parser.error('%s already has tables (%s); pass --recreate to drop them'
+                     % (engine.url.render_as_string(hide_password=True), ', '.join(sorted(tables)[:5])))
+
+    seed(args.url, args.wallets, args.transactions)
+    app = build_app(args.url, args.pool_size)
+    run(app, make_requests(args.wallets), 1, 20)  # warm up
+    rps, errors = run(app, make_requests(args.wallets), args.threads, args.requests)
+    print('%.1f req/s over %d requests (%d threads), %d errors'
+          % (rps, args.threads * args.requests, args.threads, len(errors)))
+    for error in errors[:5]:
+        print('  ', error)
+
+
+if __name__ == '__main__':
+    main()
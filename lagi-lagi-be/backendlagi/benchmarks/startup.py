@@ -0,0 +1,133 @@
+"""Cold-start time of the app: import, ``make_wsgi_app`` and the first request.
+
+Every sample is a fresh interpreter, so nothing is cached between runs
+except the OS page cache and the ``.pyc`` files. Each child process reports
+
+    import          ``import backendlagi, backendlagi.models, backendlagi.views``
+    make_wsgi_app   ``backendlagi.main(...)`` (configuration, view modules)
+    first_request   the first ``GET /api/wallets`` (connects to the database)
+
+plus the engines that exist right after the import (must be 0) and the
+``backendlagi`` modules loaded by the time the first request is answered.
+The median of ``--repeat`` runs is compared with ``BUDGET``; the script
+exits non-zero when a phase is over budget::
+
+    python benchmarks/startup.py --repeat 5
+
+``--url`` defaults to a temporary SQLite file with the tables created.
+The budgets are deliberately loose, for slow CI machines: they catch a
+gross regression such as a query at import time, not noise. The tests also
+check the module list, which catches a package scan exactly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+# Detik, median
+BUDGET = {
+    'import': 1.5,
+    'make_wsgi_app': 0.75,
+    'first_request': 0.5,
+}
+
+CHILD = r'''
+import gc, json, sys, time
+started = time.perf_counter()
+import backendlagi, backendlagi.models, backendlagi.views
+imported = time.perf_counter()
+from sqlalchemy.engine import Engine
+engines = sum(1 for obj in gc.get_objects() if isinstance(obj, Engine))
+app = backendlagi.main({}, **{'sqlalchemy.url': sys.argv[1]})
+configured = time.perf_counter()
+from webob import Request
+response = Request.blank('/api/wallets').get_response(app)
+answered = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'make_wsgi_app': configured - imported,
+    'first_request': answered - configured,
+    'status': response.status_int,
+    'engines_at_import': engines,
+    'modules': sorted(name for name in sys.modules if name.startswith('backendlagi')),
+}))
+'''
+
+
+def sample(url):
+    """Start one fresh interpreter and return its measurements."""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, url],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    ).stdout
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+def measure(url, repeat):
+    samples = [sample(url) for _ in range(repeat)]
+    result = {phase: round(statistics.median(s[phase] for s in samples), 4) for phase in BUDGET}
+    result['max'] = {phase: round(max(s[phase] for s in samples), 4) for phase in BUDGET}
+    result['statuses'] = sorted({s['status'] for s in samples})
+    result['engines_at_import'] = max(s['engines_at_import'] for s in samples)
+    result['modules'] = samples[-1]['modules']
+    return result
+
+
+def over_budget(result, budget=BUDGET):
+    """Messages for the phases whose median exceeds ``budget``."""
+    return ['%s took %.3f s, budget %.3f s' % (phase, result[phase], limit)
+            for phase, limit in sorted(budget.items()) if result[phase] > limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='database URL (default: a temporary SQLite file)')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters to start (default 5)')
+    parser.add_argument('--output', help='write the result as JSON to this file')
+    args = parser.parse_args()
+
+    path = None
+    url = args.url
+    if url is None:
+        from backendlagi.models.base import Base
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        url = 'sqlite:///' + path
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+    try:
+        result = measure(url, args.repeat)
+    finally:
+        if path is not None:
+            os.remove(path)
+
+    print('phase            median ms    max ms  budget ms')
+    for phase in BUDGET:
+        print('%-15s %10.1f %9.1f %10.0f' % (phase, result[phase] * 1000, result['max'][phase] * 1000,
+                                           BUDGET[phase] * 1000))
+    print('engines at import: %d, backendlagi modules loaded: %d'
+          % (result['engines_at_import'], len(result['modules'])))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    problems = over_budget(result)
+    if result['engines_at_import']:
+        problems.append('%d engines created at import time' % result['engines_at_import'])
+    if result['statuses'] != [200]:
+        problems.append('first request answered %s' % result['statuses'])
+    for message in problems:
+        print('OVER BUDGET ' + message)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -54,8 +54,15 @@ setup(
         'paste.app_factory': [
             'main = backendlagi:main',
         ],
+        'paste.server_runner': [
+            'prefork = backendlagi.prefork:serve_paste',
+        ],
         'console_scripts': [
             'initialize_backendlagi_db = backendlagi.scripts.initialize_db:main',
+            'rebuild_backendlagi_rollups = backendlagi.scripts.rebuild_rollups:main',
+            'seed_backendlagi_db = backendlagi.scripts.seed_db:main',
+            'maintain_backendlagi_partitions = backendlagi.scripts.maintain_partitions:main',
+            'archive_backendlagi_transactions = backendlagi.scripts.archive_transactions:main',
         ],
     },
 )